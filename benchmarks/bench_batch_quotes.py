@@ -0,0 +1,69 @@
+"""
+Batch quoting (NumPy) against a Python loop over the per-session helpers.
+
+Checks that both produce identical figures and validity, then times them on
+the same inputs: random forward and reverse quotes across every corridor,
+including out-of-range amounts and half-cent ties.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_batch_quotes [N]
+"""
+import sys
+import time
+
+import numpy as np
+
+from send_money_agent.batch_quotes import quote_batch
+from send_money_agent.helpers import validate_amount
+from send_money_agent.rates import StaticRateProvider
+
+RATES = StaticRateProvider().fetch_rates()
+
+
+def python_loop(codes, amounts, direction):
+    """What pricing N quotes through the existing helpers costs today."""
+    send, receive, valid = [], [], []
+    for code, amount in zip(codes, amounts):
+        rate = RATES[code]
+        if direction == "forward":
+            ok, _ = validate_amount(amount)
+            send.append(amount)
+            receive.append(round(amount * rate, 2))
+        else:
+            usd = round(amount / rate, 2)
+            ok = amount > 0 and validate_amount(usd)[0]
+            send.append(usd)
+            receive.append(amount)
+        valid.append(ok)
+    return send, receive, valid
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    rng = np.random.default_rng(7)
+    codes = rng.choice(sorted(RATES), size=n)
+    amounts = np.round(rng.uniform(-100, 12000, size=n), 3)
+    amounts[: n // 10] = np.round(amounts[: n // 10], 2) + 0.005  # half-cent ties
+    amounts_list, codes_list = amounts.tolist(), codes.tolist()
+
+    for direction in ("forward", "reverse"):
+        inputs = amounts_list if direction == "forward" else [a * 50 for a in amounts_list]
+        start = time.perf_counter()
+        send, receive, valid = python_loop(codes_list, inputs, direction)
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batch = quote_batch(codes, inputs, direction, rates=RATES)
+        batch_time = time.perf_counter() - start
+
+        assert batch["send_amount"].tolist() == send, "send_amount mismatch"
+        assert batch["receive_amount"].tolist() == receive, "receive_amount mismatch"
+        assert batch["valid"].tolist() == valid, "validity mismatch"
+        print(
+            f"{direction:<8} n={n}: loop {loop_time * 1e3:8.1f} ms, batch {batch_time * 1e3:7.1f} ms "
+            f"({loop_time / batch_time:4.1f}x), results identical"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Microbenchmark: corridor lookup cost, linear scan vs. CorridorRegistry.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_corridor_lookup
+"""
+import timeit
+
+from send_money_agent.corridor_source import DEFAULT_CORRIDORS_FILE
+from send_money_agent.corridors import Corridor, CorridorRegistry, read_corridor_config
+
+SUPPORTED_COUNTRIES = read_corridor_config(DEFAULT_CORRIDORS_FILE)['corridors']
+
+SIZES = (3, 200, 2000)
+LOOKUPS = 20000
+
+
+def make_table(size: int) -> list[dict]:
+    """Real corridors first, padded with synthetic ones up to `size`."""
+    table = [dict(c) for c in SUPPORTED_COUNTRIES[:size]]
+    for i in range(len(table), size):
+        table.append({
+            "country_name": f"Country {i:04d}",
+            "currency_code": f"C{i:04d}",
+            "exchange_rate": 1.0 + i / 100,
+            "delivery_methods": ["Bank Transfer"],
+            "iso_alpha2": f"Z{i:04d}",
+            "iso_alpha3": f"ZZ{i:04d}",
+            "aliases": [f"Land {i:04d}"],
+        })
+    return table
+
+
+def linear_lookup(table: list[dict], country: str):
+    """The original mock_data.get_country_data implementation."""
+    country_lower = country.lower()
+    for country_config in table:
+        if country_config['country_name'].lower() == country_lower:
+            return country_config
+    return None
+
+
+def main() -> None:
+    print(f"{'corridors':>10} {'linear (us)':>12} {'registry (us)':>14} {'speedup':>8}")
+    for size in SIZES:
+        table = make_table(size)
+        registry = CorridorRegistry(Corridor.from_dict(c) for c in table)
+        # Worst case for the scan: the last corridor, plus a miss
+        keys = [table[-1]['country_name'].upper(), "Atlantis"]
+
+        linear = timeit.timeit(
+            lambda: [linear_lookup(table, k) for k in keys], number=LOOKUPS
+        ) / (LOOKUPS * len(keys))
+        indexed = timeit.timeit(
+            lambda: [registry.lookup(k) for k in keys], number=LOOKUPS
+        ) / (LOOKUPS * len(keys))
+        print(f"{size:>10} {linear * 1e6:>12.3f} {indexed * 1e6:>14.3f} {linear / indexed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Corridor file hot reload: access cost, reload cost and snapshot consistency.
+
+Checks, against a temporary corridor file:
+
+- new sessions and resets start on the file's `default_country`;
+- a corridor added to the file is usable after the next check: set_destination
+  succeeds (the static rate table refreshes on reload) and the prompt lists it;
+- a registry taken before a reload still answers with the old corridors;
+- a broken file is logged and ignored, the previous snapshot stays, and the
+  next good write is picked up;
+- readers checking on every access while a writer replaces the file 200
+  times only ever see complete snapshots.
+
+Then times `get_corridor_registry()` (throttled check vs. a stat on every
+access) and a reload (parse + registry + first prompt variant) of JSON and
+YAML files with 3, 200 and 2000 corridors.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_corridor_reload
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import timeit
+
+import yaml
+from google.adk.sessions.state import State
+
+from send_money_agent.agent import initial_state
+from send_money_agent.corridor_source import DEFAULT_CORRIDORS_FILE, CorridorSource, set_corridor_source
+from send_money_agent.corridors import read_corridor_config
+from send_money_agent.mock_data import get_corridor_registry
+from send_money_agent.prompts.compiler import estimate_tokens
+from send_money_agent.prompts.prompt_v3 import get_compiler
+from send_money_agent.rates import set_rate_service
+from send_money_agent.tools import cancel_transfer_session, set_destination
+
+from .bench_corridor_lookup import make_table
+
+BASE = read_corridor_config(DEFAULT_CORRIDORS_FILE)
+PERU = {
+    "country_name": "Peru", "currency_code": "PEN", "exchange_rate": 3.75,
+    "delivery_methods": ["Bank Transfer", "Cash Pickup"], "iso_alpha2": "PE", "iso_alpha3": "PER",
+}
+SAMPLES = 200_000
+
+
+class _ToolContext:
+    def __init__(self):
+        self.state = State(value=initial_state(), delta={})
+
+
+def write(path: str, config: dict) -> None:
+    """Replace the file atomically, the way a deploy should."""
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as file:
+        if path.endswith((".yaml", ".yml")):
+            yaml.safe_dump(config, file, allow_unicode=True)
+        else:
+            json.dump(config, file, ensure_ascii=False)
+    os.replace(temporary, path)
+
+
+def use(path: str, check_interval: float = 0.0) -> CorridorSource:
+    source = CorridorSource(path, check_interval=check_interval)
+    set_corridor_source(source)
+    # The rate service follows the corridor source it was created with
+    set_rate_service(None)
+    return source
+
+
+def checks(directory: str) -> list[tuple[str, bool]]:
+    path = os.path.join(directory, "corridors.json")
+    write(path, {**BASE, "default_country": "Mexico"})
+    source = use(path)
+    results = []
+
+    context = _ToolContext()
+    set_destination(country="Argentina", tool_context=context)
+    cancel_transfer_session(tool_context=context)
+    results.append(("default corridor comes from the file",
+                     initial_state()['destination_country'] == "Mexico"
+                     and context.state['destination_country'] == "Mexico"))
+
+    before = get_corridor_registry()
+    write(path, {**BASE, "default_country": "Mexico", "corridors": BASE['corridors'][1:] + [PERU]})
+    result = set_destination(country="peru", tool_context=_ToolContext())
+    results.append(("added corridor is quoted and listed in the prompt",
+                     result['success'] and "**Peru**" in get_compiler().full_text()
+                     and "Brazil" not in get_compiler().full_text().split("## SUPPORTED COUNTRIES")[1]))
+    results.append(("registry taken before the reload is unchanged",
+                     before.lookup("Brazil") is not None and before.lookup("Peru") is None
+                     and before.default_corridor.country_name == "Mexico"))
+
+    snapshot = get_corridor_registry()
+    with open(path, "w", encoding="utf-8") as file:
+        file.write('{"corridors": [{"country_name": "Chile"')
+    kept = get_corridor_registry() is snapshot and source.errors == 1
+    write(path, BASE)
+    results.append(("broken file is ignored until the next good write",
+                    kept and get_corridor_registry().lookup("Brazil") is not None))
+
+    # Generation g: every corridor has rate g and every name ends in g
+    def generation(g: int) -> dict:
+        return {"corridors": [
+            {**c, "exchange_rate": float(g), "country_name": f"{c['country_name']} {g}"} for c in make_table(50)
+        ]}
+
+    write(path, generation(0))
+    source.check()
+    torn, reads, stop = [], [0], threading.Event()
+
+    def reader():
+        while not stop.is_set():
+            registry = get_corridor_registry()
+            rates = {corridor.exchange_rate for corridor in registry}
+            names = {name.rsplit(" ", 1)[1] for name in registry.country_names}
+            if len(rates) != 1 or names != {str(int(next(iter(rates))))}:
+                torn.append(registry)
+            reads[0] += 1
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for g in range(1, 201):
+        write(path, generation(g))
+        time.sleep(0.002)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    results.append((f"no torn snapshot in {reads[0]:,} reads over {source.reloads} reloads", not torn))
+    return results
+
+
+def timings(directory: str) -> None:
+    path = os.path.join(directory, "timed.json")
+    write(path, BASE)
+    for label, interval in (("throttled (1 s)", 1.0), ("stat every access", 0.0)):
+        use(path, interval)
+        per_call = timeit.timeit(get_corridor_registry, number=SAMPLES) / SAMPLES
+        print(f"get_corridor_registry  {label:<18} {per_call * 1e6:>6.2f} µs")
+
+    print(f"\n{'corridors':>10} {'format':<6} {'file KB':>8} {'reload ms':>10} {'prompt ms':>10} {'country tokens':>15}")
+    for size in (3, 200, 2000):
+        config = {**BASE, "corridors": make_table(size)}
+        for extension in ("json", "yaml"):
+            path = os.path.join(directory, f"corridors-{size}.{extension}")
+            write(path, BASE)
+            source = use(path)
+            write(path, config)
+            reload_ms = timeit.timeit(source.check, number=1) * 1e3
+            prompt_ms = timeit.timeit(lambda: get_compiler().compile(("collecting", frozenset())), number=1) * 1e3
+            countries = get_compiler().full_text().split("## SUPPORTED COUNTRIES")[1]
+            print(f"{size:>10} {extension:<6} {os.path.getsize(path) / 1024:>8.1f} {reload_ms:>10.1f} "
+                  f"{prompt_ms:>10.2f} {estimate_tokens(countries):>15,}")
+
+
+def main() -> None:
+    # Expected warnings from the broken-file check
+    logging.getLogger("send_money_agent.corridor_source").setLevel(logging.ERROR)
+    with tempfile.TemporaryDirectory() as directory:
+        for name, passed in checks(directory):
+            print(f"  {'ok  ' if passed else 'FAIL'} {name}")
+        print()
+        timings(directory)
+    set_corridor_source(None)
+    set_rate_service(None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+after_tool_callback overhead: print() vs. the queue-backed event log.
+
+The previous callback printed a line to stdout per tool call. Both versions
+run against the same tool contexts with their output going to:
+
+- /dev/null (a fast consumer), and
+- a pipe drained by a slow reader (a terminal or log shipper that falls
+  behind), where print() blocks once the pipe buffer is full.
+
+Reports mean and worst-case time spent inside the callback, plus what the
+event log sampled or dropped to stay non-blocking.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_event_log
+"""
+import contextlib
+import os
+import threading
+import time
+
+from google.adk.sessions.state import State
+
+from send_money_agent.agent import INITIAL_STATE, after_tool_callback
+from send_money_agent.event_log import EventLog, set_event_log
+from send_money_agent.helpers import advance_stage, get_missing_fields
+
+CALLS = 20_000
+SLOW_READ_BYTES = 4096
+SLOW_READ_INTERVAL = 0.002
+
+
+def print_after_tool_callback(tool, args, tool_context, tool_response):
+    """The callback as it was before the event log."""
+    current_stage = tool_context.state.get('stage', 'initial')
+    if current_stage == 'collecting':
+        if tool_context.state.get('validation_errors'):
+            print(f"[Callback] Blocked by validation errors")
+            return None
+        if advance_stage(tool_context.state):
+            print(f"[Callback] Stage advanced: collecting → confirming")
+        else:
+            missing = get_missing_fields(tool_context.state)
+            print(f"[Callback] Still collecting. Missing: {missing}")
+    return None
+
+
+class _Tool:
+    name = "set_amount"
+
+
+class _Session:
+    id = "bench-session"
+
+
+class _ToolContext:
+    session = _Session()
+    invocation_id = "bench-invocation"
+
+    def __init__(self, index: int):
+        self.function_call_id = f"call-{index}"
+        self.state = State(value={**INITIAL_STATE, "stage": "collecting", "send_amount": 100.0}, delta={})
+
+
+def timed_calls(callback) -> tuple[float, float]:
+    contexts = [_ToolContext(i) for i in range(CALLS)]
+    durations = []
+    for context in contexts:
+        start = time.perf_counter()
+        callback(_Tool(), {"amount": 100.0}, context, {"success": True})
+        durations.append(time.perf_counter() - start)
+    return sum(durations) / len(durations), max(durations)
+
+
+@contextlib.contextmanager
+def output_to(target: str):
+    """Point fd 1 at /dev/null or at a pipe with a slow reader."""
+    if target == "devnull":
+        fd = os.open(os.devnull, os.O_WRONLY)
+        reader = None
+    else:
+        read_fd, fd = os.pipe()
+
+        def drain():
+            while os.read(read_fd, SLOW_READ_BYTES):
+                time.sleep(SLOW_READ_INTERVAL)
+
+        reader = threading.Thread(target=drain, daemon=True)
+        reader.start()
+    saved = os.dup(1)
+    os.dup2(fd, 1)
+    stream = os.fdopen(os.dup(1), "w", buffering=1)
+    try:
+        with contextlib.redirect_stdout(stream):
+            yield stream
+    finally:
+        stream.flush()
+        os.dup2(saved, 1)
+        os.close(saved)
+        os.close(fd)
+
+
+def main() -> None:
+    results = []
+    for target in ("devnull", "slow pipe"):
+        with output_to(target) as stream:
+            mean, worst = timed_calls(print_after_tool_callback)
+            results.append((target, "print()", mean, worst, ""))
+
+            event_log = EventLog(stream=stream)
+            set_event_log(event_log)
+            mean, worst = timed_calls(after_tool_callback)
+            stats = event_log.stats()
+            set_event_log(None)
+            results.append((
+                target, "event log", mean, worst,
+                f"sampled {stats['sampled_out']:,}, dropped {stats['dropped']:,} of {stats['emitted']:,}",
+            ))
+
+    print(f"{CALLS:,} callbacks per run")
+    print(f"{'output':<10} {'callback':<10} {'mean µs':>9} {'worst ms':>9}")
+    for target, name, mean, worst, note in results:
+        print(f"{target:<10} {name:<10} {mean * 1e6:>9.1f} {worst * 1e3:>9.2f}   {note}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+Transfer export: delivery checks, sustained throughput and confirm latency.
+
+Checks, against a temporary ledger and export directory:
+
+- every transfer confirmed through the README flows is exported with its
+  transaction ID, in sealed files only;
+- with a 10-record buffer and many concurrent confirmations, `submit` drops
+  records instead of blocking and the exporter reads them back from the
+  ledger: nothing is missing or duplicated;
+- a second exporter on the same directory stays inactive;
+- a child process confirming and exporting is SIGKILLed mid-run; a new
+  exporter replays from the checkpoint: every transfer in the ledger is
+  exported at least once and no `.inprogress` file is left;
+- Parquet files read back with pyarrow and hold the same records.
+
+Then measures sustained export throughput (records/s from first submit to the
+last file sealed) for JSONL and Parquet, and confirm latency (ledger record +
+submit, T threads) with export off and on while flushes and rotations run.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_export
+    python -m benchmarks.bench_export --records 200000 --threads 16
+"""
+import argparse
+import asyncio
+import glob
+import json
+import logging
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import pyarrow.parquet as pq
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from send_money_agent.agent import root_agent
+from send_money_agent.event_log import EventLog, set_event_log
+from send_money_agent.export import TransferExporter, set_exporter
+from send_money_agent.fake_model import FakeModel
+from send_money_agent.ledger import Ledger, LedgerEntry, format_transaction_id, set_ledger
+from send_money_agent.response_cache import set_response_cache
+
+from .bench_ledger import TRANSFER
+from .load_test import SCRIPTS, percentile
+
+APP = "send_money_export"
+KILL_AFTER = 3000
+
+CHILD = """
+import sys, threading
+from send_money_agent.export import TransferExporter
+from send_money_agent.ledger import Ledger
+ledger = Ledger(sys.argv[1], fsync=False)
+exporter = TransferExporter(sys.argv[2], sys.argv[1], batch_size=100, flush_interval=0.01, rotate_records=500)
+lock = threading.Lock()
+def worker(n):
+    i = 0
+    while True:
+        entry = ledger.record(f"w{n}-{i}", {"n": n, "i": i})
+        exporter.submit(entry)
+        with lock:
+            print(entry.transaction_id, flush=True)
+        i += 1
+for n in range(16):
+    threading.Thread(target=worker, args=(n,), daemon=True).start()
+threading.Event().wait()
+"""
+
+
+def exported(directory: str) -> list[dict]:
+    """Records in the sealed export files."""
+    rows = []
+    for path in sorted(glob.glob(os.path.join(directory, "transfers-*-*.jsonl"))):
+        with open(path, encoding="utf-8") as file:
+            rows += [json.loads(line) for line in file]
+    for path in sorted(glob.glob(os.path.join(directory, "transfers-*-*.parquet"))):
+        rows += pq.read_table(path).to_pylist()
+    return rows
+
+
+def in_progress(directory: str) -> list[str]:
+    return glob.glob(os.path.join(directory, "*.inprogress"))
+
+
+def confirm_all(ledger: Ledger, exporter, threads: int, per_thread: int, prefix: str = "") -> list[float]:
+    """What confirm_transfer adds per transfer: a ledger record, then submit."""
+    latencies = [[] for _ in range(threads)]
+
+    def worker(n):
+        for i in range(per_thread):
+            start = time.perf_counter()
+            entry = ledger.record(f"{prefix}{n}-{i}", TRANSFER)
+            if exporter is not None:
+                exporter.submit(entry)
+            latencies[n].append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return [latency for thread_latencies in latencies for latency in thread_latencies]
+
+
+async def readme_flows(directory: str) -> list[tuple[str, bool]]:
+    ledger = Ledger(os.path.join(directory, "flows.jsonl"), fsync=False)
+    set_ledger(ledger)
+    export_dir = os.path.join(directory, "flows-export")
+    set_exporter(TransferExporter(export_dir, ledger.path, flush_interval=0.05))
+    runner = Runner(
+        agent=root_agent.clone(update={"model": FakeModel()}), app_name=APP,
+        session_service=InMemorySessionService(),
+    )
+    transaction_ids = set()
+    for index, script in enumerate(SCRIPTS.values()):
+        session = await runner.session_service.create_session(app_name=APP, user_id=f"user-{index}")
+        for text in script:
+            message = types.Content(role='user', parts=[types.Part(text=text)])
+            async for _ in runner.run_async(user_id=f"user-{index}", session_id=session.id, new_message=message):
+                pass
+        session = await runner.session_service.get_session(app_name=APP, user_id=f"user-{index}", session_id=session.id)
+        if session.state.get('transaction_id'):
+            transaction_ids.add(session.state['transaction_id'])
+    set_exporter(None)
+    set_ledger(None)
+    rows = exported(export_dir)
+    return [(f"README flows: {len(rows)} confirmed transfers exported with their transaction IDs",
+             len(transaction_ids) == len(SCRIPTS) and {row['transaction_id'] for row in rows} == transaction_ids
+             and len(rows) == len(transaction_ids) and not in_progress(export_dir)
+             and all(row['beneficiary'] for row in rows))]
+
+
+def overflow(directory: str) -> list[tuple[str, bool]]:
+    ledger = Ledger(os.path.join(directory, "overflow.jsonl"), fsync=False)
+    export_dir = os.path.join(directory, "overflow-export")
+    exporter = TransferExporter(export_dir, ledger.path, batch_size=50, flush_interval=0.01,
+                                rotate_records=1000, max_buffer=10)
+    second = TransferExporter(export_dir, ledger.path)
+    confirm_all(ledger, exporter, threads=16, per_thread=250)
+    exporter.close()
+    second.close()
+    ledger.close()
+    seqs = [row['seq'] for row in exported(export_dir)]
+    stats = exporter.stats()
+    return [
+        (f"buffer full: {stats['overflowed']:,} of {stats['submitted']:,} submits left to the ledger, "
+         f"{len(seqs):,} exported once each",
+         stats['overflowed'] > 0 and sorted(seqs) == list(range(1, 4001))),
+        ("second exporter on the same directory stays inactive", not second.active and second.exported == 0),
+    ]
+
+
+def crash(directory: str) -> list[tuple[str, bool]]:
+    ledger_path = os.path.join(directory, "crash.jsonl")
+    export_dir = os.path.join(directory, "crash-export")
+    os.makedirs(export_dir)
+    child = subprocess.Popen([sys.executable, "-c", CHILD, ledger_path, export_dir],
+                             stdout=subprocess.PIPE, text=True)
+    acknowledged = set()
+    for line in child.stdout:
+        acknowledged.add(line.strip())
+        if len(acknowledged) >= KILL_AFTER:
+            break
+    child.send_signal(signal.SIGKILL)
+    child.wait()
+    left_behind = len(in_progress(export_dir))
+    sealed_before = exported(export_dir)
+
+    ledger = Ledger(ledger_path, fsync=False)
+    exporter = TransferExporter(export_dir, ledger_path, flush_interval=0.01)
+    confirm_all(ledger, exporter, threads=4, per_thread=250, prefix="after-")
+    exporter.close()
+    ledger.close()
+    rows = exported(export_dir)
+    seqs = [row['seq'] for row in rows]
+    last_seq = ledger.last_seq
+    return [(
+        f"SIGKILL after {len(sealed_before):,} sealed ({left_behind} in progress): all {last_seq:,} transfers "
+        f"exported, {len(seqs) - len(set(seqs))} twice",
+        set(seqs) == set(range(1, last_seq + 1))
+        and acknowledged <= {row['transaction_id'] for row in rows}
+        and all(row['transaction_id'] == format_transaction_id(row['seq']) for row in rows)
+        and not in_progress(export_dir),
+    )]
+
+
+def parquet(directory: str) -> list[tuple[str, bool]]:
+    ledger = Ledger(os.path.join(directory, "parquet.jsonl"), fsync=False)
+    export_dir = os.path.join(directory, "parquet-export")
+    exporter = TransferExporter(export_dir, ledger.path, format="parquet", batch_size=100,
+                                flush_interval=0.01, rotate_records=700)
+    confirm_all(ledger, exporter, threads=8, per_thread=250)
+    exporter.close()
+    ledger.close()
+    rows = exported(export_dir)
+    files = glob.glob(os.path.join(export_dir, "*.parquet"))
+    return [(f"Parquet: {len(rows):,} records in {len(files)} files read back",
+             sorted(row['seq'] for row in rows) == list(range(1, 2001))
+             and all(row['beneficiary'] == TRANSFER['beneficiary'] for row in rows))]
+
+
+def throughput(directory: str, records: int) -> None:
+    """Submit prerecorded ledger entries as fast as possible; time until the last file is sealed."""
+    ledger_path = os.path.join(directory, "throughput.jsonl")
+    entries = [
+        LedgerEntry(seq=seq, transaction_id=format_transaction_id(seq), idempotency_key=f"k{seq}",
+                    recorded_at=time.time(), transfer=TRANSFER)
+        for seq in range(1, records + 1)
+    ]
+    with open(ledger_path, "wb") as file:
+        file.write(b"".join(entry.to_line() for entry in entries))
+    print(f"\n{records:,} records, submitted as fast as one thread can\n")
+    print(f"{'format':<8} {'records/s':>10} {'files':>6} {'flushes':>8} {'overflowed':>11} {'from ledger':>12} {'MB':>6}")
+    for format in ("jsonl", "parquet"):
+        export_dir = os.path.join(directory, f"throughput-{format}")
+        start = time.perf_counter()
+        exporter = TransferExporter(export_dir, ledger_path, format=format, rotate_records=records // 4)
+        for entry in entries:
+            exporter.submit(entry)
+        exporter.close()
+        elapsed = time.perf_counter() - start
+        stats = exporter.stats()
+        size = sum(os.path.getsize(path) for path in glob.glob(os.path.join(export_dir, "transfers-*")))
+        assert stats['exported'] == records and stats['sealed_seq'] == records
+        print(f"{format:<8} {records / elapsed:>10,.0f} {stats['sealed_files']:>6} {stats['flushes']:>8} "
+              f"{stats['overflowed']:>11,} {stats['from_ledger']:>12,} {size / 1e6:>6.1f}")
+
+
+def latency(directory: str, threads: int, per_thread: int) -> None:
+    print(f"\nconfirm latency (ledger record + submit), {threads} threads x {per_thread:,}, fsync'ed ledger\n")
+    print(f"{'export':<16} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'flushes':>8} {'files':>6}")
+    for label, format in (("off", None), ("jsonl", "jsonl"), ("parquet", "parquet")):
+        ledger = Ledger(os.path.join(directory, f"latency-{label}.jsonl"))
+        exporter = None
+        if format:
+            exporter = TransferExporter(os.path.join(directory, f"latency-{label}"), ledger.path, format=format,
+                                        batch_size=200, flush_interval=0.05, rotate_records=2000)
+        samples = confirm_all(ledger, exporter, threads, per_thread)
+        flushes = files = 0
+        if exporter is not None:
+            exporter.close()
+            flushes, files = exporter.flushes, exporter.sealed_files
+            assert exporter.exported == threads * per_thread
+        ledger.close()
+        print(f"{label:<16} {percentile(samples, 50) * 1e3:>8.2f} {percentile(samples, 99) * 1e3:>8.2f} "
+              f"{max(samples) * 1e3:>8.2f} {flushes:>8} {files:>6}")
+
+
+def main(args) -> None:
+    # Expected warning from the second-exporter check
+    logging.getLogger("send_money_agent.export").setLevel(logging.ERROR)
+    set_response_cache(None)
+    with tempfile.TemporaryDirectory() as directory:
+        set_event_log(EventLog(path=os.path.join(directory, "events.jsonl")))
+        results = asyncio.run(readme_flows(directory))
+        for check in (overflow, crash, parquet):
+            results += check(directory)
+        for name, passed in results:
+            print(f"  {'ok  ' if passed else 'FAIL'} {name}")
+        throughput(directory, args.records)
+        latency(directory, args.threads, args.confirms // args.threads)
+        set_event_log(None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--confirms", type=int, default=8000)
+    main(parser.parse_args())
@@ -0,0 +1,96 @@
+"""
+Corpus benchmark for the deterministic fast path (send_money_agent.fast_path).
+
+Every utterance is classified as:
+  hit      - all slots read and nothing left over; the model only phrases the
+             reply, saving the tool-call round trip (2 model calls -> 1)
+  partial  - some slots applied, the remainder still needs the model
+  model    - left entirely to the model
+
+Usage (from the repository root):
+    python -m benchmarks.bench_fast_path
+"""
+import timeit
+
+from send_money_agent.fast_path import extract_intent
+
+BRAZIL = {"destination_country": "Brazil", "stage": "collecting"}
+MEXICO = {"destination_country": "Mexico", "stage": "collecting"}
+
+CORPUS = [
+    ("I want to send $100 to Maria Lopes via Pix in Brazil", BRAZIL),
+    ("200", BRAZIL),
+    ("Amount is 200", BRAZIL),
+    ("$100", BRAZIL),
+    ("100 dollars", BRAZIL),
+    ("Send 250 USD", BRAZIL),
+    ("Actually make it 300 dollars", BRAZIL),
+    ("500 BRL", BRAZIL),
+    ("I want Maria to receive 500 Reais in Brazil", BRAZIL),
+    ("I want them to receive 2,000 pesos", MEXICO),
+    ("send 1,000 pesos to Mexico", BRAZIL),
+    ("Juan Perez", BRAZIL),
+    ("John Marcus Silva", BRAZIL),
+    ("Maria Gonzalez dos Santos", BRAZIL),
+    ("Send it to Ana Souza", BRAZIL),
+    ("I want to use Pix", BRAZIL),
+    ("Pix", BRAZIL),
+    ("Bank Transfer", BRAZIL),
+    ("Cash Pickup", MEXICO),
+    ("SPEI please", MEXICO),
+    ("Use Pix for Juan", BRAZIL),
+    ("Send to Mexico instead", BRAZIL),
+    ("Mexico", BRAZIL),
+    ("Argentina", BRAZIL),
+    ("I'd like to send money to Argentina", BRAZIL),
+    ("Send $50 to me", BRAZIL),
+    ("Send $100 to Maria", BRAZIL),
+    ("Send $100 to Costa Rica", BRAZIL),
+    ("send money to New York", BRAZIL),
+    ("send 100 MXN to Ana Souza via SPEI", BRAZIL),
+    ("Send $75 to Carlos Lopes via Cash Pickup in Argentina", BRAZIL),
+    ("Send $20000 to Brazil", BRAZIL),
+    ("yes", {"destination_country": "Brazil", "stage": "confirming"}),
+    ("no thanks", {"destination_country": "Brazil", "stage": "completed"}),
+    ("Cancel", BRAZIL),
+    ("What is the exchange rate?", BRAZIL),
+    ("Can I send to Peru?", BRAZIL),
+    ("I want to send money", BRAZIL),
+    ("How much are the fees", BRAZIL),
+    ("send $100 or $200", BRAZIL),
+    ("That is her full name", BRAZIL),
+    ("hi", {"destination_country": "Brazil", "stage": "initial"}),
+]
+
+
+def main() -> None:
+    hits = partial = passed = 0
+    for text, state in CORPUS:
+        intent = extract_intent(text, state)
+        if intent is None or intent.is_empty():
+            passed += 1
+            outcome = "model"
+        elif intent.fully_covered:
+            hits += 1
+            outcome = "hit"
+        else:
+            partial += 1
+            outcome = f"partial {intent.remainder}"
+        print(f"  {outcome:<22} {text}")
+
+    total = len(CORPUS)
+    cost = timeit.timeit(
+        lambda: [extract_intent(text, state) for text, state in CORPUS], number=200
+    ) / (200 * total)
+    baseline_calls = 2 * (hits + partial) + passed
+    print()
+    print(f"utterances:          {total}")
+    print(f"hit rate:            {hits / total:.0%} ({hits})")
+    print(f"partial:             {partial / total:.0%} ({partial})")
+    print(f"left to model:       {passed / total:.0%} ({passed})")
+    print(f"model calls saved:   {hits} of {baseline_calls} ({hits / baseline_calls:.0%})")
+    print(f"extraction cost:     {cost * 1e6:.1f} us/utterance")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+History compaction: input tokens per model call against conversation length.
+
+One long session (small talk, corrections, a cancelled transfer and repeat
+transfers after `completed`, played `--rounds` times) runs through
+root_agent with FakeModel, once with the full history and once with
+`SEND_MONEY_HISTORY_EXCHANGES`-style compaction. Every model request is
+recorded: estimated prompt tokens (system instruction + history, ~4
+characters per token as FakeModel counts them) and history contents sent.
+The replies and confirmed transfers of both runs must match.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_history
+    python -m benchmarks.bench_history --rounds 5 --exchanges 2
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from send_money_agent.agent import root_agent
+from send_money_agent.event_log import EventLog, set_event_log
+from send_money_agent.fake_model import FakeModel
+from send_money_agent.history import HistoryCompactor, set_history_compactor
+from send_money_agent.ledger import Ledger, set_ledger
+from send_money_agent.response_cache import set_response_cache
+
+APP = "send_money_history"
+
+ROUND = [
+    "Hi there",
+    "I want to send money to Mexico",
+    "Make it 200 dollars",
+    "Actually 250",
+    "Juan Perez",
+    "SPEI",
+    "Yes",
+    "thanks",
+    "Send $100 to Maria Lopes via Pix in Brazil",
+    "No, change it",
+    "Amount is 120",
+    "Yes",
+    "Send 300 to Argentina",
+    "Carlos Gomez",
+    "cancel",
+    "I want Maria to receive 500 Reais in Brazil",
+    "Maria Gonzalez",
+    "Pix",
+    "Yes",
+]
+BUCKET = 10
+# (user turn, estimated prompt tokens, contents) per model request, and the current turn
+REQUESTS: list[tuple[int, int, int]] = []
+TURN = [0]
+
+
+class RecordingModel(FakeModel):
+    """FakeModel that notes the size of every request it gets."""
+
+    def record(self, llm_request) -> None:
+        usage = self._usage(llm_request, types.Content(role='model', parts=[types.Part(text="")]))
+        REQUESTS.append((TURN[0], usage.prompt_token_count, len(llm_request.contents)))
+
+    async def generate_content_async(self, llm_request, stream: bool = False):
+        self.record(llm_request)
+        async for response in super().generate_content_async(llm_request, stream):
+            yield response
+
+
+async def conversation(script: list[str]) -> tuple[list[tuple[int, int, int]], list[str]]:
+    REQUESTS.clear()
+    runner = Runner(
+        agent=root_agent.clone(update={"model": RecordingModel()}), app_name=APP,
+        session_service=InMemorySessionService(),
+    )
+    session = await runner.session_service.create_session(app_name=APP, user_id="user")
+    replies = []
+    for turn, text in enumerate(script, start=1):
+        TURN[0] = turn
+        message = types.Content(role='user', parts=[types.Part(text=text)])
+        async for event in runner.run_async(user_id="user", session_id=session.id, new_message=message):
+            if event.content and not event.partial:
+                replies += [part.text for part in event.content.parts or () if part.text]
+    return list(REQUESTS), replies
+
+
+def bucketed(requests: list[tuple[int, int, int]], turns: int) -> list[tuple[str, float, float, int]]:
+    rows = []
+    for first in range(1, turns + 1, BUCKET):
+        last = min(turns, first + BUCKET - 1)
+        window = [(tokens, contents) for turn, tokens, contents in requests if first <= turn <= last]
+        if window:
+            rows.append((
+                f"{first}-{last}",
+                sum(tokens for tokens, _ in window) / len(window),
+                sum(contents for _, contents in window) / len(window),
+                len(window),
+            ))
+    return rows
+
+
+async def main(args) -> None:
+    script = ROUND * args.rounds
+    set_response_cache(None)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        set_event_log(EventLog(path=os.path.join(directory, "events.jsonl")))
+        for label, compactor in (("full", None), ("compacted", HistoryCompactor(args.exchanges))):
+            set_ledger(Ledger(os.path.join(directory, f"{label}.jsonl"), fsync=False))
+            set_history_compactor(compactor)
+            results[label] = await conversation(script)
+            set_ledger(None)
+        set_history_compactor(None)
+        set_event_log(None)
+
+    (full, full_replies), (compacted, compacted_replies) = results["full"], results["compacted"]
+    print(f"{len(script)} user turns, compaction keeps {args.exchanges} exchanges\n")
+    print(f"{'turns':<8} {'calls':>6} {'full tokens':>12} {'contents':>9} {'compacted':>10} {'contents':>9} {'saved':>6}")
+    for (span, full_tokens, full_contents, calls), (_, tokens, contents, _) in zip(
+        bucketed(full, len(script)), bucketed(compacted, len(script))
+    ):
+        print(f"{span:<8} {calls:>6} {full_tokens:>12.0f} {full_contents:>9.1f} {tokens:>10.0f} {contents:>9.1f} "
+              f"{1 - tokens / full_tokens:>6.0%}")
+    full_total, total = sum(t for _, t, _ in full), sum(t for _, t, _ in compacted)
+    print(f"\ntotal prompt tokens  full {full_total:,}  compacted {total:,}  ({1 - total / full_total:.0%} fewer)")
+    print(f"  {'ok  ' if full_replies == compacted_replies else 'FAIL'} same replies and transfers with compaction")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--exchanges", type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,111 @@
+"""
+Startup cost: wall time and `python -X importtime` breakdown per module.
+
+Runs each import target in a fresh interpreter:
+
+- cold: empty bytecode cache (a new PYTHONPYCACHEPREFIX), so every module,
+  site-packages included, is compiled as on a fresh install / container;
+- warm: cached bytecode, median of `--runs` runs.
+
+Targets cover the bare interpreter (site imports included, the floor for
+every row), the lazy package import, light modules, the agent module,
+building `root_agent`, and SEND_MONEY_EAGER_IMPORTS=1 (the previous,
+eager behaviour). For the warm `root_agent` build it then lists the
+packages and send_money_agent modules that cost the most (self time from
+-X importtime, grouped).
+
+Usage (from the repository root):
+    python -m benchmarks.bench_import_time
+    python -m benchmarks.bench_import_time --runs 10 --top 15
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+TARGETS = {
+    "interpreter only": ("pass", {}),
+    "import send_money_agent": ("import send_money_agent", {}),
+    "import .ledger": ("import send_money_agent.ledger", {}),
+    "import .matching": ("import send_money_agent.matching", {}),
+    "import .agent": ("import send_money_agent.agent", {}),
+    "root_agent": ("from send_money_agent.agent import root_agent", {}),
+    "eager package": ("import send_money_agent", {"SEND_MONEY_EAGER_IMPORTS": "1"}),
+}
+
+
+def run(statement: str, env: dict, pycache: str) -> tuple[float, str]:
+    """Wall seconds and -X importtime output of one fresh interpreter."""
+    environment = {**os.environ, **env, "PYTHONPYCACHEPREFIX": pycache}
+    # The cache must be written for the warm runs to use it
+    environment.pop("PYTHONDONTWRITEBYTECODE", None)
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        env=environment, capture_output=True, text=True, check=True,
+    )
+    return time.perf_counter() - start, completed.stderr
+
+
+def parse(importtime: str) -> list[tuple[str, int, int]]:
+    """(module, self µs, cumulative µs) per line of -X importtime output."""
+    rows = []
+    for line in importtime.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def group(module: str) -> str:
+    """Package a module's cost is charged to (send_money_agent modules individually)."""
+    parts = module.split(".")
+    if parts[0] in ("google", "send_money_agent", "opentelemetry"):
+        return ".".join(parts[:2])
+    return parts[0]
+
+
+def main(args) -> None:
+    results = {}
+    breakdown = None
+    with tempfile.TemporaryDirectory() as scratch:
+        for label, (statement, env) in TARGETS.items():
+            cold, _ = run(statement, env, os.path.join(scratch, f"cold-{len(results)}"))
+            warm_cache = os.path.join(scratch, "warm")
+            run(statement, env, warm_cache)
+            warm = []
+            for _ in range(args.runs):
+                seconds, importtime = run(statement, env, warm_cache)
+                warm.append(seconds)
+            rows = parse(importtime)
+            imported = sum(self_us for _, self_us, _ in rows)
+            results[label] = (cold, statistics.median(warm), imported, len(rows))
+            if label == "root_agent":
+                breakdown = rows
+
+    print(f"{'target':<26} {'cold ms':>9} {'warm ms':>9} {'imports ms':>11} {'modules':>8}")
+    for label, (cold, warm, imported, modules) in results.items():
+        print(f"{label:<26} {cold * 1e3:>9.0f} {warm * 1e3:>9.0f} {imported / 1e3:>11.1f} {modules:>8}")
+
+    totals = defaultdict(int)
+    for module, self_us, _ in breakdown:
+        totals[group(module)] += self_us
+    print(f"\nroot_agent build, warm: top {args.top} packages by import self time")
+    for name, self_us in sorted(totals.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {name:<40} {self_us / 1e3:>8.1f} ms")
+    print("\nsend_money_agent modules (self / cumulative)")
+    for module, self_us, cumulative_us in sorted(breakdown, key=lambda row: -row[2]):
+        if module.startswith("send_money_agent"):
+            print(f"  {module:<40} {self_us / 1e3:>8.1f} / {cumulative_us / 1e3:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5, help="warm runs per target (median)")
+    parser.add_argument("--top", type=int, default=12)
+    main(parser.parse_args())
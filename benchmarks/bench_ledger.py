@@ -0,0 +1,193 @@
+"""
+Ledger throughput with group commit, and a crash-recovery check.
+
+Throughput: T threads confirm transfers concurrently against a fsync'ed
+ledger; with one thread every confirmation pays its own fsync, with more
+threads the writer commits whatever queued up during the previous fsync.
+
+Crash recovery: a child process confirms transfers from many threads and
+prints each transaction ID once `record()` returns; it is SIGKILLed mid-run
+(after 5,000 acknowledgements) and a torn half-line is appended to mimic a
+write cut short. Reopening the
+ledger must keep every acknowledged transfer, drop the torn tail, keep IDs
+strictly increasing, answer retried idempotency keys with the original ID
+and continue the sequence.
+
+Shared ledger: several processes (as server workers would) confirm
+transfers into one file in shared mode, some with the same idempotency
+keys. Every acknowledged key must map to one transaction ID, and the
+sequence on disk must have no gaps or duplicates.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_ledger
+"""
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from send_money_agent.ledger import Ledger
+
+TRANSFER = {
+    "destination_country": "Brazil", "currency_code": "BRL", "send_amount": 100.0,
+    "receive_amount": 536.0, "exchange_rate": 5.36, "beneficiary": "Maria Silva",
+    "delivery_method": "Pix", "quote_id": "QT-BENCH",
+}
+THREAD_COUNTS = [1, 8, 64, 256]
+CONFIRMATIONS = 4000
+KILL_AFTER = 5000
+SHARED_PROCESSES = 4
+SHARED_CONFIRMATIONS = 1000
+
+CHILD = """
+import sys, threading
+from send_money_agent.ledger import Ledger
+ledger = Ledger(sys.argv[1])
+lock = threading.Lock()
+def worker(n):
+    i = 0
+    while True:
+        entry = ledger.record(f"w{n}-{i}", {"n": n, "i": i})
+        with lock:
+            print(entry.idempotency_key, entry.transaction_id, flush=True)
+        i += 1
+for n in range(32):
+    threading.Thread(target=worker, args=(n,), daemon=True).start()
+threading.Event().wait()
+"""
+
+SHARED_CHILD = """
+import sys, threading
+from send_money_agent.ledger import Ledger
+ledger = Ledger(sys.argv[1], shared=True)
+n, count = int(sys.argv[2]), int(sys.argv[3])
+lock = threading.Lock()
+def worker(t):
+    for i in range(t, count, 8):
+        # Odd keys are confirmed by a pair of processes (0 and 1, 2 and 3, ...)
+        key = f"pair{n // 2}-{i}" if i % 2 else f"p{n}-{i}"
+        entry = ledger.record(key, {"n": n, "i": i})
+        with lock:
+            print(key, entry.transaction_id)
+workers = [threading.Thread(target=worker, args=(t,)) for t in range(8)]
+for thread in workers:
+    thread.start()
+for thread in workers:
+    thread.join()
+ledger.close()
+"""
+
+
+def bench_throughput(directory: str) -> None:
+    print(f"{'threads':>8} {'confirmations/s':>16} {'fsyncs':>8} {'per fsync':>10}")
+    for threads in THREAD_COUNTS:
+        path = os.path.join(directory, f"throughput-{threads}.jsonl")
+        ledger = Ledger(path)
+        per_thread = CONFIRMATIONS // threads
+
+        def worker(n):
+            for i in range(per_thread):
+                ledger.record(f"t{n}-{i}", TRANSFER)
+
+        workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        total = per_thread * threads
+        print(f"{threads:>8} {total / elapsed:>16,.0f} {ledger.commits:>8} {total / ledger.commits:>10.1f}")
+        ledger.close()
+
+
+def crash_recovery(directory: str) -> bool:
+    path = os.path.join(directory, "crash.jsonl")
+    child = subprocess.Popen(
+        [sys.executable, "-c", CHILD, path], stdout=subprocess.PIPE, text=True,
+        env={**os.environ, "PYTHONPATH": os.getcwd()},
+    )
+    lines = [child.stdout.readline() for _ in range(KILL_AFTER)]  # wait for it to be busy
+    child.send_signal(signal.SIGKILL)
+    output, _ = child.communicate()
+    lines += output.splitlines()
+    acknowledged = dict(line.split() for line in lines if len(line.split()) == 2)
+    with open(path, "ab") as ledger_file:
+        ledger_file.write(b'{"seq":999999999,"transaction_id":"TXN-torn","idem')
+
+    ledger = Ledger(path)
+    lost = [key for key, txn in acknowledged.items() if (entry := ledger.get(key)) is None or entry.transaction_id != txn]
+    with open(path, "rb") as ledger_file:
+        seqs = [int(line.split(b'"seq":')[1].split(b",")[0]) for line in ledger_file]
+    increasing = all(a < b for a, b in zip(seqs, seqs[1:]))
+    retried = all(ledger.record(key, {}).transaction_id == txn for key, txn in list(acknowledged.items())[:100])
+    fresh = ledger.record("after-crash", TRANSFER)
+    ledger.close()
+
+    checks = {
+        "acknowledged transfers kept": not lost,
+        "torn tail truncated": ledger.truncated_bytes > 0,
+        "ids strictly increasing": increasing,
+        "retries return original id": retried,
+        "sequence continues": fresh.seq == max(seqs) + 1,
+    }
+    print(f"\nchild acknowledged {len(acknowledged):,} transfers before SIGKILL; "
+          f"{len(seqs):,} on disk after recovery ({ledger.truncated_bytes} torn bytes dropped)")
+    for name, passed in checks.items():
+        print(f"  {'ok  ' if passed else 'FAIL'} {name}")
+    return all(checks.values())
+
+
+def shared_ledger(directory: str) -> bool:
+    path = os.path.join(directory, "shared.jsonl")
+    start = time.perf_counter()
+    children = [
+        subprocess.Popen(
+            [sys.executable, "-c", SHARED_CHILD, path, str(n), str(SHARED_CONFIRMATIONS)],
+            stdout=subprocess.PIPE, text=True, env={**os.environ, "PYTHONPATH": os.getcwd()},
+        )
+        for n in range(SHARED_PROCESSES)
+    ]
+    outputs = [child.communicate()[0] for child in children]
+    elapsed = time.perf_counter() - start
+    acknowledged: dict[str, set[str]] = {}
+    for output in outputs:
+        for line in output.splitlines():
+            key, transaction_id = line.split()
+            acknowledged.setdefault(key, set()).add(transaction_id)
+
+    with open(path, "rb") as ledger_file:
+        seqs = [int(line.split(b'"seq":')[1].split(b",")[0]) for line in ledger_file]
+    ledger = Ledger(path)
+    checks = {
+        "every process finished": all(child.returncode == 0 for child in children),
+        "one id per idempotency key": all(len(ids) == 1 for ids in acknowledged.values()),
+        "acknowledged ids on disk": all(
+            (entry := ledger.get(key)) is not None and {entry.transaction_id} == ids
+            for key, ids in acknowledged.items()
+        ),
+        "sequence without gaps or duplicates": seqs == list(range(1, len(seqs) + 1)),
+        "one entry per key": len(seqs) == len(acknowledged),
+    }
+    ledger.close()
+    print(f"\n{SHARED_PROCESSES} processes, shared ledger: {len(seqs):,} transfers "
+          f"({SHARED_PROCESSES * SHARED_CONFIRMATIONS:,} confirmations) in {elapsed:.2f}s")
+    for name, passed in checks.items():
+        print(f"  {'ok  ' if passed else 'FAIL'} {name}")
+    return all(checks.values())
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        bench_throughput(directory)
+        recovered = crash_recovery(directory)
+        shared = shared_ledger(directory)
+        if not (recovered and shared):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
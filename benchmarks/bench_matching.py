@@ -0,0 +1,156 @@
+"""
+Delivery method / country matching: error-recovery turns on messy input.
+
+Builds a corpus of the ways users write methods and countries (case,
+hyphens, missing spaces, accents, aliases, one-typo variants) plus inputs
+that must NOT match (methods the corridor doesn't offer, unsupported
+countries and payment brands). Each input goes through the tools
+(`set_transfer_details` / `set_destination`) and through the previous
+exact checks. Every rejected valid input costs a recovery turn: the model
+explains the error and the user answers again.
+
+Also times the lookups, including fuzzy country lookup with 2000 corridors.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_matching
+"""
+import random
+import timeit
+
+from google.adk.sessions.state import State
+
+from send_money_agent.agent import INITIAL_STATE
+from send_money_agent.corridors import Corridor, CorridorRegistry
+from send_money_agent.mock_data import get_corridor_registry, get_country_data
+from send_money_agent.tools import set_destination, set_transfer_details
+
+from .bench_corridor_lookup import make_table
+
+UNSUPPORTED_METHODS = ["PayPal", "Venmo", "Zelle", "crypto", "Western Union", "check", "debit card"]
+UNSUPPORTED_COUNTRIES = ["Peru", "Chile", "Colombia", "Spain", "Canada", "Portugal", "Paraguay", "Uruguay", "Brunei"]
+ACCENTED = {"Brazil": ["Brasíl"], "Mexico": ["México", "MÉXICO"], "Argentina": ["Argentína"]}
+
+
+def typos(generator: random.Random, text: str, count: int = 3) -> list[str]:
+    """One-edit variants: substitution, deletion, transposition, insertion."""
+    letters = [i for i, ch in enumerate(text) if ch.isalpha()]
+    variants = []
+    for kind in ("substitute", "delete", "transpose", "insert")[:count + 1]:
+        i = generator.choice(letters[1:-1] or letters)
+        letter = generator.choice("abcdefghijklmnopqrstuvwxyz")
+        if kind == "substitute":
+            variants.append(text[:i] + letter + text[i + 1:])
+        elif kind == "delete":
+            variants.append(text[:i] + text[i + 1:])
+        elif kind == "transpose" and i + 1 < len(text):
+            variants.append(text[:i] + text[i + 1] + text[i] + text[i + 2:])
+        else:
+            variants.append(text[:i] + letter + text[i:])
+    return variants
+
+
+def spellings(text: str) -> list[str]:
+    words = text.split()
+    return list(dict.fromkeys([
+        text, text.lower(), text.upper(), text.title(), "-".join(words).lower(), "".join(words).lower(),
+        f" {text.lower()} ",
+    ]))
+
+
+def method_corpus(generator: random.Random) -> list[tuple[str, str, str]]:
+    """(country, input, expected canonical or '' for must-not-match)."""
+    corpus = []
+    registry = get_corridor_registry()
+    all_methods = {method for corridor in registry for method in corridor.delivery_methods}
+    for corridor in registry:
+        name = corridor.country_name
+        for method in corridor.delivery_methods:
+            inputs = spellings(method)
+            inputs += ["cash pick-up", "Cash pick up"] if method == "Cash Pickup" else []
+            inputs += [alias.lower() for alias in registry.method_aliases.get(method, ())]
+            if len(method) >= 4:
+                inputs += typos(generator, method.lower())
+            corpus += [(name, text, method) for text in inputs]
+        for method in sorted(all_methods - set(corridor.delivery_methods)) + UNSUPPORTED_METHODS:
+            corpus += [(name, text, "") for text in (method, method.lower())]
+    return corpus
+
+
+def country_corpus(generator: random.Random) -> list[tuple[str, str]]:
+    """(input, expected canonical or '')."""
+    corpus = []
+    for corridor in get_corridor_registry():
+        name = corridor.country_name
+        inputs = spellings(name) + [alias.lower() for alias in corridor.aliases] + ACCENTED.get(name, [])
+        inputs += typos(generator, name.lower())
+        corpus += [(text, name) for text in inputs]
+    corpus += [(text, "") for name in UNSUPPORTED_COUNTRIES for text in (name, name.lower())]
+    return corpus
+
+
+class _ToolContext:
+    def __init__(self, country: str = "Brazil"):
+        self.state = State(value={**INITIAL_STATE, "stage": "collecting"}, delta={})
+        if country != "Brazil":
+            set_destination(country=country, tool_context=self)
+
+
+def score(results: list[tuple[str, str]]) -> dict:
+    """results: (expected, got) with '' meaning rejected."""
+    valid = [(expected, got) for expected, got in results if expected]
+    invalid = [(expected, got) for expected, got in results if not expected]
+    return {
+        "valid": len(valid),
+        "accepted": sum(got == expected for expected, got in valid),
+        "wrong": sum(bool(got) and got != expected for expected, got in valid),
+        "recovery": sum(got != expected for expected, got in valid),
+        "false_accepts": sum(bool(got) for _, got in invalid),
+        "invalid": len(invalid),
+    }
+
+
+def main() -> None:
+    generator = random.Random(17)
+    methods, countries = method_corpus(generator), country_corpus(generator)
+
+    exact_methods, matched_methods = [], []
+    for country, text, expected in methods:
+        available = get_country_data(country)['delivery_methods']
+        exact_methods.append((expected, text if text in available else ""))
+        context = _ToolContext(country)
+        result = set_transfer_details(tool_context=context, delivery_method=text)
+        matched_methods.append((expected, result.get('delivery_method', "") if result['success'] else ""))
+
+    exact_countries, matched_countries = [], []
+    for text, expected in countries:
+        data = get_country_data(text)
+        exact_countries.append((expected, data['country_name'] if data else ""))
+        result = set_destination(country=text, tool_context=_ToolContext())
+        matched_countries.append((expected, result.get('country', "") if result['success'] else ""))
+
+    print(f"{'corpus':<10} {'lookup':<8} {'valid':>6} {'accepted':>9} {'wrong':>6} {'recovery turns':>15} "
+          f"{'invalid':>8} {'false accepts':>14}")
+    for label, exact, matched in (("methods", exact_methods, matched_methods),
+                                  ("countries", exact_countries, matched_countries)):
+        for name, results in (("exact", exact), ("matcher", matched)):
+            s = score(results)
+            print(f"{label:<10} {name:<8} {s['valid']:>6} {s['accepted']:>9} {s['wrong']:>6} {s['recovery']:>15} "
+                  f"{s['invalid']:>8} {s['false_accepts']:>14}")
+
+    registry = get_corridor_registry()
+    number = 20_000
+    exact_us = timeit.timeit(lambda: registry.match_method("Mexico", "SPEI"), number=number) / number * 1e6
+    fuzzy_us = timeit.timeit(lambda: registry.match_method("Mexico", "cash pikcup"), number=number) / number * 1e6
+    print(f"\nmatch_method      exact {exact_us:.1f} µs, one typo {fuzzy_us:.1f} µs")
+    for size in (3, 2000):
+        big = CorridorRegistry(Corridor.from_dict(c) for c in make_table(size))
+        build_ms = timeit.timeit(lambda: CorridorRegistry(Corridor.from_dict(c) for c in make_table(size))
+                                 .resolve_country("x"), number=1) * 1e3
+        typo_us = timeit.timeit(lambda: big.resolve_country("Argentinia"), number=number) / number * 1e6
+        miss_us = timeit.timeit(lambda: big.resolve_country("Atlantis"), number=number) / number * 1e6
+        print(f"resolve_country   {size:>4} corridors: matcher built in {build_ms:.1f} ms, "
+              f"one typo {typo_us:.1f} µs, miss {miss_us:.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""
+Token count of each compiled prompt_v3 variant against the full instruction.
+
+Counts are estimates (words and punctuation marks) taken on the template,
+before state values are injected, so they compare variants like for like.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_prompt_variants
+"""
+from send_money_agent.prompts.prompt_v3 import get_compiler
+
+
+def main() -> None:
+    report = get_compiler().token_report()
+    print(f"full instruction: ~{report[0]['full_tokens']} tokens\n")
+    print(f"{'stage':<12} {'flags':<42} {'tokens':>7} {'saved':>7}")
+    for row in report:
+        flags = ", ".join(row['flags']) or "-"
+        saved = row['saved_tokens'] / row['full_tokens']
+        print(f"{row['stage']:<12} {flags:<42} {row['tokens']:>7} {saved:>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
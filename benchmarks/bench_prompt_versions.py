@@ -0,0 +1,74 @@
+"""
+Prompt versions side by side: sessions split across v1/v2/v3 by the registry.
+
+Runs the README flows (load_test.SCRIPTS) through root_agent with FakeModel,
+the prompt registry splitting sessions evenly by session-ID hash, then
+prints `PromptRegistry.comparison()` and the cheapest version.
+
+FakeModel reads only the state block every version shares, so offline a
+flow takes the same actions whatever the prompt says: differences in model
+calls and turns come from the mix of flows each version drew, and the
+comparison mostly isolates prompt tokens. With a real model (--live,
+GOOGLE_API_KEY set) behaviour differs by version too.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_prompt_versions
+    python -m benchmarks.bench_prompt_versions --sessions 300 --split "v2=1,v3=1"
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+
+from send_money_agent.agent import root_agent
+from send_money_agent.event_log import EventLog, set_event_log
+from send_money_agent.fake_model import FakeModel
+from send_money_agent.ledger import Ledger, set_ledger
+from send_money_agent.prompt_registry import PromptRegistry, parse_split, set_prompt_registry
+from send_money_agent.response_cache import set_response_cache
+
+from .load_test import APP, LoadRun
+
+
+def print_comparison(registry: PromptRegistry, min_completion: float) -> None:
+    print(f"{'version':<8} {'sessions':>8} {'done':>6} {'rate':>6} {'calls/tx':>9} {'in tok/tx':>10} "
+          f"{'out tok/tx':>11} {'turns/tx':>9} {'$/1k tx':>8} {'p50 ms':>7} {'p95 ms':>7}")
+    for row in registry.comparison():
+        def value(key: str, scale: float = 1.0, digits: int = 1) -> str:
+            return "-" if row[key] is None else f"{row[key] * scale:.{digits}f}"
+        print(f"{row['version']:<8} {row['sessions']:>8} {row['completed']:>6} {row['completion_rate']:>6.0%} "
+              f"{value('model_calls_per_transfer'):>9} {value('input_tokens_per_transfer', digits=0):>10} "
+              f"{value('output_tokens_per_transfer', digits=0):>11} {value('turns_per_transfer'):>9} "
+              f"{value('cost_per_transfer', 1000, 3):>8} {row['latency_p50'] * 1e3:>7.1f} "
+              f"{row['latency_p95'] * 1e3:>7.1f}")
+    print(f"\ncheapest version completing >= {min_completion:.0%} of sessions: "
+          f"{registry.cheapest(min_completion)}")
+
+
+async def main(args) -> None:
+    registry = PromptRegistry(weights=parse_split(args.split))
+    set_prompt_registry(registry)
+    set_response_cache(None)
+    agent = root_agent if args.live else root_agent.clone(update={"model": FakeModel(latency=args.latency)})
+    runner = Runner(agent=agent, app_name=APP, session_service=InMemorySessionService())
+    with tempfile.TemporaryDirectory() as directory:
+        set_ledger(Ledger(os.path.join(directory, "ledger.jsonl"), fsync=False))
+        set_event_log(EventLog(path=os.path.join(directory, "events.jsonl")))
+        await LoadRun(runner, think_time=0).run(args.sessions)
+        set_ledger(None)
+        set_event_log(None)
+    print_comparison(registry, args.min_completion)
+    set_prompt_registry(None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=600)
+    parser.add_argument("--split", default="v1=1,v2=1,v3=1")
+    parser.add_argument("--latency", type=float, default=0.0, help="fake model latency per call (s)")
+    parser.add_argument("--min-completion", type=float, default=0.95)
+    parser.add_argument("--live", action="store_true", help="use the configured Gemini model instead of FakeModel")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,81 @@
+"""
+Rate cache against a local HTTP stand-in for the rate upstream.
+
+Shows that a thundering herd of sessions on a cold (or expired) cache costs
+a single upstream fetch, and what a cached lookup costs afterwards.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_rate_cache
+"""
+import json
+import threading
+import time
+import timeit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from send_money_agent.rates import HttpRateProvider, RateCache, StaticRateProvider
+
+UPSTREAM_LATENCY = 0.05
+CALLERS = 500
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    requests_served = 0
+
+    def do_GET(self):
+        StandInHandler.requests_served += 1
+        time.sleep(UPSTREAM_LATENCY)
+        body = json.dumps({"rates": StaticRateProvider().fetch_rates()}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def herd(cache: RateCache) -> float:
+    """Release CALLERS threads at once against the cache; return wall time."""
+    barrier = threading.Barrier(CALLERS)
+
+    def caller():
+        barrier.wait()
+        cache.get_rates()
+
+    threads = [threading.Thread(target=caller) for _ in range(CALLERS)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/rates"
+    cache = RateCache(HttpRateProvider(url), ttl_seconds=0.5)
+
+    elapsed = herd(cache)
+    print(f"cold herd:    {CALLERS} callers, {StandInHandler.requests_served} upstream request(s), {elapsed * 1e3:.0f} ms")
+
+    time.sleep(0.6)  # let the table expire
+    before = StandInHandler.requests_served
+    elapsed = herd(cache)
+    print(f"expired herd: {CALLERS} callers, {StandInHandler.requests_served - before} upstream request(s), {elapsed * 1e3:.0f} ms")
+
+    cache.ttl_seconds = 60
+    cache.refresh()
+    per_call = timeit.timeit(lambda: cache.get_rate("BRL"), number=100000) / 100000
+    print(f"cached lookup: {per_call * 1e9:.0f} ns")
+    per_quote = timeit.timeit(lambda: cache.quote("MXN"), number=100000) / 100000
+    print(f"quote snapshot: {per_quote * 1e6:.2f} us")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
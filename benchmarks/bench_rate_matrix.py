@@ -0,0 +1,145 @@
+"""
+Cross-rate matrix: rounding consistency checks, lookup cost and incremental updates.
+
+Checks (the rounding the tools already use is the reference):
+
+- USD → currency entries are the rate table's values, unchanged;
+- USD needed for a target, through the matrix, equals round(target / rate, 2)
+  as in `calculate_usd_from_target`;
+- the tool's cross-currency path equals converting at matrix.rate() and then
+  the plain reverse calculation, and a same-currency target_currency changes
+  nothing;
+- forward-recalculating the receive amount from the derived USD stays within
+  the half-cent that rounding USD can move it;
+- one incremental rate update gives the same arrays, bit for bit, as a
+  rebuild from the updated table.
+
+Then times a pairwise lookup (one at a time, and 1,000 pairs at once through
+`as_arrays()`) and one-rate updates vs. rebuilds at 3, 200 and 2000
+currencies.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_rate_matrix
+"""
+import random
+import timeit
+
+import numpy as np
+from google.adk.sessions.state import State
+
+from send_money_agent.agent import INITIAL_STATE
+from send_money_agent.mock_data import get_country_data
+from send_money_agent.rate_matrix import USD, RateMatrix
+from send_money_agent.rates import StaticRateProvider
+from send_money_agent.tools import calculate_usd_from_target, set_destination
+
+RATES = StaticRateProvider().fetch_rates()
+SAMPLES = 20_000
+
+
+class _ToolContext:
+    def __init__(self, country: str):
+        self.state = State(value={**INITIAL_STATE}, delta={})
+        set_destination(country=country, tool_context=self)
+
+
+def synthetic_rates(count: int) -> dict[str, float]:
+    generator = random.Random(count)
+    rates = dict(RATES)
+    while len(rates) < count:
+        rates[f"C{len(rates):04d}"] = round(generator.uniform(0.1, 5000), 4)
+    return rates
+
+
+def consistency_checks() -> dict[str, bool]:
+    generator = random.Random(7)
+    matrix = RateMatrix(RATES)
+    targets = [round(generator.uniform(0.01, 50_000), generator.choice((0, 1, 2))) for _ in range(SAMPLES)]
+    codes = list(RATES)
+
+    usd_entries = all(matrix.rate(USD, code) == rate for code, rate in RATES.items())
+    reverse = all(
+        matrix.usd_for_target(target, code) == round(target / RATES[code], 2)
+        for target, code in zip(targets, generator.choices(codes, k=SAMPLES))
+    )
+
+    cross_matches, same_currency, forward_close = True, True, True
+    for country in ("Brazil", "Mexico", "Argentina"):
+        destination = get_country_data(country)['currency_code']
+        rate = RATES[destination]
+        for target in targets[:2000]:
+            context = _ToolContext(country)
+            plain = calculate_usd_from_target(target_amount=target, tool_context=context)
+            explicit = calculate_usd_from_target(target_amount=target, tool_context=context,
+                                                 target_currency=destination)
+            same_currency &= plain == explicit
+            for source in codes:
+                if source == destination:
+                    continue
+                result = calculate_usd_from_target(target_amount=target, tool_context=context,
+                                                   target_currency=source)
+                if not result['success']:
+                    continue
+                receive = round(target * matrix.rate(source, destination), 2)
+                cross_matches &= (result['receive_amount'], result['send_amount']) == (
+                    receive, round(receive / rate, 2)
+                )
+                forward = round(result['send_amount'] * rate, 2)
+                forward_close &= abs(forward - result['receive_amount']) <= 0.005 * rate + 0.01
+
+    incremental = RateMatrix(synthetic_rates(200))
+    updated = dict(zip(incremental.codes[1:], incremental.as_arrays()[1][0, 1:].tolist()))
+    for _ in range(50):
+        code = generator.choice(incremental.codes[1:])
+        updated[code] = round(generator.uniform(0.1, 5000), 4)
+        incremental.update_rate(code, updated[code])
+    rebuilt = RateMatrix(updated)
+    bit_identical = all(
+        np.array_equal(a, b) for a, b in zip(incremental.as_arrays()[1:], rebuilt.as_arrays()[1:])
+    )
+
+    return {
+        "USD → currency entries equal the rate table": usd_entries,
+        f"matrix reverse calc == round(target / rate, 2) ({SAMPLES:,} targets)": reverse,
+        "tool cross path == convert at matrix rate, then reverse calc": cross_matches,
+        "target_currency equal to the destination changes nothing": same_currency,
+        "forward recalculation within rounding of the receive amount": forward_close,
+        "50 incremental updates == rebuild, bit for bit": bit_identical,
+    }
+
+
+def timings() -> None:
+    print(f"\n{'currencies':>10} {'build ms':>9} {'lookup ns':>10} {'on-the-fly ns':>14} "
+          f"{'batch ns':>9} {'update µs':>10} {'rebuild µs':>11}")
+    for count in (3, 200, 2000):
+        rates = synthetic_rates(count)
+        build = timeit.timeit(lambda: RateMatrix(rates), number=3) / 3
+        matrix = RateMatrix(rates)
+        codes = list(rates)
+        pairs = [(random.choice(codes), random.choice(codes)) for _ in range(1000)]
+        lookup = timeit.timeit(lambda: [matrix.rate(a, b) for a, b in pairs], number=20) / 20_000
+        on_the_fly = timeit.timeit(
+            lambda: [rates[b.upper()] / rates[a.upper()] for a, b in pairs], number=20
+        ) / 20_000
+        table_codes, table, _ = matrix.as_arrays()
+        position = {c: i for i, c in enumerate(table_codes)}
+        rows = np.array([position[a.upper()] for a, _ in pairs])
+        columns = np.array([position[b.upper()] for _, b in pairs])
+        batch = timeit.timeit(lambda: table[rows, columns], number=200) / 200_000
+        code = codes[-1]
+        update = timeit.timeit(lambda: matrix.update_rate(code, rates[code] * 1.001), number=20) / 20
+        rebuild = timeit.timeit(lambda: RateMatrix(rates), number=5) / 5
+        print(f"{count:>10,} {build * 1e3:>9.2f} {lookup * 1e9:>10.0f} {on_the_fly * 1e9:>14.0f} {batch * 1e9:>9.1f} "
+              f"{update * 1e6:>10.1f} {rebuild * 1e6:>11.1f}")
+
+
+def main() -> None:
+    print("Consistency checks")
+    checks = consistency_checks()
+    for name, passed in checks.items():
+        print(f"  {'ok  ' if passed else 'FAIL'} {name}")
+    timings()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Rendered summary/receipt vs. a model call to phrase them.
+
+Runs the README flows through root_agent with FakeModel (fixed latency),
+with the renderer off and on, sessions starting `--arrival` seconds apart.
+Reports model calls per completed transfer and the latency of the "Yes"
+turn that confirms (receipt) vs. the other turns, including the one that
+completes the details (summary). Also times the renderer itself.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_receipts
+    python -m benchmarks.bench_receipts --sessions 400 --latency 0.4
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import timeit
+
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from send_money_agent import receipts
+from send_money_agent.agent import root_agent
+from send_money_agent.event_log import EventLog, set_event_log
+from send_money_agent.fake_model import FakeModel
+from send_money_agent.ledger import Ledger, set_ledger
+from send_money_agent.response_cache import set_response_cache
+
+from .load_test import SCRIPTS, percentile
+
+APP = "send_money_receipts"
+
+STATE = {
+    "destination_country": "Argentina", "destination_currency_code": "ARS", "exchange_rate": 1055.5,
+    "send_amount": 90.0, "receive_amount": 94995.0, "beneficiary": "Carlos Lopes",
+    "delivery_method": "Cash Pickup", "transaction_id": "TXN-0000000042",
+}
+
+
+async def run_flows(sessions: int, latency: float, arrival: float) -> dict:
+    agent = root_agent.clone(update={"model": FakeModel(latency=latency)})
+    session_service = InMemorySessionService()
+    runner = Runner(agent=agent, app_name=APP, session_service=session_service)
+    result = {"model_calls": 0, "completed": 0, "summary": [], "receipt": []}
+
+    async def conversation(index: int) -> None:
+        await asyncio.sleep(index * arrival)
+        flow = list(SCRIPTS)[index % len(SCRIPTS)]
+        user_id = f"user-{index}"
+        session = await session_service.create_session(app_name=APP, user_id=user_id)
+        for text in SCRIPTS[flow]:
+            message = types.Content(role='user', parts=[types.Part(text=text)])
+            stage_before = (await session_service.get_session(
+                app_name=APP, user_id=user_id, session_id=session.id
+            )).state.get('stage')
+            start = time.perf_counter()
+            async for event in runner.run_async(user_id=user_id, session_id=session.id, new_message=message):
+                if event.author == 'user' or not event.content or event.partial:
+                    continue
+                if not event.get_function_responses() and not (event.custom_metadata or {}).get("rendered"):
+                    result["model_calls"] += 1
+            elapsed = time.perf_counter() - start
+            result["receipt" if stage_before == 'confirming' else "summary"].append(elapsed)
+        final = await session_service.get_session(app_name=APP, user_id=user_id, session_id=session.id)
+        if final.state.get('stage') == 'completed':
+            result["completed"] += 1
+
+    await asyncio.gather(*(conversation(i) for i in range(sessions)))
+    return result
+
+
+async def main(args) -> None:
+    set_response_cache(None)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        set_event_log(EventLog(path=os.path.join(directory, "events.jsonl")))
+        for name, enabled in (("model", False), ("rendered", True)):
+            receipts.RENDER_ENABLED = enabled
+            set_ledger(Ledger(os.path.join(directory, f"ledger-{name}.jsonl"), fsync=False))
+            results[name] = await run_flows(args.sessions, args.latency, args.arrival)
+        set_ledger(None)
+        set_event_log(None)
+
+    number = 20_000
+    summary_us = timeit.timeit(lambda: receipts.render_summary(STATE), number=number) / number * 1e6
+    receipt_us = timeit.timeit(lambda: receipts.render_receipt(STATE), number=number) / number * 1e6
+
+    print(f"{args.sessions:,} sessions over the README flows, model latency {args.latency}s")
+    print(f"{'replies':<10} {'completed':>10} {'model calls':>12} {'confirm turn p50':>17} {'other turns p50':>16}")
+    for name, result in results.items():
+        completed = result["completed"] or 1
+        print(f"{name:<10} {result['completed']:>10,} {result['model_calls'] / completed:>12.2f} "
+              f"{percentile(result['receipt'], 50) * 1000:>14.1f} ms {percentile(result['summary'], 50) * 1000:>13.1f} ms")
+    saved = results["model"]["model_calls"] - results["rendered"]["model_calls"]
+    print(f"model calls saved {saved:,} ({saved / results['model']['model_calls']:.0%}), "
+          f"mean turn {statistics.mean(results['model']['summary'] + results['model']['receipt']) * 1000:.1f} -> "
+          f"{statistics.mean(results['rendered']['summary'] + results['rendered']['receipt']) * 1000:.1f} ms")
+    print(f"render cost       summary {summary_us:.1f} µs, receipt {receipt_us:.1f} µs")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.2, help="fake model latency per call (s)")
+    parser.add_argument("--arrival", type=float, default=0.02, help="seconds between session starts")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,126 @@
+"""
+Response cache: hit rate, model calls and latency saved on repeated turns.
+
+Runs the same conversations through root_agent with FakeModel (fixed
+latency) twice, without and with the response cache. Each conversation mixes
+small talk that recurs across sessions (greetings, questions about the
+summary on screen) with turns that must reach a tool ("Yes", "no thanks").
+Sessions start `--arrival` seconds apart. Checks that both runs made the same tool calls and ended in the same
+state, so no cached reply stood in for a tool call.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_response_cache
+    python -m benchmarks.bench_response_cache --sessions 500 --latency 0.4
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from send_money_agent.agent import root_agent
+from send_money_agent.event_log import EventLog, set_event_log
+from send_money_agent.fake_model import FakeModel
+from send_money_agent.ledger import Ledger, set_ledger
+from send_money_agent.response_cache import ResponseCache, set_response_cache
+
+from .load_test import percentile
+
+APP = "send_money_response_cache"
+
+SCRIPTS = [
+    [
+        "Hello",
+        "How does this work?",
+        "I want to send $100 to Maria Lopes via Pix in Brazil",
+        "How long does it take to arrive?",
+        "Yes",
+        "No thanks",
+    ],
+    [
+        "Hi!",
+        "I want to send $100 to Maria Lopes via Pix in Brazil",
+        "Is it safe?",
+        "Yes",
+        "Thanks!",
+    ],
+]
+STATE_KEYS = ("stage", "destination_country", "send_amount", "beneficiary", "delivery_method")
+
+
+async def run_conversations(sessions: int, latency: float, arrival: float) -> dict:
+    agent = root_agent.clone(update={"model": FakeModel(latency=latency)})
+    session_service = InMemorySessionService()
+    runner = Runner(agent=agent, app_name=APP, session_service=session_service)
+    latencies, model_calls, traces = [], 0, {}
+
+    async def conversation(index: int) -> None:
+        nonlocal model_calls
+        await asyncio.sleep(index * arrival)
+        user_id = f"user-{index}"
+        session = await session_service.create_session(app_name=APP, user_id=user_id)
+        calls = []
+        for text in SCRIPTS[index % len(SCRIPTS)]:
+            message = types.Content(role='user', parts=[types.Part(text=text)])
+            start = time.perf_counter()
+            async for event in runner.run_async(user_id=user_id, session_id=session.id, new_message=message):
+                if event.author == 'user' or not event.content:
+                    continue
+                if not (event.custom_metadata or {}).get("response_cache"):
+                    model_calls += 1
+                calls.extend(call.name for call in event.get_function_calls())
+            latencies.append(time.perf_counter() - start)
+        final = await session_service.get_session(app_name=APP, user_id=user_id, session_id=session.id)
+        traces[index] = (tuple(calls), tuple(final.state.get(key) for key in STATE_KEYS))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(conversation(i) for i in range(sessions)))
+    return {
+        "elapsed": time.perf_counter() - start,
+        "latencies": latencies,
+        "model_calls": model_calls,
+        "traces": traces,
+    }
+
+
+async def main(args) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        set_event_log(EventLog(path=os.path.join(directory, "events.jsonl")))
+        results = {}
+        for name, cache in (("no cache", None), ("cache", ResponseCache())):
+            set_ledger(Ledger(os.path.join(directory, f"ledger-{name}.jsonl"), fsync=False))
+            set_response_cache(cache)
+            results[name] = await run_conversations(args.sessions, args.latency, args.arrival)
+            results[name]["stats"] = cache.stats() if cache else None
+        set_response_cache(None)
+        set_ledger(None)
+        set_event_log(None)
+
+    turns = len(results["no cache"]["latencies"])
+    print(f"{args.sessions:,} sessions, {turns:,} turns, model latency {args.latency}s")
+    print(f"{'':<10} {'model calls':>12} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'wall s':>8}")
+    for name, result in results.items():
+        latencies = result["latencies"]
+        print(f"{name:<10} {result['model_calls']:>12,} {statistics.mean(latencies) * 1000:>9.1f} "
+              f"{percentile(latencies, 50) * 1000:>9.1f} {percentile(latencies, 95) * 1000:>9.1f} "
+              f"{result['elapsed']:>8.2f}")
+    stats = results["cache"]["stats"]
+    print(f"hit rate          {stats['hit_rate']:.1%} ({stats['hits']:,} hits, {stats['coalesced']:,} coalesced, "
+          f"{stats['misses']:,} misses, {stats['skipped']:,} turns not eligible)")
+    print(f"latency saved     {stats['saved_seconds']:.1f}s of model time across "
+          f"{stats['hits'] + stats['coalesced']:,} replies ({stats['entries']:,} entries cached)")
+    same = results["cache"]["traces"] == results["no cache"]["traces"]
+    print(f"tool calls/state  {'identical' if same else 'DIFFERENT'} with and without the cache")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.2, help="fake model latency per call (s)")
+    parser.add_argument("--arrival", type=float, default=0.01, help="seconds between session starts")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,228 @@
+"""
+Model scheduler: concurrency caps, deadlines, retries, circuit breaker and
+failover, against FakeModel with injected 429/503 faults.
+
+Checks:
+
+- no more than `max_concurrency` calls reach the model at once, and no
+  tenant has more than `tenant_concurrency` in flight;
+- a light tenant is not queued behind a heavy one;
+- a call that cannot get a slot in time, or whose model does not answer
+  within the deadline, fails with SchedulerTimeoutError;
+- with a failing primary, the circuit opens after `failure_threshold`
+  failures, later calls go straight to the fallback, and a probe after
+  `reset_timeout` closes it again once the primary recovers;
+- through root_agent, the session's user is the tenant, and the README
+  flows give the same replies with 30% injected faults as without.
+
+Then compares direct calls against scheduled ones at several fault rates:
+share of calls answered, attempts per call and latency.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_scheduler
+    python -m benchmarks.bench_scheduler --calls 500 --latency 0.05
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from google.adk.models import LlmRequest
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import errors, types
+
+from send_money_agent.agent import root_agent
+from send_money_agent.event_log import EventLog, set_event_log
+from send_money_agent.fake_model import FakeModel
+from send_money_agent.ledger import Ledger, set_ledger
+from send_money_agent.response_cache import set_response_cache
+from send_money_agent.scheduler import (
+    ModelScheduler,
+    ScheduledModel,
+    SchedulerTimeoutError,
+    _tenant,
+    get_model_scheduler,
+    set_model_scheduler,
+)
+
+from .load_test import SCRIPTS, percentile
+
+APP = "send_money_scheduler"
+REQUEST = LlmRequest(
+    contents=[types.Content(role='user', parts=[types.Part(text="Hi there")])],
+    config=types.GenerateContentConfig(system_instruction="- Stage: initial"),
+)
+
+
+class MeteredModel(FakeModel):
+    """FakeModel that tracks calls in flight, overall and per tenant."""
+    in_flight: int = 0
+    peak: int = 0
+    tenant_peak: dict = {}
+    tenants: set = set()
+
+    async def generate_content_async(self, llm_request, stream: bool = False):
+        tenant = _tenant.get()
+        self.tenants.add(tenant)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        counts = self.tenant_peak.setdefault(tenant, [0, 0])
+        counts[0] += 1
+        counts[1] = max(counts[1], counts[0])
+        try:
+            async for response in super().generate_content_async(llm_request, stream):
+                yield response
+        finally:
+            self.in_flight -= 1
+            counts[0] -= 1
+
+
+async def call(model, tenant: str = "default") -> float:
+    _tenant.set(tenant)
+    start = time.perf_counter()
+    async for _ in model.generate_content_async(REQUEST):
+        pass
+    return time.perf_counter() - start
+
+
+async def caps(latency: float) -> list[tuple[str, bool]]:
+    set_model_scheduler(ModelScheduler(max_concurrency=8, tenant_concurrency=2))
+    model = MeteredModel(latency=latency)
+    scheduled = ScheduledModel(model)
+    heavy = [call(scheduled, "heavy") for _ in range(40)]
+    spread = [call(scheduled, f"tenant-{i % 20}") for i in range(40)]
+    heavy_task = asyncio.gather(*heavy)
+    await asyncio.sleep(0)
+    light = await call(scheduled, "light")
+    await heavy_task
+    await asyncio.gather(*spread)
+    heavy_peak = model.tenant_peak["heavy"][1]
+    return [
+        (f"global cap: peak {model.peak} in flight (cap 8)", model.peak <= 8),
+        (f"tenant cap: heavy tenant peak {heavy_peak} (cap 2)", heavy_peak <= 2),
+        (f"light tenant served in {light * 1e3:.0f} ms while the heavy one queues 40",
+         light < latency * 1.5),
+    ]
+
+
+async def deadline(latency: float) -> list[tuple[str, bool]]:
+    set_model_scheduler(ModelScheduler(max_concurrency=1, queue_timeout=latency / 4))
+    scheduled = ScheduledModel(FakeModel(latency=latency))
+    results = await asyncio.gather(call(scheduled), call(scheduled, "other"), return_exceptions=True)
+    timed_out = isinstance(results[1], SchedulerTimeoutError)
+    stats = get_model_scheduler().stats()
+    set_model_scheduler(ModelScheduler(deadline=latency / 4))
+    start = time.perf_counter()
+    try:
+        await call(ScheduledModel(FakeModel(latency=latency)))
+        cut_off = False
+    except SchedulerTimeoutError:
+        cut_off = time.perf_counter() - start < latency / 2
+    slow = get_model_scheduler().stats()
+    return [
+        ("queued past its deadline: SchedulerTimeoutError",
+         timed_out and stats["queue_timeouts"] == 1 and stats["in_flight"] == 0),
+        ("slow model call cut off at its deadline",
+         cut_off and slow["deadline_exceeded"] == 1 and slow["in_flight"] == 0),
+    ]
+
+
+async def breaker(latency: float) -> list[tuple[str, bool]]:
+    set_model_scheduler(ModelScheduler(base_delay=0.01, failure_threshold=3, reset_timeout=0.5))
+    primary = FakeModel(latency=latency, fault_rate=1.0)
+    fallback = FakeModel(model="fake-fallback", latency=latency)
+    scheduled = ScheduledModel(primary, fallback)
+    await asyncio.gather(*(call(scheduled) for _ in range(20)))
+    opened_after = primary.calls
+    state = get_model_scheduler().breaker(primary.model).state
+    primary.fault_rate = 0.0
+    await asyncio.sleep(0.6)
+    await call(scheduled)
+    closed = get_model_scheduler().breaker(primary.model).state == "closed"
+    return [
+        (f"circuit opened after {opened_after} primary failures, 20 calls answered by the fallback",
+         state == "open" and opened_after <= 3 + 2 and fallback.calls == 20),
+        ("probe after reset_timeout closes the circuit", closed and primary.calls == opened_after + 1),
+    ]
+
+
+async def conversations(directory: str, fault_rate: float) -> tuple[list[str], set]:
+    # A fresh ledger per run: transaction IDs appear in the receipts
+    set_ledger(Ledger(os.path.join(directory, f"ledger-{fault_rate}.jsonl"), fsync=False))
+    model = MeteredModel(fault_rate=fault_rate)
+    model.tenants = set()
+    runner = Runner(
+        agent=root_agent.clone(update={"model": ScheduledModel(model)}), app_name=APP,
+        session_service=InMemorySessionService(),
+    )
+    replies = []
+    for index, script in enumerate(SCRIPTS.values()):
+        user_id = f"user-{index}"
+        session = await runner.session_service.create_session(app_name=APP, user_id=user_id)
+        for text in script:
+            message = types.Content(role='user', parts=[types.Part(text=text)])
+            async for event in runner.run_async(user_id=user_id, session_id=session.id, new_message=message):
+                if event.content and not event.partial:
+                    replies += [part.text for part in event.content.parts or () if part.text]
+    return replies, model.tenants
+
+
+async def through_agent(directory: str) -> list[tuple[str, bool]]:
+    set_model_scheduler(ModelScheduler(base_delay=0.001, max_attempts=8, failure_threshold=1000))
+    clean, tenants = await conversations(directory, 0.0)
+    faulty, _ = await conversations(directory, 0.3)
+    set_ledger(None)
+    return [
+        (f"tenants seen by the model are the session users ({len(tenants)})",
+         tenants == {f"user-{i}" for i in range(len(SCRIPTS))}),
+        (f"README flows: same {len(clean)} replies with 30% faults", faulty == clean),
+    ]
+
+
+async def compare(args) -> None:
+    print(f"\n{args.calls} calls, {args.concurrency} at a time, FakeModel {args.latency}s, faults: 503\n")
+    print(f"{'fault rate':>10} {'mode':<10} {'answered':>9} {'attempts':>9} {'p50':>8} {'p95':>8}")
+    for fault_rate in (0.0, 0.1, 0.3, 0.5):
+        for mode in ("direct", "scheduled"):
+            set_model_scheduler(ModelScheduler(max_concurrency=args.concurrency, base_delay=args.latency / 2,
+                                               failure_threshold=10_000))
+            model = FakeModel(latency=args.latency, fault_rate=fault_rate, fault_latency=args.latency / 5)
+            target = model if mode == "direct" else ScheduledModel(model)
+            gate = asyncio.Semaphore(args.concurrency)
+
+            async def one(i: int):
+                async with gate:
+                    return await call(target, f"tenant-{i % 50}")
+
+            results = await asyncio.gather(*(one(i) for i in range(args.calls)), return_exceptions=True)
+            latencies = [r for r in results if isinstance(r, float)]
+            assert all(isinstance(r, (float, errors.APIError)) for r in results)
+            print(f"{fault_rate:>10.0%} {mode:<10} {len(latencies) / args.calls:>9.1%} "
+                  f"{model.calls / args.calls:>9.2f} {percentile(latencies, 50) * 1e3:>6.0f}ms "
+                  f"{percentile(latencies, 95) * 1e3:>6.0f}ms")
+
+
+async def main(args) -> None:
+    random.seed(7)
+    set_response_cache(None)
+    with tempfile.TemporaryDirectory() as directory:
+        set_event_log(EventLog(path=os.path.join(directory, "events.jsonl")))
+        results = []
+        for check in (caps(args.latency), deadline(args.latency), breaker(args.latency / 10), through_agent(directory)):
+            results += await check
+        for name, passed in results:
+            print(f"  {'ok  ' if passed else 'FAIL'} {name}")
+        await compare(args)
+        set_event_log(None)
+    set_model_scheduler(None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.1, help="fake model seconds per call")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,147 @@
+"""
+Watchlist screening: index build, load and query latency on a synthetic list.
+
+Generates `--names` synthetic names (5M by default) from syllable-built
+first names and surnames, indexes them with `screening.build_index`, then
+times `WatchlistIndex.search` for names taken from the list, the same names
+with one typo or their tokens reordered, and names not on the list (the
+common case). Also reports recall at the hold threshold and the cost the
+screening adds to `set_transfer_details`.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_screening
+    python -m benchmarks.bench_screening --names 1000000 --index /tmp/watchlist-index
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from google.adk.sessions.state import State
+
+from send_money_agent.agent import INITIAL_STATE
+from send_money_agent.event_log import EventLog, set_event_log
+from send_money_agent.screening import DEFAULT_HOLD_THRESHOLD, WatchlistIndex, build_index, set_watchlist
+from send_money_agent.tools import set_transfer_details
+
+from .load_test import percentile
+
+ONSETS = ["", "b", "ch", "d", "f", "g", "h", "j", "k", "kh", "l", "m", "n", "p", "q", "r", "s", "sh",
+          "t", "v", "w", "y", "z", "br", "dr", "gr", "st", "tr"]
+VOWELS = ["a", "e", "i", "o", "u", "ai", "ou", "ei", "ia", "y"]
+CODAS = ["", "", "", "n", "r", "s", "l", "m", "k", "z", "d", "ng"]
+QUERIES = 2000
+
+
+def synthetic_word(generator: random.Random, syllables: int) -> str:
+    return "".join(generator.choice(ONSETS) + generator.choice(VOWELS) + generator.choice(CODAS)
+                   for _ in range(syllables)).capitalize()
+
+
+def synthetic_names(count: int, seed: int = 16):
+    generator = random.Random(seed)
+    first = [synthetic_word(generator, generator.randint(2, 3)) for _ in range(30_000)]
+    last = [synthetic_word(generator, generator.randint(2, 4)) for _ in range(300_000)]
+    for _ in range(count):
+        parts = [generator.choice(first)]
+        if generator.random() < 0.3:
+            parts.append(generator.choice(first))
+        parts.append(generator.choice(last))
+        if generator.random() < 0.3:
+            parts.append(generator.choice(last))
+        yield " ".join(parts)
+
+
+def with_typo(generator: random.Random, name: str) -> str:
+    position = generator.randrange(1, len(name) - 1)
+    if name[position] == " ":
+        position -= 1
+    letter = generator.choice("abcdefghijklmnopqrstuvwxyz")
+    return name[:position] + letter + name[position + 1:]
+
+
+def reordered(name: str) -> str:
+    tokens = name.split()
+    return " ".join(tokens[-1:] + tokens[:-1])
+
+
+def timed_search(index: WatchlistIndex, names: list[str], min_score: float) -> tuple[list[float], list]:
+    latencies, results = [], []
+    for name in names:
+        start = time.perf_counter()
+        results.append(index.search(name, min_score=min_score))
+        latencies.append(time.perf_counter() - start)
+    return latencies, results
+
+
+class _ToolContext:
+    def __init__(self):
+        self.state = State(value={**INITIAL_STATE, "stage": "collecting"}, delta={})
+
+
+def tool_overhead(index: WatchlistIndex, names: list[str]) -> tuple[float, float]:
+    per_call = {}
+    for label, watchlist in (("off", None), ("on", index)):
+        set_watchlist(watchlist)
+        start = time.perf_counter()
+        for name in names:
+            set_transfer_details(tool_context=_ToolContext(), beneficiary=name)
+        per_call[label] = (time.perf_counter() - start) / len(names)
+    set_watchlist(None)
+    return per_call["off"], per_call["on"]
+
+
+def report(args, directory: str) -> None:
+    if not os.path.exists(os.path.join(directory, "meta.json")):
+        start = time.perf_counter()
+        build_index(synthetic_names(args.names), directory)
+        print(f"built index of {args.names:,} names in {time.perf_counter() - start:.1f}s")
+    size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+    start = time.perf_counter()
+    index = WatchlistIndex(directory)
+    print(f"index {size / 2**20:,.0f} MiB on disk, opened in {(time.perf_counter() - start) * 1e3:.1f} ms "
+          f"({len(index):,} names)")
+
+    generator = random.Random(7)
+    listed_entries = [generator.randrange(len(index)) for _ in range(QUERIES)]
+    listed = [index.name(entry) for entry in listed_entries]
+    workloads = {
+        "listed name": listed,
+        "one typo": [with_typo(generator, name) for name in listed],
+        "reordered": [reordered(name) for name in listed],
+        "not listed": list(synthetic_names(QUERIES, seed=99)),
+    }
+    # Warm the pages the queries touch, as a long-running worker would have
+    for names in workloads.values():
+        timed_search(index, names[:200], args.threshold)
+
+    print(f"\n{QUERIES:,} queries per row, min score {args.threshold}")
+    print(f"{'query':<12} {'p50 µs':>8} {'p95 µs':>8} {'p99 µs':>8} {'found':>7}")
+    for label, names in workloads.items():
+        latencies, results = timed_search(index, names, args.threshold)
+        if label == "not listed":
+            found = sum(bool(matches) for matches in results) / QUERIES
+        else:
+            found = sum(any(match.entry == entry for match in matches)
+                        for entry, matches in zip(listed_entries, results)) / QUERIES
+        print(f"{label:<12} {percentile(latencies, 50) * 1e6:>8.0f} {percentile(latencies, 95) * 1e6:>8.0f} "
+              f"{percentile(latencies, 99) * 1e6:>8.0f} {found:>7.1%}")
+
+    off, on = tool_overhead(index, workloads["not listed"][:500])
+    print(f"\nset_transfer_details   screening off {off * 1e6:.0f} µs, on {on * 1e6:.0f} µs per call")
+
+
+def main(args) -> None:
+    with tempfile.TemporaryDirectory() as scratch:
+        set_event_log(EventLog(path=os.path.join(scratch, "events.jsonl")))
+        report(args, args.index or os.path.join(scratch, "index"))
+        set_event_log(None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--names", type=int, default=5_000_000)
+    parser.add_argument("--index", help="index directory to build once and reuse (default: a temporary one)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_HOLD_THRESHOLD)
+    main(parser.parse_args())
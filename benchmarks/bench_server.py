@@ -0,0 +1,149 @@
+"""
+Streaming server: time to first token and full-turn latency, seen by clients.
+
+Starts `python -m send_money_agent.server` with FakeModel (a fixed latency
+before the first chunk, then a delay between 4-word chunks, like a real
+model streaming) and runs the README flows (load_test.SCRIPTS) from many
+concurrent clients over HTTP, reading the SSE streams. Each configuration
+runs in its own server: streaming vs. whole messages, and 1 vs. N uvicorn
+workers sharing the SQLite session store and the ledger.
+
+TTFT is measured on the client, from sending the request to the first reply
+text (a `delta` or a `message`); the server's own figures come from `done`.
+Only model text streams: rendered summaries/receipts and tool-only turns
+arrive whole in both modes. The clients share the machine with the server,
+so with few cores the client-side figures include the clients' own queueing.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_server
+    python -m benchmarks.bench_server --sessions 200 --workers 4 --latency 0.6 --chunk-delay 0.08
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from .load_test import SCRIPTS, percentile
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def start_server(args, directory: str, workers: int, stream: bool) -> tuple[subprocess.Popen, str]:
+    port = free_port()
+    label = f"w{workers}-{'stream' if stream else 'whole'}"
+    command = [
+        sys.executable, "-m", "send_money_agent.server", "--port", str(port), "--workers", str(workers),
+        "--session-db", os.path.join(directory, f"{label}.db"),
+        "--fake-model", "--fake-latency", str(args.latency), "--fake-chunk-delay", str(args.chunk_delay),
+    ] + ([] if stream else ["--no-stream"])
+    environment = {
+        **os.environ,
+        "PYTHONPATH": os.getcwd(),
+        "SEND_MONEY_LEDGER_PATH": os.path.join(directory, f"{label}-ledger.jsonl"),
+        "SEND_MONEY_EVENT_LOG": "off",
+        "SEND_MONEY_RESPONSE_CACHE": "0",
+    }
+    server = subprocess.Popen(command, env=environment, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/healthz", timeout=1).status_code == 200:
+                return server, base_url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("server did not start")
+
+
+class Clients:
+    """Concurrent scripted conversations, timed per turn on the client."""
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.ttft: list[float] = []
+        self.turns: list[float] = []
+        self.server_ttft: list[float] = []
+        self.completed = 0
+
+    async def turn(self, user_id: str, session_id: str, text: str) -> dict:
+        start = time.perf_counter()
+        first, done, event = None, {}, None
+        async with self.client.stream(
+            "POST", f"/sessions/{session_id}/messages", json={"user_id": user_id, "text": text}
+        ) as response:
+            async for line in response.aiter_lines():
+                if line.startswith("event: "):
+                    event = line[len("event: "):]
+                elif line.startswith("data: "):
+                    if event in ("delta", "message") and first is None:
+                        first = time.perf_counter()
+                    elif event == "done":
+                        done = json.loads(line[len("data: "):])
+        finished = time.perf_counter()
+        if first is not None:
+            self.ttft.append(first - start)
+        self.turns.append(finished - start)
+        if done.get("ttft_ms") is not None:
+            self.server_ttft.append(done["ttft_ms"] / 1e3)
+        return done
+
+    async def conversation(self, index: int) -> None:
+        user_id = f"user-{index}"
+        created = await self.client.post("/sessions", json={"user_id": user_id})
+        session_id = created.json()["session_id"]
+        done = {}
+        for text in SCRIPTS[list(SCRIPTS)[index % len(SCRIPTS)]]:
+            done = await self.turn(user_id, session_id, text)
+        if done.get("transaction_id"):
+            self.completed += 1
+
+
+async def run(base_url: str, sessions: int) -> tuple[Clients, float]:
+    limits = httpx.Limits(max_connections=sessions, max_keepalive_connections=sessions)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        clients = Clients(client)
+        start = time.perf_counter()
+        await asyncio.gather(*(clients.conversation(i) for i in range(sessions)))
+        return clients, time.perf_counter() - start
+
+
+def main(args) -> None:
+    print(f"{args.sessions} concurrent clients, FakeModel {args.latency}s to first chunk + "
+          f"{args.chunk_delay}s per chunk ({os.cpu_count()} CPU)\n")
+    print(f"{'workers':>7} {'mode':<7} {'turns/s':>8} {'done':>5} {'ttft p50':>9} {'ttft p95':>9} "
+          f"{'turn p50':>9} {'turn p95':>9} {'server ttft p50':>16}")
+    with tempfile.TemporaryDirectory() as directory:
+        for workers in dict.fromkeys((1, args.workers)):
+            for stream in (False, True):
+                server, base_url = start_server(args, directory, workers, stream)
+                try:
+                    clients, elapsed = asyncio.run(run(base_url, args.sessions))
+                finally:
+                    server.terminate()
+                    server.wait()
+                print(f"{workers:>7} {'stream' if stream else 'whole':<7} {len(clients.turns) / elapsed:>8.0f} "
+                      f"{clients.completed:>5} {percentile(clients.ttft, 50) * 1e3:>7.0f}ms "
+                      f"{percentile(clients.ttft, 95) * 1e3:>7.0f}ms {percentile(clients.turns, 50) * 1e3:>7.0f}ms "
+                      f"{percentile(clients.turns, 95) * 1e3:>7.0f}ms "
+                      f"{percentile(clients.server_ttft, 50) * 1e3:>14.0f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.4, help="fake model seconds to first chunk")
+    parser.add_argument("--chunk-delay", type=float, default=0.1, help="fake model seconds between chunks")
+    main(parser.parse_args())
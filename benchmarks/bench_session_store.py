@@ -0,0 +1,157 @@
+"""
+Append throughput and resume latency of the SQLite session service.
+
+For each database size the store is seeded directly with that many sessions
+(one event each), then:
+
+- appends: many sessions appending events concurrently (group commit) and
+  the same number of events appended one at a time;
+- resume: get_session() on a session with a long history vs. load_state(),
+  which reads the current transfer state without any events, plus
+  state-only resumes spread across the whole table.
+
+The same append/resume runs against google.adk's SqliteSessionService on a
+fresh database as a baseline.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_session_store                 # 10k and 1M sessions
+    python -m benchmarks.bench_session_store --sessions 10000 100000
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from google.adk.events import Event, EventActions
+from google.adk.sessions.sqlite_session_service import SqliteSessionService as AdkSqliteSessionService
+
+from send_money_agent.agent import INITIAL_STATE
+from send_money_agent.session_store import INSERT_EVENT, INSERT_SESSION, SqliteSessionService
+
+APP = "send_money"
+LONG_HISTORY = 400
+CONCURRENT_SESSIONS = 200
+EVENTS_PER_SESSION = 10
+RESUME_SAMPLES = 50
+
+
+def make_event(index: int) -> Event:
+    return Event(
+        author="send_money_bot",
+        invocation_id=f"inv-{index}",
+        actions=EventActions(state_delta={"send_amount": float(index % 5000), "stage": "collecting"}),
+    )
+
+
+def seed(service: SqliteSessionService, sessions: int) -> None:
+    """Bulk-insert sessions straight through the pool (seeding is not what we measure)."""
+    state = json.dumps(INITIAL_STATE)
+    event_data = make_event(0).model_dump_json(exclude_none=True)
+    now = time.time()
+    chunk = 50_000
+    for start in range(0, sessions, chunk):
+        ids = range(start, min(start + chunk, sessions))
+        with service._pool.transaction() as connection:
+            connection.executemany(
+                INSERT_SESSION, ((APP, f"user-{i}", f"s-{i}", state, now, now) for i in ids)
+            )
+            connection.executemany(
+                INSERT_EVENT,
+                ((APP, f"user-{i}", f"s-{i}", f"e-{i}", "inv", now, event_data) for i in ids),
+            )
+
+
+async def bench_appends(service, label: str) -> None:
+    sessions = [
+        await service.create_session(app_name=APP, user_id=f"append-{i}", state=INITIAL_STATE)
+        for i in range(CONCURRENT_SESSIONS)
+    ]
+    total = CONCURRENT_SESSIONS * EVENTS_PER_SESSION
+
+    async def converse(session):
+        for turn in range(EVENTS_PER_SESSION):
+            await service.append_event(session, make_event(turn))
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(converse(session) for session in sessions), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    failures = [result for result in results if isinstance(result, Exception)]
+    if failures:
+        concurrent = f"failed in {len(failures)}/{len(sessions)} sessions ({failures[0]})"
+    else:
+        concurrent = f"{total / elapsed:>9,.0f} ev/s"
+
+    session = await service.create_session(app_name=APP, user_id="append-sequential", state=INITIAL_STATE)
+    start = time.perf_counter()
+    for index in range(total):
+        await service.append_event(session, make_event(index))
+    sequential = total / (time.perf_counter() - start)
+    print(f"  {label:<28} one-at-a-time {sequential:>9,.0f} ev/s   concurrent {concurrent}")
+
+
+async def bench_resume(service, label: str, with_state_only: bool) -> None:
+    session = await service.create_session(app_name=APP, user_id="resume", state=INITIAL_STATE)
+    for index in range(LONG_HISTORY):
+        await service.append_event(session, make_event(index))
+
+    def p50(samples):
+        return statistics.median(samples) * 1000
+
+    full = []
+    for _ in range(RESUME_SAMPLES):
+        start = time.perf_counter()
+        await service.get_session(app_name=APP, user_id="resume", session_id=session.id)
+        full.append(time.perf_counter() - start)
+    line = f"  {label:<28} full history ({LONG_HISTORY} events) p50 {p50(full):7.2f} ms"
+    if with_state_only:
+        state_only = []
+        for _ in range(RESUME_SAMPLES):
+            start = time.perf_counter()
+            await service.load_state(app_name=APP, user_id="resume", session_id=session.id)
+            state_only.append(time.perf_counter() - start)
+        line += f"   state only p50 {p50(state_only):6.2f} ms"
+    print(line)
+
+
+async def run_size(sessions: int, directory: str) -> None:
+    path = os.path.join(directory, f"sessions-{sessions}.db")
+    service = SqliteSessionService(path)
+    start = time.perf_counter()
+    seed(service, sessions)
+    print(f"\n{sessions:,} sessions (seeded in {time.perf_counter() - start:.1f}s, "
+          f"{os.path.getsize(path) / 1e6:,.0f} MB)")
+    await bench_appends(service, "SqliteSessionService")
+    await bench_resume(service, "SqliteSessionService", with_state_only=True)
+
+    # Random-access resume across the whole table, not just a hot session
+    step = max(1, sessions // RESUME_SAMPLES)
+    samples = []
+    for i in range(0, sessions, step):
+        start = time.perf_counter()
+        await service.load_state(app_name=APP, user_id=f"user-{i}", session_id=f"s-{i}")
+        samples.append(time.perf_counter() - start)
+    print(f"  {'random resume, state only':<28} p50 {statistics.median(samples) * 1000:.2f} ms")
+    service.close()
+
+
+async def run_baseline(directory: str) -> None:
+    service = AdkSqliteSessionService(os.path.join(directory, "adk-baseline.db"))
+    print("\nbaseline (fresh database)")
+    await bench_appends(service, "google.adk SqliteSession...")
+    await bench_resume(service, "google.adk SqliteSession...", with_state_only=False)
+
+
+async def main(sizes: list[int]) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        await run_baseline(directory)
+        for sessions in sizes:
+            await run_size(sessions, directory)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10_000, 1_000_000])
+    asyncio.run(main(parser.parse_args().sessions))
@@ -0,0 +1,77 @@
+"""
+Persisted state-delta size per tool call, before and after minimal deltas.
+
+Replays a scripted conversation (happy path, corrections, confirmation,
+cancel and a second transfer) through the tools twice: once calling the
+undecorated functions (every write lands in the delta) and once through
+commits_minimal_delta. Each tool call's delta is wrapped in an ADK Event
+and serialized the way session services persist it.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_state_delta
+"""
+import inspect
+
+from google.adk.events import Event, EventActions
+from google.adk.sessions.state import State
+
+from send_money_agent import tools
+from send_money_agent.agent import INITIAL_STATE
+from send_money_agent.state_delta import DELTA_STATS
+
+SCRIPT = [
+    ("set_amount", {"amount": 100}),
+    ("set_transfer_details", {"beneficiary": "Maria"}),
+    ("set_transfer_details", {"beneficiary": "Maria Lopes"}),
+    ("set_transfer_details", {"delivery_method": "Pix"}),
+    ("set_destination", {"country": "Brazil"}),
+    ("set_amount", {"amount": 100}),
+    ("confirm_transfer", {"confirmed": False}),
+    ("set_destination", {"country": "Mexico"}),
+    ("set_transfer_details", {"delivery_method": "SPEI"}),
+    ("confirm_transfer", {"confirmed": True}),
+    ("cancel_transfer_session", {}),
+    ("calculate_usd_from_target", {"target_amount": 500}),
+    ("set_transfer_details", {"beneficiary": "Juan Perez", "delivery_method": "Bank Transfer"}),
+    ("cancel_transfer_session", {}),
+]
+
+
+class _ToolContext:
+    """Just enough of ToolContext: a fresh State with an empty delta per call."""
+
+    def __init__(self, session_state: dict):
+        self.state = State(value=session_state, delta={})
+
+
+def run(minimal: bool) -> list[tuple[str, int, int]]:
+    session_state = dict(INITIAL_STATE)
+    rows = []
+    for name, args in SCRIPT:
+        tool = getattr(tools, name)
+        if not minimal:
+            tool = inspect.unwrap(tool)
+        context = _ToolContext(session_state)
+        tool(tool_context=context, **args)
+        delta = context.state._delta
+        event = Event(author="send_money_bot", invocation_id="bench", actions=EventActions(state_delta=dict(delta)))
+        rows.append((name, len(delta), len(event.model_dump_json(exclude_none=True))))
+    return rows
+
+
+def main() -> None:
+    before = run(minimal=False)
+    DELTA_STATS.reset()
+    after = run(minimal=True)
+    print(f"{'tool':<28} {'keys before':>11} {'keys after':>10} {'bytes before':>12} {'bytes after':>11}")
+    for (name, keys_b, bytes_b), (_, keys_a, bytes_a) in zip(before, after):
+        print(f"{name:<28} {keys_b:>11} {keys_a:>10} {bytes_b:>12} {bytes_a:>11}")
+    total_before = sum(row[2] for row in before)
+    total_after = sum(row[2] for row in after)
+    print(f"\npersisted event bytes: {total_before} -> {total_after} ({1 - total_after / total_before:.0%} smaller)")
+    print(f"keys written:          {sum(r[1] for r in before)} -> {sum(r[1] for r in after)}")
+    print(f"DELTA_STATS:           {DELTA_STATS.snapshot()}")
+
+
+if __name__ == "__main__":
+    main()
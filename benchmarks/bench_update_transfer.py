@@ -0,0 +1,107 @@
+"""
+Model calls per completed transfer: single-field tools vs. update_transfer.
+
+Runs the README flows plus a few "everything in one message" flows through
+root_agent with FakeModel, the fast path off (so the model makes every tool
+call itself), once per way of applying several facts from one message:
+
+- sequential: set_destination, set_amount, ... one per model call (a model
+  waiting for each tool result before making the next call);
+- parallel: all single-field calls in one model response;
+- composite: one update_transfer call.
+
+Reports model calls, tool executions (each one also running
+after_tool_callback) and turn latency per completed transfer.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_update_transfer
+    python -m benchmarks.bench_update_transfer --sessions 400 --latency 0.3
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from send_money_agent import fast_path
+from send_money_agent.agent import root_agent
+from send_money_agent.event_log import EventLog, set_event_log
+from send_money_agent.fake_model import FakeModel
+from send_money_agent.ledger import Ledger, set_ledger
+from send_money_agent.response_cache import set_response_cache
+
+from .load_test import SCRIPTS as README_SCRIPTS
+
+APP = "send_money_update_transfer"
+STYLES = ("sequential", "parallel", "composite")
+
+SCRIPTS = {
+    **README_SCRIPTS,
+    "all_at_once_mexico": ["Send 300 dollars to Carlos Lopes in Mexico via SPEI", "Yes"],
+    "all_at_once_target": ["Send 1000 pesos to Ana Costa in Argentina by Cash Pickup", "Yes"],
+    "two_then_two": ["Send $80 to Mexico", "To Luis Herrera via Cash Pickup", "Yes"],
+}
+
+
+async def run_style(style: str, sessions: int, latency: float) -> dict:
+    agent = root_agent.clone(update={"model": FakeModel(latency=latency, tool_style=style)})
+    session_service = InMemorySessionService()
+    runner = Runner(agent=agent, app_name=APP, session_service=session_service)
+    totals = {"model_calls": 0, "tool_calls": 0, "completed": 0}
+    latencies = []
+
+    async def conversation(index: int) -> None:
+        flow = list(SCRIPTS)[index % len(SCRIPTS)]
+        user_id = f"user-{index}"
+        session = await session_service.create_session(app_name=APP, user_id=user_id)
+        for text in SCRIPTS[flow]:
+            message = types.Content(role='user', parts=[types.Part(text=text)])
+            start = time.perf_counter()
+            async for event in runner.run_async(user_id=user_id, session_id=session.id, new_message=message):
+                if event.author == 'user' or not event.content or event.partial:
+                    continue
+                if event.get_function_responses():
+                    totals["tool_calls"] += len(event.get_function_responses())
+                else:
+                    totals["model_calls"] += 1
+            latencies.append(time.perf_counter() - start)
+        final = await session_service.get_session(app_name=APP, user_id=user_id, session_id=session.id)
+        if final.state.get('stage') == 'completed':
+            totals["completed"] += 1
+
+    await asyncio.gather(*(conversation(i) for i in range(sessions)))
+    return {**totals, "latencies": latencies}
+
+
+async def main(args) -> None:
+    fast_path.FAST_PATH_ENABLED = False
+    set_response_cache(None)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        set_event_log(EventLog(path=os.path.join(directory, "events.jsonl")))
+        for style in STYLES:
+            set_ledger(Ledger(os.path.join(directory, f"ledger-{style}.jsonl"), fsync=False))
+            results[style] = await run_style(style, args.sessions, args.latency)
+        set_ledger(None)
+        set_event_log(None)
+
+    print(f"{args.sessions:,} sessions over {len(SCRIPTS)} flows, fast path off, "
+          f"model latency {args.latency}s")
+    print(f"{'style':<12} {'completed':>10} {'model calls':>12} {'tool calls':>11} {'mean turn ms':>13}"
+          f"   (per completed transfer)")
+    for style, result in results.items():
+        completed = result["completed"] or 1
+        print(f"{style:<12} {result['completed']:>10,} {result['model_calls'] / completed:>12.2f} "
+              f"{result['tool_calls'] / completed:>11.2f} {statistics.mean(result['latencies']) * 1000:>13.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=280)
+    parser.add_argument("--latency", type=float, default=0.2, help="fake model latency per call (s)")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,151 @@
+"""
+Load test: many concurrent conversations through root_agent, fully offline.
+
+Each simulated user runs one of the README flows (happy path, reverse
+calculation, clarification, out-of-order input) through an ADK Runner, with
+FakeModel standing in for Gemini, so callbacks, tools, the fast path and the
+session layer all run as in production. Reports turns/sec, turn latency
+percentiles, model calls per turn and retained memory per session.
+
+Usage (from the repository root):
+    python -m benchmarks.load_test                            # 500 sessions
+    python -m benchmarks.load_test --sessions 2000 --latency 0.4 --jitter 0.4
+    python -m benchmarks.load_test --session-store sqlite     # SqliteSessionService
+"""
+import argparse
+import asyncio
+import gc
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from send_money_agent.agent import root_agent
+from send_money_agent.event_log import EventLog, set_event_log
+from send_money_agent.fake_model import FakeModel
+from send_money_agent.ledger import Ledger, set_ledger
+from send_money_agent.session_store import SqliteSessionService
+
+APP = "send_money_load"
+
+# The README example flows, continued to a confirmed transfer
+SCRIPTS = {
+    "happy_path": [
+        "I want to send $100 to Maria Lopes via Pix in Brazil",
+        "Yes",
+    ],
+    "reverse_calculation": [
+        "I want Maria to receive 500 Reais in Brazil",
+        "Maria Gonzalez",
+        "Pix",
+        "Yes",
+    ],
+    "clarification": [
+        "Send $50 to me",
+        "John Marcus Silva",
+        "Bank Transfer",
+        "Yes",
+    ],
+    "out_of_order": [
+        "I want to use Pix",
+        "Amount is 200",
+        "Juan Perez",
+        "Yes",
+    ],
+}
+
+
+def percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+class LoadRun:
+    """Runs the scripted conversations and collects per-turn measurements."""
+
+    def __init__(self, runner: Runner, think_time: float):
+        self.runner = runner
+        self.think_time = think_time
+        self.latencies: list[float] = []
+        self.completed = 0
+
+    async def conversation(self, index: int) -> None:
+        flow = list(SCRIPTS)[index % len(SCRIPTS)]
+        user_id = f"user-{index}"
+        session = await self.runner.session_service.create_session(app_name=APP, user_id=user_id)
+        for text in SCRIPTS[flow]:
+            message = types.Content(role='user', parts=[types.Part(text=text)])
+            start = time.perf_counter()
+            async for _ in self.runner.run_async(user_id=user_id, session_id=session.id, new_message=message):
+                pass
+            self.latencies.append(time.perf_counter() - start)
+            if self.think_time:
+                await asyncio.sleep(self.think_time)
+        self.completed += 1
+
+    async def run(self, sessions: int) -> float:
+        start = time.perf_counter()
+        await asyncio.gather(*(self.conversation(i) for i in range(sessions)))
+        return time.perf_counter() - start
+
+
+def make_runner(args, directory: str) -> Runner:
+    agent = root_agent.clone(update={"model": FakeModel(latency=args.latency, jitter=args.jitter)})
+    if args.session_store == "sqlite":
+        session_service = SqliteSessionService(os.path.join(directory, f"load-{time.time_ns()}.db"))
+    else:
+        session_service = InMemorySessionService()
+    return Runner(agent=agent, app_name=APP, session_service=session_service)
+
+
+async def measure_memory(args, directory: str, sessions: int) -> float:
+    """Bytes still allocated per session after its conversation finished."""
+    runner = make_runner(args, directory)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    await LoadRun(runner, think_time=0).run(sessions)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return retained / sessions
+
+
+async def main(args) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        set_ledger(Ledger(os.path.join(directory, "ledger.jsonl"), fsync=False))
+        set_event_log(EventLog(path=os.path.join(directory, "events.jsonl")))
+        load = LoadRun(make_runner(args, directory), think_time=args.think)
+        elapsed = await load.run(args.sessions)
+        per_session = await measure_memory(args, directory, min(args.sessions, args.memory_sessions))
+        set_ledger(None)
+        set_event_log(None)
+
+    turns = len(load.latencies)
+    print(f"sessions          {args.sessions:,} concurrent ({load.completed:,} completed), "
+          f"session store: {args.session_store}, model latency {args.latency}s + up to {args.jitter}s")
+    print(f"turns             {turns:,} in {elapsed:.2f}s = {turns / elapsed:,.0f} turns/s")
+    print(f"turn latency      p50 {percentile(load.latencies, 50) * 1000:.1f} ms   "
+          f"p95 {percentile(load.latencies, 95) * 1000:.1f} ms   "
+          f"p99 {percentile(load.latencies, 99) * 1000:.1f} ms   "
+          f"mean {statistics.mean(load.latencies) * 1000:.1f} ms")
+    # Counted by FakeModel itself: tool-result and fast-path events are not model calls
+    print(f"model calls       {load.runner.agent.model.calls / turns:.2f} per turn")
+    print(f"memory            {per_session / 1024:.1f} KiB retained per session "
+          f"(tracemalloc over {min(args.sessions, args.memory_sessions)} sessions)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.0, help="fake model latency per call (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency per call (s)")
+    parser.add_argument("--think", type=float, default=0.0, help="user think time between turns (s)")
+    parser.add_argument("--session-store", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--memory-sessions", type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,252 @@
+"""
+Regression runner: replay recorded conversations and compare with a baseline.
+
+Each flow in the suite is a cassette in benchmarks/cassettes/ (see
+send_money_agent/cassettes.py): the user's messages and the model's recorded
+answers. Replaying runs root_agent's tools, callbacks and prompt for real
+with the model answering from the cassette, offline and deterministic, and
+reports per flow:
+
+- model calls (requests that reached the model);
+- tool calls (as logged by after_tool_callback and the fast path);
+- state-delta bytes (JSON size of every event's state delta);
+- wall time (median over --repeat runs; model time excluded unless
+  --realtime waits as long as each recorded call took);
+- the stage the conversation ended in.
+
+A flow fails when it no longer follows its recording (a request with no
+recorded answer, or a different final stage), when model or tool calls go
+up, or when state-delta bytes grow by more than --size-tolerance over
+benchmarks/cassettes/baseline.json. The exit status is 1 if any flow fails.
+
+That baseline holds only the deterministic counters, so it can be committed
+and checked anywhere. Wall time depends on the machine: it is only compared
+with --wall-baseline, a file of wall times taken on the same host (written
+by --update-baseline --wall-baseline PATH), and fails a flow that got more
+than --wall-tolerance (and --wall-floor ms) slower.
+
+With --fallback, requests with no recorded answer go to FakeModel instead
+(counted as misses), so a flow that changed path is still measured.
+
+Replayed calls whose system instruction differs from the recording are
+reported as stale: the run still measures this code, but after a prompt
+change the cassettes should be recorded again against the live model.
+
+Usage (from the repository root):
+    python -m benchmarks.regression                     # replay, compare with the baseline
+    python -m benchmarks.regression --fallback          # FakeModel answers what was not recorded
+    python -m benchmarks.regression --update-baseline   # replay, save the results as the baseline
+    python -m benchmarks.regression --wall-baseline .regression-wall.json --update-baseline  # + this host's wall times
+    python -m benchmarks.regression --wall-baseline .regression-wall.json                    # also compare wall time
+    python -m benchmarks.regression --record            # record the suite again with FakeModel
+    python -m benchmarks.regression --record --live     # record against SEND_MONEY_MODEL (API key needed)
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from google.adk.models.registry import LLMRegistry
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from send_money_agent.agent import root_agent
+from send_money_agent.cassettes import Cassette, CassetteMissError, CassetteModel
+from send_money_agent.event_log import EventLog, set_event_log
+from send_money_agent.export import set_exporter
+from send_money_agent.fake_model import FakeModel
+from send_money_agent.ledger import Ledger, set_ledger
+from send_money_agent.response_cache import set_response_cache
+from send_money_agent.scheduler import DEFAULT_MODEL, ScheduledModel
+
+from .bench_update_transfer import SCRIPTS as TRANSFER_SCRIPTS
+
+APP = "send_money_regression"
+CASSETTES = os.path.join(os.path.dirname(__file__), "cassettes")
+BASELINE = "baseline.json"
+# Flows recorded by --record; replay runs whatever cassettes are in the directory
+SUITE = {
+    **TRANSFER_SCRIPTS,
+    "change_country": ["Send $100 to Mexico", "Actually make it Argentina", "Carlos Ruiz", "Cash Pickup", "Yes"],
+    "change_before_confirm": ["Send $120 to Ana Souza in Brazil via Pix", "No", "Change the amount to 150", "Yes"],
+    "cancel": ["Send 300 dollars to Brazil", "Cancel"],
+}
+COUNTED = ("model_calls", "tool_calls")
+BASELINED = (*COUNTED, "state_delta_bytes")
+
+
+class ToolCallLog(EventLog):
+    """EventLog that also counts tool calls per session."""
+
+    def __init__(self, path: str):
+        super().__init__(path=path)
+        self.tool_calls = Counter()
+
+    def emit(self, event: str, important: bool = False, **fields) -> bool:
+        if event == "tool_call":
+            self.tool_calls[fields.get("session_id")] += 1
+        return super().emit(event, important, **fields)
+
+
+def wrap(model):
+    """Schedule the model the way root_agent's own model is."""
+    return ScheduledModel(model) if isinstance(root_agent.model, ScheduledModel) else model
+
+
+async def converse(cassette_model: CassetteModel, script: list[str], ledger_path: str, log: ToolCallLog) -> dict:
+    """One pass over a script; the metrics for it."""
+    set_ledger(Ledger(ledger_path, fsync=False))
+    runner = Runner(
+        agent=root_agent.clone(update={"model": wrap(cassette_model)}), app_name=APP,
+        session_service=InMemorySessionService(),
+    )
+    name = cassette_model.cassette.name
+    session = await runner.session_service.create_session(app_name=APP, user_id="regression", session_id=name)
+    tool_calls_before, delta_bytes = log.tool_calls[name], 0
+    start = time.perf_counter()
+    for text in script:
+        message = types.Content(role='user', parts=[types.Part(text=text)])
+        async for event in runner.run_async(user_id="regression", session_id=name, new_message=message):
+            if not event.partial and event.actions.state_delta:
+                delta_bytes += len(json.dumps(event.actions.state_delta, separators=(",", ":"), default=str))
+    wall = time.perf_counter() - start
+    final = await runner.session_service.get_session(app_name=APP, user_id="regression", session_id=name)
+    set_ledger(None)
+    return {
+        "model_calls": cassette_model.calls,
+        "tool_calls": log.tool_calls[name] - tool_calls_before,
+        "state_delta_bytes": delta_bytes,
+        "wall_ms": round(wall * 1e3, 2),
+        "stage": final.state.get('stage'),
+    }
+
+
+async def record(directory: str, scratch: str, live: bool, log: ToolCallLog) -> None:
+    inner = LLMRegistry.new_llm(os.getenv("SEND_MONEY_MODEL", DEFAULT_MODEL)) if live else FakeModel()
+    os.makedirs(directory, exist_ok=True)
+    for name, script in SUITE.items():
+        cassette = Cassette(name, script, {"model": inner.model})
+        result = await converse(CassetteModel(cassette=cassette, mode="record", inner=inner), script,
+                                os.path.join(scratch, f"record-{name}.jsonl"), log)
+        cassette.meta["stage"] = result["stage"]
+        cassette.save(os.path.join(directory, f"{name}.jsonl"))
+        print(f"recorded {name}: {len(cassette.interactions)} model calls, {inner.model}")
+
+
+async def replay(cassette: Cassette, scratch: str, log: ToolCallLog, args) -> dict:
+    runs = []
+    for index in range(args.repeat):
+        cassette.rewind()
+        model = CassetteModel(cassette=cassette, fallback=FakeModel() if args.fallback else None,
+                              realtime=args.realtime)
+        try:
+            ledger_path = os.path.join(scratch, f"{cassette.name}-{index}.jsonl")
+            result = await converse(model, cassette.script, ledger_path, log)
+        except CassetteMissError as error:
+            set_ledger(None)
+            return {"error": str(error)}
+        runs.append({**result, "misses": model.misses, "stale": model.stale})
+    return {**runs[0], "wall_ms": round(statistics.median(run["wall_ms"] for run in runs), 2)}
+
+
+def regressions(name: str, result: dict, expected_stage: str, baseline: dict, wall_ms: float, args) -> list[str]:
+    if "error" in result:
+        return [result["error"]]
+    problems = []
+    if result["stage"] != expected_stage:
+        problems.append(f"{name}: ended in stage {result['stage']!r}, recorded {expected_stage!r}")
+    if baseline is not None:
+        for key in COUNTED:
+            if result[key] > baseline[key]:
+                problems.append(f"{name}: {key} {baseline[key]} -> {result[key]}")
+        if result["state_delta_bytes"] > baseline["state_delta_bytes"] * (1 + args.size_tolerance):
+            problems.append(f"{name}: state_delta_bytes {baseline['state_delta_bytes']} -> {result['state_delta_bytes']}")
+    # Wall baselines leave model time out
+    if wall_ms is not None and not args.realtime:
+        if result["wall_ms"] - wall_ms > args.wall_floor and result["wall_ms"] > wall_ms * (1 + args.wall_tolerance):
+            problems.append(f"{name}: wall_ms {wall_ms} -> {result['wall_ms']}")
+    return problems
+
+
+def load_json(path: str) -> dict:
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save_json(path: str, value: dict) -> None:
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(value, file, indent=2, sort_keys=True)
+        file.write("\n")
+
+
+async def main(args) -> int:
+    set_response_cache(None)
+    set_exporter(None)
+    with tempfile.TemporaryDirectory() as scratch:
+        log = ToolCallLog(os.path.join(scratch, "events.jsonl"))
+        set_event_log(log)
+        if args.record:
+            await record(args.cassettes, scratch, args.live, log)
+        baseline_path = os.path.join(args.cassettes, BASELINE)
+        baseline = {} if args.update_baseline else load_json(baseline_path)
+        walls = {} if args.update_baseline else load_json(args.wall_baseline)
+
+        print(f"\n{'flow':<24} {'model':>6} {'tools':>6} {'delta B':>8} {'wall ms':>8} {'misses':>7} {'stale':>6}  stage")
+        results, problems, names = {}, [], set()
+        for path in sorted(glob.glob(os.path.join(args.cassettes, "*.jsonl"))):
+            cassette = Cassette.load(path)
+            names.add(cassette.name)
+            result = await replay(cassette, scratch, log, args)
+            problems += regressions(cassette.name, result, cassette.meta.get("stage"),
+                                    baseline.get(cassette.name), walls.get(cassette.name), args)
+            if "error" in result:
+                print(f"{cassette.name:<24} diverged from its recording")
+                continue
+            results[cassette.name] = {key: result[key] for key in (*BASELINED, "wall_ms")}
+            print(f"{cassette.name:<24} {result['model_calls']:>6} {result['tool_calls']:>6} "
+                  f"{result['state_delta_bytes']:>8,} {result['wall_ms']:>8.1f} {result['misses']:>7} {result['stale']:>6}  "
+                  f"{result['stage']}")
+        set_event_log(None)
+
+    if args.update_baseline:
+        if problems:
+            print("\nbaseline not updated:")
+        else:
+            save_json(baseline_path, {name: {key: result[key] for key in BASELINED} for name, result in results.items()})
+            print(f"\nbaseline saved: {baseline_path}")
+            if args.wall_baseline:
+                save_json(args.wall_baseline, {name: result["wall_ms"] for name, result in results.items()})
+                print(f"wall times saved: {args.wall_baseline}")
+    elif baseline:
+        problems += [f"{name}: in the baseline but no cassette" for name in sorted(set(baseline) - names)]
+    for problem in problems:
+        print(f"  FAIL {problem}")
+    if not problems:
+        within = "the baseline and this host's wall times" if walls else "the baseline"
+        print(f"  ok   {len(results)} flows within {within}" if baseline else f"  ok   {len(results)} flows replayed")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cassettes", default=CASSETTES, help="cassette directory")
+    parser.add_argument("--record", action="store_true", help="record the suite before replaying it")
+    parser.add_argument("--live", action="store_true", help="record against SEND_MONEY_MODEL instead of FakeModel")
+    parser.add_argument("--fallback", action="store_true", help="answer unrecorded requests with FakeModel")
+    parser.add_argument("--realtime", action="store_true", help="wait the recorded model latency per call")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--wall-baseline", help="same-host wall times to compare with (or save, with --update-baseline)")
+    parser.add_argument("--repeat", type=int, default=5, help="replays per flow (median wall time)")
+    parser.add_argument("--size-tolerance", type=float, default=0.05, help="allowed state-delta growth (share)")
+    parser.add_argument("--wall-tolerance", type=float, default=0.5, help="allowed wall-time growth (share)")
+    parser.add_argument("--wall-floor", type=float, default=5.0, help="wall-time growth always allowed (ms)")
+    sys.exit(asyncio.run(main(parser.parse_args())))
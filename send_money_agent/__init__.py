@@ -1 +1,29 @@
-from . import agent
+"""
+Send Money agent (Google ADK).
+
+`root_agent` and the `agent` module load on first access, so importing the
+package, or one of its light modules (`ledger`, `rates`, `matching`, ...),
+does not pull in google-adk and google-genai. ADK's agent loader finds
+`root_agent` either way.
+
+Configuration (environment):
+    SEND_MONEY_EAGER_IMPORTS   1 to build the agent and import everything it
+                               uses at import (e.g. before forking workers,
+                               so the first request pays no import)
+"""
+import importlib
+import os
+
+
+def __getattr__(name: str):
+    if name == "agent":
+        return importlib.import_module(".agent", __name__)
+    if name == "root_agent":
+        return importlib.import_module(".agent", __name__).root_agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+if os.getenv("SEND_MONEY_EAGER_IMPORTS") == "1":
+    from .agent import root_agent  # noqa: F401
+    # Modules the tools import on first use (NumPy-backed)
+    from . import rate_matrix, screening  # noqa: F401
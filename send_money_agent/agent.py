@@ -1,76 +1,149 @@
-from google.adk.agents import LlmAgent
-from google.adk.agents.callback_context import CallbackContext
-from google.adk.tools import ToolContext, BaseTool
-from google.genai import types
-from typing import Optional, Any
-
-from .tools import (
-    set_destination,
-    set_amount,
-    set_transfer_details,
-    confirm_transfer,
-    calculate_usd_from_target,
-    cancel_transfer_session
-)
-from .prompts.prompt_v3 import get_system_instruction
-from .helpers import all_fields_complete, get_missing_fields, get_initial_state
-from .mock_data import get_country_data
-
-
-# Generate initial state with Brazil defaults
-INITIAL_STATE = get_initial_state(get_country_data("Brazil"))
-
-
-def before_agent_callback(callback_context: CallbackContext) -> Optional[types.Content]:
+"""
+The Send Money root agent.
+
+`root_agent` is built on first access (module `__getattr__`), together with
+its tools, stage-aware prompt and model callbacks, and google-adk is only
+imported then: importing this module for `INITIAL_STATE` or its callbacks
+stays light. `INITIAL_STATE` is likewise computed on access, from the
+default corridor of the current corridor snapshot.
+"""
+import threading
+from typing import TYPE_CHECKING, Any, Optional
+
+from .helpers import advance_stage, get_initial_state
+from .mock_data import get_default_country_data
+from .event_log import record_tool_call
+from .tracing import configure_tracing_from_env, traced_callback
+
+if TYPE_CHECKING:
+    from google.adk.agents import LlmAgent
+    from google.adk.agents.callback_context import CallbackContext
+    from google.adk.tools import BaseTool, ToolContext
+    from google.genai import types
+
+
+def initial_state() -> dict:
+    """Initial state with the default corridor's country defaults."""
+    return get_initial_state(get_default_country_data())
+
+
+@traced_callback
+def before_agent_callback(callback_context: "CallbackContext") -> Optional["types.Content"]:
     """Initialize state before agent runs."""
-    for key, default_value in INITIAL_STATE.items():
+    for key, default_value in initial_state().items():
         if key not in callback_context.state:
             callback_context.state[key] = default_value
     return None
 
 
+# Stage a tool call started from; temp: state is never stored and goes with the invocation
+STAGE_BEFORE_TOOL_KEY = "temp:stage_before_tool:{function_call_id}"
+
+
+@traced_callback
+def before_tool_callback(
+    tool: "BaseTool",
+    args: dict,
+    tool_context: "ToolContext"
+) -> Optional[dict]:
+    """Remember the stage so the tool-call log can show the transition."""
+    key = STAGE_BEFORE_TOOL_KEY.format(function_call_id=tool_context.function_call_id)
+    tool_context.state[key] = tool_context.state.get('stage', 'initial')
+    return None
+
+
+@traced_callback
 def after_tool_callback(
-    tool: BaseTool,
+    tool: "BaseTool",
     args: dict,
-    tool_context: ToolContext,
+    tool_context: "ToolContext",
     tool_response: Any
 ) -> Optional[dict]:
     """
     Centralized stage management callback.
     
     Advances from 'collecting' → 'confirming' when all fields complete
-    and there are no validation errors.
+    and there are no validation errors, then logs the call (event_log.py).
     """
-    current_stage = tool_context.state.get('stage', 'initial')
+    stage_before = tool_context.state.get(STAGE_BEFORE_TOOL_KEY.format(function_call_id=tool_context.function_call_id))
     
-    if current_stage == 'collecting':
-        if tool_context.state.get('validation_errors'):
-            print(f"[Callback] Blocked by validation errors")
-            return None
-            
-        if all_fields_complete(tool_context.state):
-            tool_context.state['stage'] = 'confirming'
-            print(f"[Callback] Stage advanced: collecting → confirming")
-        else:
-            missing = get_missing_fields(tool_context.state)
-            print(f"[Callback] Still collecting. Missing: {missing}")
+    if tool_context.state.get('stage', 'initial') == 'collecting':
+        advance_stage(tool_context.state)
     
+    record_tool_call(
+        tool.name, tool_context,
+        stage_before=stage_before or tool_context.state.get('stage', 'initial'),
+        tool_response=tool_response
+    )
     return None
 
 
-root_agent = LlmAgent(
-    name="send_money_bot",
-    model="gemini-2.0-flash",
-    instruction=get_system_instruction(),
-    description="Helps users send money internationally by collecting transfer details",
-    tools=[
+def build_root_agent() -> "LlmAgent":
+    """A new root agent: scheduled model, per-session prompt version, tools and callbacks."""
+    from google.adk.agents import LlmAgent
+
+    from .fast_path import fast_path_callback
+    from .history import compact_history_callback
+    from .prompt_registry import instruction_provider, prompt_model_usage, prompt_turn_end, prompt_turn_start
+    from .receipts import render_reply_callback
+    from .response_cache import response_cache_lookup, response_cache_release, response_cache_store
+    from .scheduler import default_model, model_tenant_callback
+    from .tools import (
         set_destination,
         set_amount,
         set_transfer_details,
+        update_transfer,
         confirm_transfer,
         calculate_usd_from_target,
         cancel_transfer_session
-    ],
-    before_agent_callback=before_agent_callback,
-    after_tool_callback=after_tool_callback
-)
+    )
+
+    return LlmAgent(
+        name="send_money_bot",
+        model=default_model(),
+        instruction=instruction_provider,
+        description="Helps users send money internationally by collecting transfer details",
+        tools=[
+            set_destination,
+            set_amount,
+            set_transfer_details,
+            update_transfer,
+            confirm_transfer,
+            calculate_usd_from_target,
+            cancel_transfer_session
+        ],
+        before_agent_callback=[before_agent_callback, prompt_turn_start],
+        after_agent_callback=prompt_turn_end,
+        before_model_callback=[
+            fast_path_callback, render_reply_callback, response_cache_lookup, compact_history_callback,
+            model_tenant_callback
+        ],
+        after_model_callback=[response_cache_store, prompt_model_usage],
+        on_model_error_callback=response_cache_release,
+        before_tool_callback=before_tool_callback,
+        after_tool_callback=after_tool_callback
+    )
+
+
+_root_agent: Optional["LlmAgent"] = None
+_root_agent_lock = threading.Lock()
+
+
+def get_root_agent() -> "LlmAgent":
+    """Process-wide root agent, built (and tracing configured) on first use."""
+    global _root_agent
+    if _root_agent is None:
+        with _root_agent_lock:
+            if _root_agent is None:
+                configure_tracing_from_env()
+                _root_agent = build_root_agent()
+    return _root_agent
+
+
+def __getattr__(name: str):
+    # `from send_money_agent.agent import root_agent` and ADK's agent loader land here
+    if name == "root_agent":
+        return get_root_agent()
+    if name == "INITIAL_STATE":
+        return initial_state()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
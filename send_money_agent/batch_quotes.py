@@ -0,0 +1,129 @@
+"""
+Vectorized quoting for rate cards and bulk pricing.
+
+Prices many transfers at once with the same rules as the per-session tools:
+`validate_amount` limits (`MAX_TRANSFER_AMOUNT`), the forward calculation of
+`set_amount` (receive = round(usd * rate, 2)) and the reverse calculation of
+`calculate_usd_from_target` (usd = round(target / rate, 2), then validated).
+Rounding matches Python's `round()` exactly, including half-way cases.
+
+Results are columnar: a dict of equal-length NumPy arrays.
+"""
+from typing import Iterable, Mapping, Optional, Union
+
+import numpy as np
+
+from .helpers import MAX_TRANSFER_AMOUNT
+from .mock_data import get_corridor_registry
+from .rates import get_rate_service
+
+FORWARD = "forward"
+REVERSE = "reverse"
+
+# Error codes, matching the ones the tools return
+ERROR_NONE = ""
+ERROR_INVALID_AMOUNT = "invalid_amount"
+ERROR_INVALID_TARGET = "invalid_target_amount"
+ERROR_CALCULATED_INVALID = "calculated_amount_invalid"
+ERROR_UNSUPPORTED = "unsupported_currency"
+
+
+def round_cents(values: np.ndarray) -> np.ndarray:
+    """
+    Round to 2 decimals with exactly the result of Python's round(value, 2).
+
+    np.rint(values * 100) / 100 agrees with round() except when the scaled
+    value lands within rounding error of a half-way point; those few elements
+    are re-rounded with round() itself.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    scaled = values * 100.0
+    rounded = np.rint(scaled) / 100.0
+    distance_to_half = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5)
+    near_tie = distance_to_half <= 4 * np.spacing(np.abs(scaled))
+    for index in np.flatnonzero(near_tie & np.isfinite(values)):
+        rounded.flat[index] = round(float(values.flat[index]), 2)
+    return rounded
+
+
+def _rates_for(currency_codes: np.ndarray, rates: Mapping[str, float]) -> np.ndarray:
+    """Look up each code's rate (NaN when unsupported), one dict lookup per distinct code."""
+    if currency_codes.size == 0:
+        return np.empty(currency_codes.shape, dtype=np.float64)
+    unique_codes, inverse = np.unique(currency_codes, return_inverse=True)
+    unique_rates = np.array(
+        [rates.get(str(code).upper(), np.nan) for code in unique_codes], dtype=np.float64
+    )
+    return unique_rates[inverse].reshape(currency_codes.shape)
+
+
+def quote_batch(
+    currency_codes: Union[str, Iterable[str]],
+    amounts: Iterable[float],
+    direction: str = FORWARD,
+    rates: Optional[Mapping[str, float]] = None
+) -> dict[str, np.ndarray]:
+    """
+    Price many transfers at once.
+
+    Args:
+        currency_codes: Destination currency per quote (or one code for all).
+        amounts: USD amounts (forward) or destination-currency targets (reverse).
+        direction: "forward" (USD → receive amount) or "reverse" (target → USD needed).
+        rates: USD → currency rates; defaults to the live rate cache.
+
+    Returns:
+        Columns currency_code, exchange_rate, send_amount, receive_amount,
+        valid and error. Invalid rows keep the computed figures where there
+        are any, so callers can show why a quote was refused.
+    """
+    if direction not in (FORWARD, REVERSE):
+        raise ValueError(f"direction must be '{FORWARD}' or '{REVERSE}', got {direction!r}")
+    amounts = np.asarray(amounts, dtype=np.float64)
+    codes = np.asarray(currency_codes)
+    if codes.dtype.kind != "U":
+        codes = codes.astype(str)
+    codes = np.broadcast_to(codes, amounts.shape)
+    exchange_rate = _rates_for(codes, rates if rates is not None else get_rate_service().get_rates())
+    supported = ~np.isnan(exchange_rate)
+
+    error = np.full(amounts.shape, ERROR_NONE, dtype=object)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if direction == FORWARD:
+            send_amount = amounts
+            receive_amount = round_cents(amounts * exchange_rate)
+            error[amounts > MAX_TRANSFER_AMOUNT] = ERROR_INVALID_AMOUNT
+            error[amounts <= 0] = ERROR_INVALID_AMOUNT
+        else:
+            receive_amount = amounts
+            send_amount = round_cents(amounts / exchange_rate)
+            out_of_range = (send_amount <= 0) | (send_amount > MAX_TRANSFER_AMOUNT)
+            error[out_of_range] = ERROR_CALCULATED_INVALID
+            error[amounts <= 0] = ERROR_INVALID_TARGET
+    error[~supported] = ERROR_UNSUPPORTED
+
+    return {
+        "currency_code": codes.copy(),
+        "exchange_rate": exchange_rate,
+        "send_amount": np.array(send_amount, dtype=np.float64),
+        "receive_amount": np.array(receive_amount, dtype=np.float64),
+        "valid": error == ERROR_NONE,
+        "error": error,
+    }
+
+
+def rate_card(
+    amount_bands: Iterable[float],
+    direction: str = FORWARD,
+    rates: Optional[Mapping[str, float]] = None
+) -> dict[str, np.ndarray]:
+    """Quote every corridor at every amount band (corridor-major order)."""
+    registry = get_corridor_registry()
+    bands = np.asarray(amount_bands, dtype=np.float64)
+    currencies = np.array([corridor.currency_code for corridor in registry])
+    countries = np.array(registry.country_names)
+    result = quote_batch(
+        np.repeat(currencies, bands.size), np.tile(bands, currencies.size), direction, rates
+    )
+    result["country"] = np.repeat(countries, bands.size)
+    return result
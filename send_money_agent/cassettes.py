@@ -0,0 +1,188 @@
+"""
+Record and replay model calls for deterministic regression runs.
+
+A cassette holds one conversation: the user's messages and every model call
+made while the agent answered them, as (request fingerprint, responses)
+pairs. `CassetteModel` in "record" mode passes calls through to a real model
+(or FakeModel) and stores them; in "replay" mode it answers offline from the
+cassette, looking responses up by the fingerprint of the request the agent
+built. Tools, callbacks and the prompt still run for real, so a replay
+measures this code with the model's answers held fixed.
+
+The fingerprint covers the conversation contents (user messages, function
+calls, tool results) and the declared tool names, with per-run values
+(function call IDs, quote and transaction IDs) masked. It leaves out the
+system instruction: a prompt edit does not invalidate cassettes, but replayed
+calls whose prompt differs from the recording are counted as `stale`, since
+a live model might have answered them differently.
+
+A request with no recorded match means the conversation took a different
+path than when it was recorded: replay raises CassetteMissError, or asks
+`fallback` (e.g. FakeModel) and counts a miss.
+
+File format: JSON lines, a header `{"name", "script", "model", ...}` then one
+line per model call `{"fingerprint", "prompt", "latency", "request",
+"responses"}`. The benchmarks/regression.py runner records and replays
+suites of them.
+"""
+import asyncio
+import hashlib
+import json
+import re
+import time
+from collections import defaultdict, deque
+from typing import Any, AsyncGenerator, Literal, Optional
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+
+# Values that differ between runs of the same conversation
+VOLATILE_RE = re.compile(r"\b(QT|TXN)-[0-9A-Za-z]+")
+VOLATILE_FIELDS = {"id", "thought_signature"}
+
+
+class CassetteMissError(LookupError):
+    """Replay got a request the cassette has no recording for."""
+
+
+def _masked(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _masked(item) for key, item in value.items() if key not in VOLATILE_FIELDS}
+    if isinstance(value, list):
+        return [_masked(item) for item in value]
+    if isinstance(value, str):
+        return VOLATILE_RE.sub(r"\1-*", value)
+    return value
+
+
+def request_contents(llm_request: LlmRequest) -> list[dict]:
+    """The request's contents as JSON-ready dicts, per-run values masked."""
+    return [_masked(content.model_dump(mode="json", exclude_none=True)) for content in llm_request.contents]
+
+
+def _digest(value: Any) -> str:
+    text = json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def request_fingerprint(llm_request: LlmRequest) -> str:
+    """Stable key for a model request: contents and tool names, not the system instruction."""
+    return _digest({"contents": request_contents(llm_request), "tools": sorted(llm_request.tools_dict)})
+
+
+def prompt_fingerprint(llm_request: LlmRequest) -> str:
+    system_instruction = llm_request.config.system_instruction if llm_request.config else None
+    return _digest(str(system_instruction or ""))
+
+
+class Cassette:
+    """
+    One recorded conversation.
+
+    Args:
+        name: Conversation name (the file is `<name>.jsonl`).
+        script: The user's messages, in order.
+        meta: Anything else worth keeping in the header (model, stage reached, ...).
+    """
+
+    def __init__(self, name: str, script: list[str], meta: Optional[dict] = None):
+        self.name = name
+        self.script = list(script)
+        self.meta = dict(meta or {})
+        self.interactions: list[dict] = []
+        self._by_fingerprint: dict[str, deque[dict]] = defaultdict(deque)
+
+    def add(self, interaction: dict) -> None:
+        self.interactions.append(interaction)
+        self._by_fingerprint[interaction['fingerprint']].append(interaction)
+
+    def rewind(self) -> None:
+        """Make every recording available again (before replaying the conversation once more)."""
+        self._by_fingerprint.clear()
+        for interaction in self.interactions:
+            self._by_fingerprint[interaction['fingerprint']].append(interaction)
+
+    def match(self, fingerprint: str) -> Optional[dict]:
+        """Next recording for a fingerprint; a repeated request reuses the last one."""
+        recordings = self._by_fingerprint.get(fingerprint)
+        if not recordings:
+            return None
+        return recordings.popleft() if len(recordings) > 1 else recordings[0]
+
+    def save(self, path: str) -> None:
+        header = {"name": self.name, "script": self.script, **self.meta}
+        with open(path, "w", encoding="utf-8") as file:
+            for record in [header] + self.interactions:
+                file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        with open(path, encoding="utf-8") as file:
+            header, *interactions = [json.loads(line) for line in file if line.strip()]
+        cassette = cls(header.pop("name"), header.pop("script"), header)
+        for interaction in interactions:
+            cassette.add(interaction)
+        return cassette
+
+
+class CassetteModel(BaseLlm):
+    """
+    Records model calls into a cassette, or replays them from it.
+
+    Args:
+        cassette: The conversation being recorded or replayed.
+        mode: "record" (call `inner`, store its responses) or "replay".
+        inner: The model recorded from.
+        fallback: In replay, the model asked when nothing was recorded for a
+            request (default: raise CassetteMissError).
+        realtime: In replay, wait as long as the recorded call took.
+    """
+    model: str = "cassette"
+    cassette: Cassette
+    mode: Literal["record", "replay"] = "replay"
+    inner: Optional[BaseLlm] = None
+    fallback: Optional[BaseLlm] = None
+    realtime: bool = False
+    calls: int = 0
+    misses: int = 0
+    stale: int = 0
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        self.calls += 1
+        fingerprint = request_fingerprint(llm_request)
+        if self.mode == "record":
+            start = time.perf_counter()
+            responses = []
+            async for response in self.inner.generate_content_async(llm_request, stream):
+                responses.append(response)
+                yield response
+            self.cassette.add({
+                "fingerprint": fingerprint,
+                "prompt": prompt_fingerprint(llm_request),
+                "latency": round(time.perf_counter() - start, 4),
+                "request": request_contents(llm_request),
+                "responses": [response.model_dump(mode="json", exclude_none=True) for response in responses],
+            })
+            return
+
+        recording = self.cassette.match(fingerprint)
+        if recording is None:
+            self.misses += 1
+            if self.fallback is None:
+                raise CassetteMissError(
+                    f"{self.cassette.name}: no recording for model call {self.calls} ({fingerprint}); "
+                    "the conversation changed since it was recorded"
+                )
+            async for response in self.fallback.generate_content_async(llm_request, stream):
+                yield response
+            return
+        if recording['prompt'] != prompt_fingerprint(llm_request):
+            self.stale += 1
+        if self.realtime:
+            await asyncio.sleep(recording['latency'])
+        for data in recording['responses']:
+            response = LlmResponse.model_validate(data)
+            # Partial chunks only for streaming calls, like a live model
+            if stream or not response.partial:
+                yield response
@@ -0,0 +1,145 @@
+"""
+File-backed corridor configuration with hot reload.
+
+Corridors (countries, currencies, rates, delivery methods, aliases and the
+default corridor) are read from a JSON or YAML file into an immutable
+CorridorRegistry snapshot. `CorridorSource.registry` re-checks the file at
+most every `check_interval` seconds with one `os.stat`; when its mtime, size
+or inode changed, the file is parsed and validated into a new registry,
+which replaces the old one with a single reference assignment. Readers never
+lock: a caller keeps the snapshot it got for as long as it holds it, so a
+turn in flight finishes on the corridors it started with, and sessions keep
+the country data already copied into their state.
+
+A file that fails to parse or validate is logged and ignored; the last good
+snapshot keeps being served until the file changes again. Only the first
+load raises.
+
+Configuration (environment):
+    SEND_MONEY_CORRIDORS_FILE             Corridor file, .json/.yaml/.yml
+                                          (default: corridors.json next to this module)
+    SEND_MONEY_CORRIDORS_CHECK_INTERVAL   Seconds between mtime checks; 0
+                                          checks on every access (default: 1)
+"""
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+from .corridors import CorridorRegistry, read_corridor_config, registry_from_config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CORRIDORS_FILE = os.path.join(os.path.dirname(__file__), "corridors.json")
+DEFAULT_CHECK_INTERVAL = 1.0
+
+
+def _signature(path: str) -> tuple[int, int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+class CorridorSource:
+    """
+    The current corridor snapshot of one file, reloaded when the file changes.
+
+    Args:
+        path: JSON or YAML corridor file (see `corridors.read_corridor_config`).
+        check_interval: Seconds between mtime checks.
+    """
+
+    def __init__(self, path: str = DEFAULT_CORRIDORS_FILE, check_interval: float = DEFAULT_CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self.reloads = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._signature = _signature(path)
+        self._registry = registry_from_config(read_corridor_config(path))
+        self._next_check = time.monotonic() + check_interval
+
+    @property
+    def registry(self) -> CorridorRegistry:
+        """The current snapshot, after a throttled check for a changed file."""
+        now = time.monotonic()
+        if now >= self._next_check:
+            self.check(now)
+        return self._registry
+
+    def check(self, now: Optional[float] = None) -> bool:
+        """Reload if the file changed; True if a new snapshot was swapped in."""
+        # A check already running serves everyone: callers keep the current snapshot
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            self._next_check = (now if now is not None else time.monotonic()) + self.check_interval
+            try:
+                signature = _signature(self.path)
+            except OSError as error:
+                if self._signature is not None:
+                    logger.warning("Corridor file unavailable, keeping the loaded corridors: %s", error)
+                    self.errors += 1
+                self._signature = None
+                return False
+            if signature == self._signature:
+                return False
+            # Remember the attempt either way: a bad file is not re-parsed until it changes
+            self._signature = signature
+            try:
+                registry = registry_from_config(read_corridor_config(self.path))
+            except Exception as error:
+                logger.warning("Corridor reload failed, keeping the loaded corridors: %s", error)
+                self.errors += 1
+                return False
+            previous, self._registry = self._registry, registry
+            self.reloads += 1
+        finally:
+            self._lock.release()
+
+        logger.info("Loaded %d corridors from %s", len(registry), self.path)
+        self._notify(previous, registry)
+        return True
+
+    def add_listener(self, callback) -> None:
+        """Call `callback(previous_registry, new_registry)` after every reload."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback) -> None:
+        """Stop calling a callback passed to `add_listener` (no-op if it was not added)."""
+        try:
+            self._listeners.remove(callback)
+        except ValueError:
+            pass
+
+    def _notify(self, previous: CorridorRegistry, registry: CorridorRegistry) -> None:
+        for callback in list(self._listeners):
+            try:
+                callback(previous, registry)
+            except Exception:
+                logger.exception("Corridor listener failed")
+
+
+_corridor_source: Optional[CorridorSource] = None
+_corridor_source_lock = threading.Lock()
+
+
+def get_corridor_source() -> CorridorSource:
+    """Process-wide corridor source, configured from the environment on first use."""
+    global _corridor_source
+    if _corridor_source is None:
+        with _corridor_source_lock:
+            if _corridor_source is None:
+                _corridor_source = CorridorSource(
+                    os.getenv("SEND_MONEY_CORRIDORS_FILE") or DEFAULT_CORRIDORS_FILE,
+                    check_interval=float(os.getenv("SEND_MONEY_CORRIDORS_CHECK_INTERVAL", DEFAULT_CHECK_INTERVAL)),
+                )
+    return _corridor_source
+
+
+def set_corridor_source(source: Optional[CorridorSource]) -> None:
+    """Replace the process-wide corridor source (None: configure again from the environment)."""
+    global _corridor_source
+    with _corridor_source_lock:
+        _corridor_source = source
@@ -0,0 +1,196 @@
+import json
+import os
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Iterable, Mapping, Optional
+
+from .matching import MatchResult, PhraseMatcher
+
+
+def normalize_key(value: str) -> str:
+    """Normalize a lookup key (case-folded, surrounding whitespace stripped)."""
+    return value.strip().casefold()
+
+
+@dataclass(frozen=True)
+class Corridor:
+    """Immutable configuration for a single USD → destination corridor."""
+    country_name: str
+    currency_code: str
+    exchange_rate: float
+    delivery_methods: tuple[str, ...]
+    iso_alpha2: str = ""
+    iso_alpha3: str = ""
+    aliases: tuple[str, ...] = field(default_factory=tuple)
+
+    @classmethod
+    def from_dict(cls, config: dict) -> "Corridor":
+        """Build a corridor from a corridor-file entry (see `read_corridor_config`)."""
+        return cls(
+            country_name=config['country_name'],
+            currency_code=config['currency_code'],
+            exchange_rate=config['exchange_rate'],
+            delivery_methods=tuple(config['delivery_methods']),
+            iso_alpha2=config.get('iso_alpha2', ""),
+            iso_alpha3=config.get('iso_alpha3', ""),
+            aliases=tuple(config.get('aliases', ())),
+        )
+
+    def as_dict(self) -> dict:
+        """Return the corridor in the dict shape the tools and state expect."""
+        return {
+            "country_name": self.country_name,
+            "currency_code": self.currency_code,
+            "exchange_rate": self.exchange_rate,
+            "delivery_methods": list(self.delivery_methods),
+        }
+
+
+class CorridorRegistry:
+    """
+    Read-only index of corridors built once from the corridor table.
+
+    Lookups accept the country name, ISO alpha-2/alpha-3 code, currency code
+    or any configured alias, case-insensitively, in O(1). When two corridors
+    claim the same key, the key type with the higher priority wins
+    (name > ISO code > currency > alias); a tie at the same priority makes the
+    key ambiguous and it is left out of the index.
+
+    `resolve_country` and `match_method` additionally forgive case, accents,
+    punctuation and typos, and know delivery-method aliases (matching.py);
+    their matchers are built on first use, per corridor for the methods.
+
+    New sessions start on `default_corridor`: the corridor named by
+    `default_country`, else the first one in the table.
+    """
+
+    def __init__(
+        self,
+        corridors: Iterable[Corridor],
+        method_aliases: Optional[Mapping[str, Iterable[str]]] = None,
+        default_country: Optional[str] = None
+    ):
+        self._corridors = tuple(corridors)
+        self._names = tuple(corridor.country_name for corridor in self._corridors)
+        self._index = self._build_index(self._corridors)
+        self._method_aliases = {method: tuple(aliases) for method, aliases in (method_aliases or {}).items()}
+        self._method_matchers: dict[str, PhraseMatcher] = {}
+        if default_country:
+            self._default = self.lookup(default_country)
+            if self._default is None:
+                raise ValueError(f"Default country '{default_country}' is not a corridor")
+        else:
+            self._default = self._corridors[0] if self._corridors else None
+
+    @staticmethod
+    def _build_index(corridors: tuple[Corridor, ...]) -> dict[str, Corridor]:
+        levels = [
+            lambda c: (c.country_name,),
+            lambda c: (c.iso_alpha2, c.iso_alpha3),
+            lambda c: (c.currency_code,),
+            lambda c: c.aliases,
+        ]
+        index: dict[str, Corridor] = {}
+        # Fill from highest to lowest priority; a lower level never overrides
+        for keys_for in levels:
+            level: dict[str, Corridor] = {}
+            ambiguous: set[str] = set()
+            for corridor in corridors:
+                for raw_key in keys_for(corridor):
+                    if not raw_key:
+                        continue
+                    key = normalize_key(raw_key)
+                    owner = level.get(key)
+                    if owner is not None and owner is not corridor:
+                        ambiguous.add(key)
+                    level[key] = corridor
+            for key, corridor in level.items():
+                if key not in ambiguous and key not in index:
+                    index[key] = corridor
+        return index
+
+    def __len__(self) -> int:
+        return len(self._corridors)
+
+    def __iter__(self):
+        return iter(self._corridors)
+
+    @property
+    def country_names(self) -> tuple[str, ...]:
+        """Canonical country names in table order."""
+        return self._names
+
+    @property
+    def default_corridor(self) -> Optional[Corridor]:
+        """The corridor new and reset sessions start on."""
+        return self._default
+
+    @property
+    def method_aliases(self) -> dict[str, tuple[str, ...]]:
+        """Other names per delivery method (do not mutate)."""
+        return self._method_aliases
+
+    def lookup(self, key: str) -> Optional[Corridor]:
+        """Resolve a name, ISO code, currency code or alias to its corridor."""
+        if not key:
+            return None
+        return self._index.get(normalize_key(key))
+
+    @cached_property
+    def _country_matcher(self) -> PhraseMatcher:
+        return PhraseMatcher(
+            (phrase, corridor.country_name)
+            for corridor in self._corridors
+            for phrase in (corridor.country_name, *corridor.aliases)
+        )
+
+    def resolve_country(self, text: str) -> MatchResult:
+        """Exact `lookup` first, then a folded/fuzzy match on country names and aliases."""
+        corridor = self.lookup(text)
+        if corridor is not None:
+            return MatchResult(corridor.country_name, (corridor.country_name,), 0)
+        return self._country_matcher.match(text or "")
+
+    def match_method(self, country: str, text: str) -> MatchResult:
+        """Match a delivery method among those the country's corridor offers."""
+        corridor = self.lookup(country)
+        if corridor is None:
+            return MatchResult()
+        matcher = self._method_matchers.get(corridor.country_name)
+        if matcher is None:
+            matcher = PhraseMatcher(
+                (phrase, method)
+                for method in corridor.delivery_methods
+                for phrase in (method, *self._method_aliases.get(method, ()))
+            )
+            self._method_matchers[corridor.country_name] = matcher
+        return matcher.match(text or "")
+
+
+def read_corridor_config(path: str) -> dict:
+    """
+    Parse a corridor file: JSON, or YAML for a .yaml/.yml path.
+
+    Shape: {"corridors": [{"country_name", "currency_code", "exchange_rate",
+    "delivery_methods", "iso_alpha2"?, "iso_alpha3"?, "aliases"?}, ...],
+    "method_aliases"?: {method: [alias, ...]}, "default_country"?: name}.
+    """
+    with open(path, encoding="utf-8") as file:
+        if os.path.splitext(path)[1].lower() in (".yaml", ".yml"):
+            import yaml
+
+            config = yaml.safe_load(file)
+        else:
+            config = json.load(file)
+    if not isinstance(config, dict) or not config.get('corridors'):
+        raise ValueError(f"{path}: no corridors")
+    return config
+
+
+def registry_from_config(config: dict) -> CorridorRegistry:
+    """Build a registry from a parsed corridor file."""
+    return CorridorRegistry(
+        (Corridor.from_dict(c) for c in config['corridors']),
+        method_aliases=config.get('method_aliases'),
+        default_country=config.get('default_country'),
+    )
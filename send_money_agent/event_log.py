@@ -0,0 +1,213 @@
+"""
+Non-blocking structured event log.
+
+Callbacks append a dict to an in-memory buffer and return; a background
+thread serializes records as JSON lines and writes them out, so a slow stdout/stderr or disk never
+stalls the event loop. Under pressure the log degrades instead of blocking:
+
+- above `sample_watermark` of the buffer capacity, routine records are sampled
+  (1 in `sample_every`), while important ones (stage transitions, validation
+  errors) are always kept;
+- with the buffer full, records are dropped and counted.
+
+The log is closed at interpreter exit, so records still buffered then are
+written out rather than lost with the daemon writer thread.
+
+Configuration (environment):
+    SEND_MONEY_EVENT_LOG   Path of the JSON-lines log, "-" for stderr (default)
+                           or "off" to disable
+"""
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Optional
+
+from .helpers import get_missing_fields
+
+DEFAULT_QUEUE_SIZE = 10_000
+WRITE_CHUNK = 256
+
+
+class EventLog:
+    """
+    Queue-backed JSON-lines writer.
+
+    Args:
+        path: File to append to; None writes to `stream`.
+        stream: Text stream used when no path is given (default: stderr).
+        max_queue: Records buffered before new ones are dropped.
+        sample_watermark: Queue fill ratio above which routine records are sampled.
+        sample_every: Keep one routine record in this many while sampling.
+        flush_interval: Most seconds a record waits before the writer picks it up.
+        enabled: False turns emit() into a no-op.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        stream=None,
+        max_queue: int = DEFAULT_QUEUE_SIZE,
+        sample_watermark: float = 0.5,
+        sample_every: int = 10,
+        flush_interval: float = 0.05,
+        enabled: bool = True
+    ):
+        self.enabled = enabled
+        self.max_queue = max_queue
+        self.sample_threshold = int(max_queue * sample_watermark)
+        self.sample_every = sample_every
+        self.flush_interval = flush_interval
+        self.emitted = 0
+        self.written = 0
+        self.sampled_out = 0
+        self.dropped = 0
+        self._routine_seen = 0
+        # deque.append/popleft are atomic: the hot path takes no lock
+        self._buffer: deque = deque()
+        # written/dropped are updated from both the callers and the writer thread
+        self._counter_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closing = False
+        self._owns_stream = path is not None
+        self._stream = open(path, "a", encoding="utf-8") if path else (stream or sys.stderr)
+        self._writer: Optional[threading.Thread] = None
+        if enabled:
+            self._writer = threading.Thread(target=self._run, name="event-log-writer", daemon=True)
+            self._writer.start()
+            atexit.register(self.close)
+
+    def emit(self, event: str, important: bool = False, **fields: Any) -> bool:
+        """Enqueue a record; returns False if it was sampled out or dropped."""
+        if not self.enabled:
+            return False
+        self.emitted += 1
+        queued = len(self._buffer)
+        if queued >= self.max_queue:
+            with self._counter_lock:
+                self.dropped += 1
+            return False
+        if not important and queued >= self.sample_threshold:
+            self._routine_seen += 1
+            if self._routine_seen % self.sample_every:
+                self.sampled_out += 1
+                return False
+        fields["ts"] = time.time()
+        fields["event"] = event
+        self._buffer.append(fields)
+        if queued == WRITE_CHUNK:
+            self._wakeup.set()
+        return True
+
+    def _write_pending(self) -> None:
+        # Small chunks: every write releases the GIL back to the callers
+        while self._buffer:
+            lines = []
+            while self._buffer and len(lines) < WRITE_CHUNK:
+                lines.append(json.dumps(self._buffer.popleft(), default=str))
+            try:
+                self._stream.write("\n".join(lines) + "\n")
+                self._stream.flush()
+                written, dropped = len(lines), 0
+            except (OSError, ValueError):
+                written, dropped = 0, len(lines)
+            with self._counter_lock:
+                self.written += written
+                self.dropped += dropped
+
+    def _run(self) -> None:
+        while not self._closing:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self._write_pending()
+        self._write_pending()
+
+    def stats(self) -> dict:
+        return {
+            "emitted": self.emitted,
+            "written": self.written,
+            "sampled_out": self.sampled_out,
+            "dropped": self.dropped,
+            "queued": len(self._buffer),
+        }
+
+    def close(self) -> None:
+        """Write everything queued so far and stop the writer."""
+        if self._writer is None:
+            return
+        atexit.unregister(self.close)
+        self._closing = True
+        self._wakeup.set()
+        self._writer.join()
+        self._writer = None
+        if self._owns_stream:
+            self._stream.close()
+
+
+def record_tool_call(
+    tool_name: str,
+    tool_context,
+    stage_before: str,
+    tool_response: Any = None,
+    source: str = "model"
+) -> None:
+    """Log one tool invocation with the session, stage transition and missing fields."""
+    state = tool_context.state
+    stage_after = state.get('stage', 'initial')
+    validation_error = bool(state.get('validation_errors'))
+    session = getattr(tool_context, 'session', None)
+    get_event_log().emit(
+        "tool_call",
+        important=stage_after != stage_before or validation_error,
+        session_id=session.id if session is not None else None,
+        invocation_id=getattr(tool_context, 'invocation_id', None),
+        tool=tool_name,
+        source=source,
+        success=tool_response.get('success') if isinstance(tool_response, dict) else None,
+        stage=stage_before,
+        stage_to=stage_after if stage_after != stage_before else None,
+        missing_fields=get_missing_fields(state),
+        validation_error=validation_error,
+    )
+
+
+def record_screening_hold(tool_context, beneficiary: str, matches: list) -> None:
+    """Log a beneficiary held by watchlist screening, with the entries it resembled."""
+    session = getattr(tool_context, 'session', None)
+    get_event_log().emit(
+        "screening_hold",
+        important=True,
+        session_id=session.id if session is not None else None,
+        invocation_id=getattr(tool_context, 'invocation_id', None),
+        beneficiary=beneficiary,
+        matches=[{"entry": match.entry, "name": match.name, "score": match.score} for match in matches],
+    )
+
+
+_event_log: Optional[EventLog] = None
+_event_log_lock = threading.Lock()
+
+
+def get_event_log() -> EventLog:
+    """Process-wide event log, configured from the environment on first use."""
+    global _event_log
+    if _event_log is None:
+        with _event_log_lock:
+            if _event_log is None:
+                target = os.getenv("SEND_MONEY_EVENT_LOG", "-")
+                if target == "off":
+                    _event_log = EventLog(enabled=False)
+                else:
+                    _event_log = EventLog(path=None if target == "-" else target)
+    return _event_log
+
+
+def set_event_log(event_log: Optional[EventLog]) -> None:
+    """Replace the process-wide event log (closing the previous one)."""
+    global _event_log
+    if _event_log is not None and _event_log is not event_log:
+        _event_log.close()
+    _event_log = event_log
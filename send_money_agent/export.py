@@ -0,0 +1,392 @@
+"""
+Streaming export of confirmed transfers to rotating JSONL or Parquet files.
+
+`confirm_transfer` hands every ledger entry to `TransferExporter.submit`,
+which appends it to an in-memory buffer and returns. A background thread
+flushes the buffer whenever `batch_size` records are waiting or
+`flush_interval` seconds have passed, appending the batch to the current
+export file. The file is sealed (closed, fsync'ed and renamed from
+`.inprogress` to `transfers-<first seq>-<last seq>.<format>`) after
+`rotate_records` records or `rotate_interval` seconds; downstream jobs read
+sealed files only.
+
+Delivery is at least once, with the ledger as the source of truth:
+
+- The checkpoint (`export.checkpoint`) holds the last ledger sequence
+  number and byte offset covered by a sealed file. It advances only after
+  the file is sealed.
+- On start, leftover `.inprogress` files are deleted and everything in the
+  ledger after the checkpoint is exported again. A crash between sealing a
+  file and saving the checkpoint exports those records twice; consumers
+  dedupe on `seq` / `transaction_id`.
+- Backpressure: the buffer holds at most `max_buffer` records. When it is
+  full, `submit` drops the record instead of blocking the confirmation, and
+  the exporter reads it back from the ledger file. It does the same for any
+  gap in sequence numbers, e.g. transfers confirmed by other server workers.
+- One exporter per export directory: the exporter holds `export.lock` while
+  running, and a second exporter (another worker) that opens it does not export.
+
+Configuration (environment):
+    SEND_MONEY_EXPORT_DIR              Export directory (unset: no export)
+    SEND_MONEY_EXPORT_FORMAT           jsonl or parquet (default: jsonl)
+    SEND_MONEY_EXPORT_BATCH            Records per flush (default: 1000)
+    SEND_MONEY_EXPORT_INTERVAL         Seconds between flushes (default: 1)
+    SEND_MONEY_EXPORT_ROTATE_RECORDS   Records per sealed file (default: 100000)
+    SEND_MONEY_EXPORT_ROTATE_SECONDS   Seconds before a file is sealed (default: 60)
+    SEND_MONEY_EXPORT_BUFFER           Records buffered in memory (default: 10000)
+"""
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from .ledger import LedgerEntry, get_ledger
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory lock, one exporter is on the caller
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("jsonl", "parquet")
+CHECKPOINT_FILE = "export.checkpoint"
+LOCK_FILE = "export.lock"
+IN_PROGRESS = ".inprogress"
+# Most ledger bytes read back per flush when filling a gap
+LEDGER_READ_CHUNK = 4 << 20
+
+
+def export_row(entry: LedgerEntry) -> dict:
+    """A ledger entry as one flat export record."""
+    return {
+        "seq": entry.seq,
+        "transaction_id": entry.transaction_id,
+        "idempotency_key": entry.idempotency_key,
+        "recorded_at": entry.recorded_at,
+        **entry.transfer,
+    }
+
+
+class _JsonlFile:
+    def __init__(self, path: str):
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write(self, rows: list[dict]) -> None:
+        self._file.write("".join(json.dumps(row, separators=(",", ":"), default=str) + "\n" for row in rows))
+        self._file.flush()
+
+    def close(self) -> None:
+        os.fsync(self._file.fileno())
+        self._file.close()
+
+
+class _ParquetFile:
+    """One row group per flushed batch; the schema comes from the first batch."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._writer = None
+        self._schema = None
+
+    def write(self, rows: list[dict]) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self._writer is None:
+            table = pa.Table.from_pylist(rows)
+            self._schema = table.schema
+            self._writer = pq.ParquetWriter(self.path, self._schema)
+        else:
+            table = pa.Table.from_pylist(rows, schema=self._schema)
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        with open(self.path, "rb") as file:
+            os.fsync(file.fileno())
+
+
+class TransferExporter:
+    """
+    Buffered, batched export of ledger entries with a ledger-backed checkpoint.
+
+    Args:
+        directory: Where export files, the checkpoint and the lock live.
+        ledger_path: The ledger the entries come from (read back on gaps).
+        format: "jsonl" or "parquet" (pyarrow).
+        batch_size: Records that trigger a flush.
+        flush_interval: Most seconds a record waits in memory.
+        rotate_records: Records per sealed file.
+        rotate_interval: Most seconds before an open file is sealed.
+        max_buffer: Records buffered before `submit` leaves them to the ledger.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        ledger_path: str,
+        format: str = "jsonl",
+        batch_size: int = 1000,
+        flush_interval: float = 1.0,
+        rotate_records: int = 100_000,
+        rotate_interval: float = 60.0,
+        max_buffer: int = 10_000
+    ):
+        if format not in FORMATS:
+            raise ValueError(f"format must be one of {FORMATS}")
+        self.directory = directory
+        self.ledger_path = ledger_path
+        self.format = format
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.rotate_records = rotate_records
+        self.rotate_interval = rotate_interval
+        self.max_buffer = max_buffer
+        self.submitted = 0
+        self.overflowed = 0
+        self.exported = 0
+        self.from_ledger = 0
+        self.flushes = 0
+        self.sealed_files = 0
+        self.errors = 0
+        # deque.append is atomic: submit takes no lock
+        self._buffer: deque[LedgerEntry] = deque()
+        self._wakeup = threading.Event()
+        self._closing = False
+        self._file = None
+        self._file_path = ""
+        self._file_first_seq = 0
+        self._file_records = 0
+        self._file_opened_at = 0.0
+
+        os.makedirs(directory, exist_ok=True)
+        self._lock_file = open(os.path.join(directory, LOCK_FILE), "a")
+        self.active = self._try_lock()
+        self._writer: Optional[threading.Thread] = None
+        if not self.active:
+            logger.warning("Export directory %s is in use by another exporter; not exporting here", directory)
+            return
+        # Sealed position (checkpoint) and the position written so far
+        self._sealed_seq, self._sealed_offset = self._load_checkpoint()
+        self._next_seq, self._offset = self._sealed_seq + 1, self._sealed_offset
+        for path in glob.glob(os.path.join(directory, f"*{IN_PROGRESS}")):
+            # Not covered by the checkpoint: exported again from the ledger
+            os.remove(path)
+        self._writer = threading.Thread(target=self._run, name="transfer-exporter", daemon=True)
+        self._writer.start()
+
+    def _try_lock(self) -> bool:
+        if fcntl is None:
+            return True
+        try:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    # Checkpoint
+
+    def _load_checkpoint(self) -> tuple[int, int]:
+        try:
+            with open(os.path.join(self.directory, CHECKPOINT_FILE), encoding="utf-8") as file:
+                checkpoint = json.load(file)
+            return checkpoint["seq"], checkpoint["offset"]
+        except FileNotFoundError:
+            return 0, 0
+
+    def _save_checkpoint(self) -> None:
+        path = os.path.join(self.directory, CHECKPOINT_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump({"seq": self._sealed_seq, "offset": self._sealed_offset}, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(path + ".tmp", path)
+
+    # Producer side
+
+    def submit(self, entry: LedgerEntry) -> bool:
+        """Queue a confirmed transfer; False if it is left for the exporter to read from the ledger."""
+        if not self.active or self._closing:
+            return False
+        self.submitted += 1
+        if len(self._buffer) >= self.max_buffer:
+            self.overflowed += 1
+            return False
+        self._buffer.append(entry)
+        if len(self._buffer) == self.batch_size:
+            self._wakeup.set()
+        return True
+
+    # Writer side
+
+    def _take_batch(self) -> list[LedgerEntry]:
+        """The next run of entries in sequence order, from memory or else from the ledger."""
+        pending = {}
+        while self._buffer:
+            entry = self._buffer.popleft()
+            if entry.seq >= self._next_seq:
+                pending[entry.seq] = entry
+        batch, offset = [], self._offset
+        while self._next_seq + len(batch) in pending:
+            entry = pending.pop(self._next_seq + len(batch))
+            batch.append(entry)
+            offset += len(entry.to_line())
+        if not batch and (pending or os.path.getsize(self.ledger_path) > offset):
+            # A gap (overflow, another worker, a restart): the ledger has it
+            batch, offset = self._read_ledger()
+            self.from_ledger += len(batch)
+        if batch:
+            self._next_seq, self._offset = batch[-1].seq + 1, offset
+        # Entries past the gap wait for the next flush
+        self._buffer.extendleft(entry for seq, entry in sorted(pending.items(), reverse=True) if seq >= self._next_seq)
+        return batch
+
+    def _read_ledger(self) -> tuple[list[LedgerEntry], int]:
+        with open(self.ledger_path, "rb") as ledger:
+            ledger.seek(self._offset)
+            data = ledger.read(LEDGER_READ_CHUNK)
+        entries, end = [], 0
+        while True:
+            newline = data.find(b"\n", end)
+            if newline == -1:
+                # A line still being written is read on a later flush
+                break
+            entry = LedgerEntry(**json.loads(data[end:newline]))
+            end = newline + 1
+            if entry.seq >= self._next_seq:
+                entries.append(entry)
+        return entries, self._offset + end
+
+    def _write(self, batch: list[LedgerEntry]) -> None:
+        if self._file is None:
+            self._file_first_seq = batch[0].seq
+            self._file_path = os.path.join(
+                self.directory, f"transfers-{self._file_first_seq:010d}.{self.format}{IN_PROGRESS}"
+            )
+            self._file = (_JsonlFile if self.format == "jsonl" else _ParquetFile)(self._file_path)
+            self._file_records = 0
+            self._file_opened_at = time.monotonic()
+        self._file.write([export_row(entry) for entry in batch])
+        self._file_records += len(batch)
+        self.exported += len(batch)
+
+    def _seal(self) -> None:
+        """Close, rename and checkpoint the open file."""
+        if self._file is None:
+            return
+        self._file.close()
+        last_seq = self._next_seq - 1
+        sealed = os.path.join(
+            self.directory, f"transfers-{self._file_first_seq:010d}-{last_seq:010d}.{self.format}"
+        )
+        os.replace(self._file_path, sealed)
+        self._file = None
+        self._sealed_seq, self._sealed_offset = last_seq, self._offset
+        self._save_checkpoint()
+        self.sealed_files += 1
+
+    def flush(self, seal: bool = False) -> None:
+        """Write out what is buffered (writer thread, or after it stopped)."""
+        batch = self._take_batch()
+        while batch:
+            self._write(batch)
+            self.flushes += 1
+            if self._file_records >= self.rotate_records:
+                self._seal()
+            # Keep going while a backlog remains (or until drained when sealing)
+            batch = self._take_batch() if seal or len(batch) >= self.batch_size else []
+        if self._file is not None and (seal or time.monotonic() - self._file_opened_at >= self.rotate_interval):
+            self._seal()
+
+    def _run(self) -> None:
+        while not self._closing:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                # Nothing is lost: the next flush starts again from the ledger position
+                self.errors += 1
+                logger.exception("Transfer export failed")
+                self._abandon_file()
+                time.sleep(self.flush_interval)
+
+    def _abandon_file(self) -> None:
+        """Drop the open file and rewind to the checkpoint."""
+        if self._file is not None:
+            try:
+                self._file.close()
+            except Exception:
+                pass
+            self._file = None
+        if os.path.exists(self._file_path):
+            os.remove(self._file_path)
+        self._buffer.clear()
+        self._next_seq, self._offset = self._sealed_seq + 1, self._sealed_offset
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "submitted": self.submitted,
+            "buffered": len(self._buffer),
+            "overflowed": self.overflowed,
+            "exported": self.exported,
+            "from_ledger": self.from_ledger,
+            "flushes": self.flushes,
+            "sealed_files": self.sealed_files,
+            "sealed_seq": self._sealed_seq if self.active else 0,
+            "errors": self.errors,
+        }
+
+    def close(self) -> None:
+        """Export everything submitted so far, seal the open file and stop."""
+        if self._writer is not None:
+            self._closing = True
+            self._wakeup.set()
+            self._writer.join()
+            self._writer = None
+            self.flush(seal=True)
+        self._lock_file.close()
+
+
+_exporter: Optional[TransferExporter] = None
+_exporter_configured = False
+_exporter_lock = threading.Lock()
+
+
+def get_exporter() -> Optional[TransferExporter]:
+    """Process-wide exporter (None when export is off), configured from the environment on first use."""
+    global _exporter, _exporter_configured
+    if not _exporter_configured:
+        with _exporter_lock:
+            if not _exporter_configured:
+                directory = os.getenv("SEND_MONEY_EXPORT_DIR")
+                if directory:
+                    _exporter = TransferExporter(
+                        directory,
+                        ledger_path=get_ledger().path,
+                        format=os.getenv("SEND_MONEY_EXPORT_FORMAT", "jsonl"),
+                        batch_size=int(os.getenv("SEND_MONEY_EXPORT_BATCH", 1000)),
+                        flush_interval=float(os.getenv("SEND_MONEY_EXPORT_INTERVAL", 1.0)),
+                        rotate_records=int(os.getenv("SEND_MONEY_EXPORT_ROTATE_RECORDS", 100_000)),
+                        rotate_interval=float(os.getenv("SEND_MONEY_EXPORT_ROTATE_SECONDS", 60)),
+                        max_buffer=int(os.getenv("SEND_MONEY_EXPORT_BUFFER", 10_000)),
+                    )
+                _exporter_configured = True
+    return _exporter
+
+
+def set_exporter(exporter: Optional[TransferExporter]) -> None:
+    """Replace the process-wide exporter (closing the previous one; None turns export off)."""
+    global _exporter, _exporter_configured
+    with _exporter_lock:
+        if _exporter is not None and _exporter is not exporter:
+            _exporter.close()
+        _exporter = exporter
+        _exporter_configured = True
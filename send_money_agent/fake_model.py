@@ -0,0 +1,252 @@
+"""
+Offline stand-in for the Gemini model.
+
+`FakeModel` answers from what a real model would see: the rendered transfer
+state in the system instruction and the conversation contents. It emits the
+same function calls the prompt asks for (update_transfer, or set_destination,
+set_amount, calculate_usd_from_target and set_transfer_details; then
+confirm_transfer and cancel_transfer_session) and phrases short replies once
+tool results are in.
+
+Useful for load tests and local runs without an API key:
+    root_agent.clone(update={"model": FakeModel(latency=0.3)})
+
+`fault_rate` makes it fail like an overloaded Gemini endpoint (429/503
+errors), to exercise the model scheduler (scheduler.py).
+"""
+import asyncio
+import random
+import re
+from typing import AsyncGenerator, Literal, Optional
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.genai import errors, types
+
+from .fast_path import extract_intent
+from .helpers import get_missing_fields
+
+STATE_LINE_RE = re.compile(r"^- (?P<label>[A-Za-z ]+): (?P<value>.*)$", re.MULTILINE)
+STATE_LABELS = {
+    "Country": "destination_country",
+    "Currency": "destination_currency_code",
+    "Send Amount": "send_amount",
+    "Receive Amount": "receive_amount",
+    "Beneficiary": "beneficiary",
+    "Delivery Method": "delivery_method",
+    "Available Methods": "available_methods",
+    "Stage": "stage",
+    "Transaction ID": "transaction_id",
+    "Validation Errors": "validation_errors",
+}
+YES_WORDS = {"yes", "yeah", "yep", "confirm", "send it", "go ahead", "correct"}
+NO_WORDS = {"no", "change", "edit", "wait"}
+CANCEL_WORDS = {"cancel", "stop", "forget it", "never mind"}
+LOOSE_BENEFICIARY_RE = re.compile(r"\bto (me|myself)\b", re.IGNORECASE)
+QUESTIONS = {
+    "destination_country": "Which country would you like to send money to?",
+    "send_amount": "How much would you like to send?",
+    "beneficiary": "Who should receive the money? I'll need their full name.",
+    "delivery_method": "Which delivery method would you prefer: {methods}?",
+}
+STREAM_CHUNK_WORDS = 4
+
+
+def parse_state(system_instruction: str) -> dict:
+    """Read the CURRENT TRANSFER STATE block back into state keys."""
+    state = {}
+    for match in STATE_LINE_RE.finditer(system_instruction or ""):
+        key = STATE_LABELS.get(match.group('label'))
+        if key and key not in state:
+            state[key] = match.group('value').strip()
+    amount = state.get('send_amount', "").removesuffix("USD").strip()
+    try:
+        state['send_amount'] = float(amount) if amount else ""
+    except ValueError:
+        state['send_amount'] = ""
+    methods = state.get('available_methods', "").strip("[]")
+    state['available_methods'] = [m.strip(" '\"") for m in methods.split(",") if m.strip()]
+    return state
+
+
+def _has_any(text: str, phrases: set[str]) -> bool:
+    folded = f" {re.sub(r'[^a-z ]', ' ', text.lower())} "
+    return any(f" {phrase} " in folded for phrase in phrases)
+
+
+class FakeModel(BaseLlm):
+    """
+    Rule-based model for offline runs.
+
+    Args:
+        latency: Seconds before the first chunk of every response.
+        jitter: Up to this many extra seconds, drawn uniformly per call.
+        chunk_delay: Seconds between streamed chunks (stream=True only).
+        tool_style: How several facts in one message are applied:
+            "composite" - one update_transfer call (what the prompt asks for);
+            "parallel" - the single-field tools, all in one response;
+            "sequential" - the single-field tools, one per model call.
+        fault_rate: Share of calls that fail with `fault_code` instead of answering.
+        fault_code: HTTP status of injected failures (429 or 503, like Gemini overload).
+        fault_latency: Seconds before an injected failure is raised.
+    """
+    model: str = "fake-send-money"
+    latency: float = 0.0
+    jitter: float = 0.0
+    chunk_delay: float = 0.0
+    tool_style: Literal["composite", "parallel", "sequential"] = "composite"
+    fault_rate: float = 0.0
+    fault_code: int = 503
+    fault_latency: float = 0.0
+    calls: int = 0
+    faults: int = 0
+
+    def respond(self, llm_request: LlmRequest) -> types.Content:
+        """The model turn for a request: function calls or a text reply."""
+        system_instruction = llm_request.config.system_instruction if llm_request.config else ""
+        state = parse_state(system_instruction if isinstance(system_instruction, str) else "")
+        last = llm_request.contents[-1] if llm_request.contents else None
+
+        if last is not None and last.role == 'user' and not any(p.function_response for p in last.parts or []):
+            text = " ".join(part.text for part in last.parts if part.text)
+            calls = self._calls_for(text, state)
+            if calls:
+                return self._call_content(calls[:1] if self.tool_style == "sequential" else calls)
+        elif self.tool_style == "sequential" and last is not None:
+            # Next single-field call for the user's message, if the last one succeeded
+            text, made = self._since_user_message(llm_request.contents)
+            if text is not None and all(
+                (p.function_response.response or {}).get('success') is not False
+                for p in last.parts or [] if p.function_response
+            ):
+                remaining = [call for call in self._calls_for(text, state) if call[0] not in made]
+                if remaining:
+                    return self._call_content(remaining[:1])
+        responses = [p.function_response.response or {} for p in (last.parts if last else []) if p.function_response]
+        return types.Content(role='model', parts=[types.Part(text=self._reply(state, responses))])
+
+    @staticmethod
+    def _call_content(calls: list[tuple[str, dict]]) -> types.Content:
+        return types.Content(role='model', parts=[
+            types.Part.from_function_call(name=name, args=args) for name, args in calls
+        ])
+
+    @staticmethod
+    def _since_user_message(contents: list[types.Content]) -> tuple[Optional[str], set[str]]:
+        """Text of the latest user message and the tools called since."""
+        made = set()
+        for content in reversed(contents):
+            for part in content.parts or []:
+                if part.function_call:
+                    made.add(part.function_call.name)
+            if content.role == 'user' and any(part.text for part in content.parts or []):
+                return " ".join(part.text for part in content.parts if part.text), made
+        return None, made
+
+    def _calls_for(self, text: str, state: dict) -> list[tuple[str, dict]]:
+        if _has_any(text, CANCEL_WORDS):
+            return [("cancel_transfer_session", {})]
+        if state.get('stage') == 'confirming':
+            if _has_any(text, YES_WORDS):
+                return [("confirm_transfer", {"confirmed": True})]
+            if _has_any(text, NO_WORDS):
+                return [("confirm_transfer", {"confirmed": False})]
+
+        # A model reads "to Luis Herrera" as a name from the conversation so far
+        intent = extract_intent(text, state, strict_names=False)
+        if intent is None:
+            return []
+        beneficiary = intent.beneficiary
+        if not beneficiary and (match := LOOSE_BENEFICIARY_RE.search(text)):
+            beneficiary = match.group(1).lower()
+        calls = []
+        if intent.country and intent.country != state.get('destination_country'):
+            calls.append(("set_destination", {"country": intent.country}))
+        if intent.amount is not None:
+            calls.append(("set_amount", {"amount": intent.amount}))
+        elif intent.target_amount is not None:
+            calls.append(("calculate_usd_from_target", {"target_amount": intent.target_amount}))
+        details = {
+            key: value for key, value in (
+                ('beneficiary', beneficiary), ('delivery_method', intent.delivery_method)
+            ) if value
+        }
+        if details:
+            calls.append(("set_transfer_details", details))
+        if self.tool_style == "composite" and len(calls) > 1:
+            # The single-field tools' arguments are update_transfer's parameters
+            return [("update_transfer", {key: value for _, args in calls for key, value in args.items()})]
+        return calls
+
+    @staticmethod
+    def _reply(state: dict, responses: list[dict]) -> str:
+        failed = next((r for r in responses if r.get('success') is False), None)
+        if failed:
+            return failed.get('message') or "Something went wrong, could you try again?"
+        transaction_id = next((r['transaction_id'] for r in responses if r.get('transaction_id')), None)
+        if transaction_id or state.get('stage') == 'completed':
+            return f"All set! Your transaction ID is {transaction_id or state.get('transaction_id')}."
+        if state.get('validation_errors'):
+            return state['validation_errors']
+        missing = get_missing_fields(state)
+        if missing:
+            return QUESTIONS[missing[0]].format(methods=" or ".join(state.get('available_methods', [])))
+        return (
+            "Here's your summary:\n"
+            f"• Country: {state.get('destination_country')}\n"
+            f"• Amount: {state.get('send_amount')} USD\n"
+            f"• Recipient: {state.get('beneficiary')}\n"
+            f"• Delivery Method: {state.get('delivery_method')}\n"
+            f"• Receive Amount: {state.get('receive_amount')}\n"
+            "Ready to send?"
+        )
+
+    @staticmethod
+    def _usage(llm_request: LlmRequest, content: types.Content) -> types.GenerateContentResponseUsageMetadata:
+        prompt = str(llm_request.config.system_instruction or "") if llm_request.config else ""
+        prompt += " ".join(
+            part.text or str(part.function_response or part.function_call or "")
+            for item in llm_request.contents for part in item.parts or []
+        )
+        output = " ".join(part.text or str(part.function_call) for part in content.parts)
+        # ~4 characters per token; cheap enough not to skew load tests
+        prompt_tokens, output_tokens = len(prompt) // 4 + 1, len(output) // 4 + 1
+        return types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=output_tokens,
+            total_token_count=prompt_tokens + output_tokens,
+        )
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        self.calls += 1
+        if self.fault_rate and random.random() < self.fault_rate:
+            self.faults += 1
+            if self.fault_latency:
+                await asyncio.sleep(self.fault_latency)
+            error = errors.ClientError if self.fault_code < 500 else errors.ServerError
+            status = "RESOURCE_EXHAUSTED" if self.fault_code == 429 else "UNAVAILABLE"
+            raise error(self.fault_code, {"error": {
+                "code": self.fault_code, "message": "The model is overloaded. Please try again later.",
+                "status": status,
+            }})
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        content = self.respond(llm_request)
+        usage = self._usage(llm_request, content)
+
+        text = content.parts[0].text if len(content.parts) == 1 else None
+        if stream and text:
+            words = text.split(" ")
+            for start in range(0, len(words), STREAM_CHUNK_WORDS):
+                chunk = " ".join(words[start:start + STREAM_CHUNK_WORDS])
+                if start + STREAM_CHUNK_WORDS < len(words):
+                    chunk += " "
+                yield LlmResponse(
+                    content=types.Content(role='model', parts=[types.Part(text=chunk)]), partial=True
+                )
+                if self.chunk_delay:
+                    await asyncio.sleep(self.chunk_delay)
+        yield LlmResponse(content=content, usage_metadata=usage)
+
@@ -0,0 +1,368 @@
+"""
+Deterministic fast path for the most common turns.
+
+A rule-based pre-parser that runs as a `before_model_callback`. When the
+latest user message carries slots it can read with high confidence (amounts,
+currency hints, countries, delivery methods, multi-word names), they are
+applied directly through the regular `update_transfer` tool. The result is
+handed to the model as an already-executed function call, so the model only
+has to phrase the reply (and deal with whatever the parser left unexplained)
+instead of spending a round trip on the tool calls.
+"""
+import os
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.utils import instructions_utils
+from google.genai import types
+
+from .corridors import CorridorRegistry, normalize_key
+from .event_log import record_tool_call
+from .helpers import advance_stage
+from .mock_data import get_corridor_registry
+from .tools import update_transfer
+from .tracing import traced_callback
+
+FAST_PATH_ENABLED = os.getenv("SEND_MONEY_FAST_PATH", "1") != "0"
+
+# Stages in which slot-filling utterances are expected
+FAST_PATH_STAGES = {"initial", "collecting", "confirming"}
+
+# Any of these means the user is asking, refusing or deciding: leave it to the model
+BLOCKING_WORDS = {
+    "no", "not", "don't", "dont", "never", "cancel", "stop", "forget", "wait",
+    "maybe", "or", "how", "what", "why", "which", "when", "rate", "rates",
+    "fee", "fees", "yes", "yeah", "yep", "confirm", "refund", "status",
+}
+
+# Words that carry no slot information and may be dropped without losing meaning
+FILLER_WORDS = {
+    "i", "i'd", "i'm", "id", "im", "want", "wanna", "would", "like", "to", "send",
+    "sending", "transfer", "money", "please", "via", "using", "use", "with",
+    "by", "through", "in", "the", "a", "an", "for", "is", "it", "be", "make",
+    "amount", "of", "and", "my", "actually", "ok", "okay", "so", "just",
+    "should", "receive", "receives", "get", "gets", "they", "she", "he",
+    "country", "method", "delivery", "recipient", "beneficiary", "name",
+    "named", "called", "go", "over", "there", "sure", "hi", "hello", "hey",
+    "instead", "change", "that", "can", "let's", "lets", "now", "then",
+    "destination", "let", "set", "on",
+}
+
+RECEIVE_WORDS = {"receive", "receives", "get", "gets"}
+USD_WORDS = {"usd", "dollar", "dollars", "bucks", "us$"}
+CURRENCY_NAMES = {"real": "BRL", "reais": "BRL"}
+PESO_WORDS = {"peso", "pesos"}
+PESO_CURRENCIES = {"MXN", "ARS"}
+PREFIX_CURRENCIES = {"$": "USD", "US$": "USD", "R$": "BRL"}
+MAGNITUDE_WORDS = {"k": 1_000, "thousand": 1_000}
+NAME_CONNECTORS = {"da", "de", "do", "dos", "das", "del", "la", "van", "von", "e", "y"}
+NAME_LEADS = {"to", "for"}
+MAX_NAME_WORDS = 5
+
+TOKEN_RE = re.compile(r"(?:US\$|R\$|\$)?\d[\d,]*(?:\.\d+)?|[^\W\d_]+(?:['’][^\W\d_]+)*", re.UNICODE)
+NUMBER_RE = re.compile(r"^(?P<prefix>US\$|R\$|\$)?(?P<number>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)$")
+
+
+@dataclass
+class Intent:
+    """Slots read from a single utterance."""
+    country: Optional[str] = None
+    amount: Optional[float] = None
+    target_amount: Optional[float] = None
+    beneficiary: Optional[str] = None
+    delivery_method: Optional[str] = None
+    remainder: list[str] = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        return not any((
+            self.country, self.amount is not None, self.target_amount is not None,
+            self.beneficiary, self.delivery_method
+        ))
+
+    @property
+    def fully_covered(self) -> bool:
+        """True when every word of the utterance was explained by a slot or filler."""
+        return not self.remainder
+
+
+@lru_cache(maxsize=4)
+def _phrase_tables(registry: CorridorRegistry) -> tuple[dict, dict, int]:
+    """Folded country/alias and delivery-method phrases for a registry."""
+    countries: dict[tuple[str, ...], str] = {}
+    methods: dict[tuple[str, ...], str] = {}
+    for corridor in registry:
+        for phrase in (corridor.country_name, *corridor.aliases):
+            countries[tuple(normalize_key(phrase).split())] = corridor.country_name
+        for method in corridor.delivery_methods:
+            methods[tuple(normalize_key(method).split())] = method
+    longest = max((len(p) for p in (*countries, *methods)), default=1)
+    return countries, methods, longest
+
+
+def _parse_number(token: str) -> Optional[tuple[Optional[str], float]]:
+    match = NUMBER_RE.match(token)
+    if not match:
+        return None
+    return match.group('prefix'), float(match.group('number').replace(",", ""))
+
+
+def _currency_word(word: str, registry: CorridorRegistry) -> Optional[str]:
+    """Currency code named by a word following an amount ("usd", "reais", "MXN")."""
+    if word in USD_WORDS:
+        return "USD"
+    if word in CURRENCY_NAMES:
+        return CURRENCY_NAMES[word]
+    if word in PESO_WORDS:
+        return "PESO"
+    corridor = registry.lookup(word) if len(word) == 3 else None
+    if corridor and normalize_key(corridor.currency_code) == word:
+        return corridor.currency_code
+    return None
+
+
+def _is_name_word(token: str) -> bool:
+    letters = token.replace("'", "").replace("’", "")
+    return token[0].isupper() and letters.isalpha() and not token.isupper()
+
+
+def extract_intent(text: str, state: dict, strict_names: bool = True) -> Optional[Intent]:
+    """
+    Read transfer slots from an utterance.
+
+    Returns None when the utterance is not a confident slot-filling message
+    (questions, refusals, conflicting values); the model handles those. With
+    `strict_names` a name after "to"/"for" is only taken when the utterance
+    names the country too, since it could be a place ("to Costa Rica").
+    """
+    if not text or "?" in text:
+        return None
+    tokens = TOKEN_RE.findall(text)
+    folded = [normalize_key(t) for t in tokens]
+    if not tokens or any(word in BLOCKING_WORDS for word in folded):
+        return None
+
+    registry = get_corridor_registry()
+    country_phrases, method_phrases, longest = _phrase_tables(registry)
+    consumed = [False] * len(tokens)
+    intent = Intent()
+
+    # Amounts, with the currency word that follows them
+    amounts = []
+    for i, token in enumerate(tokens):
+        parsed = _parse_number(token)
+        if parsed is None:
+            continue
+        prefix, number = parsed
+        consumed[i] = True
+        currency = PREFIX_CURRENCIES.get(prefix or "")
+        after = i + 1
+        if after < len(tokens) and folded[after] in MAGNITUDE_WORDS:
+            number = round(number * MAGNITUDE_WORDS[folded[after]], 2)
+            consumed[after] = True
+            after += 1
+        if after < len(tokens) and folded[after] not in FILLER_WORDS:
+            # "100 euros", "100 EUR": a currency we can't price is not dollars
+            suffix = _currency_word(folded[after], registry)
+            if suffix is None:
+                return None
+            if currency and suffix != currency:
+                return None
+            currency = suffix
+            consumed[after] = True
+        amounts.append((number, currency))
+    if len(amounts) > 1:
+        return None
+
+    # Countries and delivery methods, longest phrase first
+    countries, methods = set(), set()
+    for size in range(longest, 0, -1):
+        for start in range(len(tokens) - size + 1):
+            span = range(start, start + size)
+            if any(consumed[i] for i in span):
+                continue
+            phrase = tuple(folded[start:start + size])
+            if phrase in country_phrases:
+                countries.add(country_phrases[phrase])
+            elif phrase in method_phrases:
+                methods.add(method_phrases[phrase])
+            else:
+                continue
+            for i in span:
+                consumed[i] = True
+    if len(countries) > 1 or len(methods) > 1:
+        return None
+    countries_named = bool(countries)
+    if countries:
+        intent.country = countries.pop()
+    if methods:
+        intent.delivery_method = methods.pop()
+
+    # Resolve the amount against the destination it is expressed in
+    if amounts:
+        number, currency = amounts[0]
+        destination = registry.lookup(intent.country or state.get('destination_country') or "")
+        if currency == "PESO":
+            if not destination or destination.currency_code not in PESO_CURRENCIES:
+                return None
+            currency = destination.currency_code
+        if currency is None:
+            currency = destination.currency_code if destination and RECEIVE_WORDS & set(folded) else "USD"
+        if currency == "USD":
+            intent.amount = number
+        else:
+            corridor = registry.lookup(currency)
+            if corridor is None or (intent.country and corridor.country_name != intent.country):
+                return None
+            if corridor.country_name != state.get('destination_country'):
+                intent.country = corridor.country_name
+            intent.target_amount = number
+
+    # Multi-word names: after "to"/"for", or the whole message on its own
+    runs = _name_runs(tokens, folded, consumed)
+    candidates = [
+        (start, end) for start, end in runs
+        if end - start >= 2 and (start == 0 or folded[start - 1] in NAME_LEADS)
+    ]
+    bare_reply = (
+        len(candidates) == 1 and candidates[0] == (0, len(tokens))
+        and not any(folded[i] in FILLER_WORDS for i in range(len(tokens)))
+    )
+    leading = [(s, e) for s, e in candidates if s > 0 or bare_reply]
+    if len(leading) > 1:
+        return None
+    if leading:
+        start, end = leading[0]
+        # "to Costa Rica" reads like "to Maria Lopes": after "to"/"for", a run
+        # is only a name when the utterance names the country elsewhere
+        if (start > 0 and strict_names and not countries_named) or _could_be_place(tokens[start:end], registry):
+            return None
+        intent.beneficiary = " ".join(tokens[start:end])
+        for i in range(start, end):
+            consumed[i] = True
+
+    unexplained = [i for i in range(len(tokens)) if not consumed[i] and folded[i] not in FILLER_WORDS]
+    # A word we can't read right next to a slot may change what the slot means
+    if any(consumed[j] for i in unexplained for j in (i - 1, i + 1) if 0 <= j < len(tokens)):
+        return None
+    intent.remainder = [tokens[i] for i in unexplained]
+    return intent
+
+
+def _could_be_place(words: list[str], registry: CorridorRegistry) -> bool:
+    """True when the words, or any one of them, come close to a country name or alias."""
+    return any(registry.resolve_country(text).suggestions for text in (" ".join(words), *words))
+
+
+def _name_runs(tokens: list[str], folded: list[str], consumed: list[bool]) -> list[tuple[int, int]]:
+    """Runs of capitalized, unconsumed words (connectors such as 'dos' allowed inside)."""
+    runs, start = [], None
+    for i, token in enumerate(tokens + [""]):
+        is_name = bool(token) and not consumed[i] and _is_name_word(token) \
+            and folded[i] not in FILLER_WORDS
+        is_connector = bool(token) and start is not None and folded[i] in NAME_CONNECTORS \
+            and i + 1 < len(tokens) and tokens[i + 1][:1].isupper()
+        if is_name or is_connector:
+            start = i if start is None else start
+            continue
+        if start is not None:
+            if i - start <= MAX_NAME_WORDS:
+                runs.append((start, i))
+            start = None
+    return runs
+
+
+def apply_intent(intent: Intent, tool_context) -> list[tuple[str, dict, dict]]:
+    """
+    Apply the slots with a single `update_transfer` call.
+
+    The tool applies them in dependency order and stops at the first invalid
+    one, leaving its validation error in state. The call is followed by the
+    same stage check and log record as `agent.after_tool_callback`. Returns
+    (tool name, args, response) for the call made, or nothing.
+    """
+    args = {
+        key: value for key, value in (
+            ('amount', intent.amount), ('target_amount', intent.target_amount),
+            ('beneficiary', intent.beneficiary), ('delivery_method', intent.delivery_method)
+        ) if value is not None
+    }
+    if intent.country and intent.country != tool_context.state.get('destination_country'):
+        args = {'country': intent.country, **args}
+    if not args:
+        return []
+    stage_before = tool_context.state.get('stage', 'initial')
+    response = update_transfer(tool_context=tool_context, **args)
+    advance_stage(tool_context.state)
+    record_tool_call(update_transfer.__name__, tool_context, stage_before, response, source="fast_path")
+    return [(update_transfer.__name__, args, response)]
+
+
+def _latest_user_text(llm_request: LlmRequest) -> Optional[str]:
+    """Text of the last content if it is a fresh user message (not a tool result)."""
+    if not llm_request.contents:
+        return None
+    content = llm_request.contents[-1]
+    if content.role != 'user' or not content.parts:
+        return None
+    if any(part.function_response for part in content.parts):
+        return None
+    return " ".join(part.text for part in content.parts if part.text) or None
+
+
+async def _render_instruction(callback_context: CallbackContext) -> str:
+    """Render the agent instruction against the current state, as ADK does."""
+    invocation_context = callback_context._invocation_context
+    readonly_context = ReadonlyContext(invocation_context)
+    instruction, bypass_state_injection = await invocation_context.agent.canonical_instruction(
+        readonly_context
+    )
+    if bypass_state_injection:
+        return instruction
+    return await instructions_utils.inject_session_state(instruction, readonly_context)
+
+
+@traced_callback
+async def fast_path_callback(
+    callback_context: CallbackContext,
+    llm_request: LlmRequest
+) -> Optional[LlmResponse]:
+    """Fill slots deterministically before the model sees the user's message."""
+    if not FAST_PATH_ENABLED:
+        return None
+    if callback_context.state.get('stage', 'initial') not in FAST_PATH_STAGES:
+        return None
+    text = _latest_user_text(llm_request)
+    intent = extract_intent(text, callback_context.state) if text else None
+    if intent is None or intent.is_empty():
+        return None
+
+    instruction_before = await _render_instruction(callback_context)
+    calls = apply_intent(intent, callback_context)
+    if not calls:
+        return None
+    instruction_after = await _render_instruction(callback_context)
+
+    # Keep the rendered transfer state in the system instruction current
+    system_instruction = llm_request.config.system_instruction
+    if isinstance(system_instruction, str) and instruction_before in system_instruction:
+        llm_request.config.system_instruction = system_instruction.replace(
+            instruction_before, instruction_after
+        )
+
+    llm_request.contents.append(types.Content(
+        role='model',
+        parts=[types.Part.from_function_call(name=name, args=args) for name, args, _ in calls]
+    ))
+    llm_request.contents.append(types.Content(
+        role='user',
+        parts=[
+            types.Part.from_function_response(name=name, response=response)
+            for name, _, response in calls
+        ]
+    ))
+    return None
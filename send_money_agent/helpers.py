@@ -1,4 +1,12 @@
-from google.adk.tools import ToolContext
+import hashlib
+import json
+import time
+from typing import TYPE_CHECKING, Optional
+
+from .rates import Quote, get_rate_service
+
+if TYPE_CHECKING:
+    from google.adk.tools import ToolContext
 
 # Constants for validation
 MAX_TRANSFER_AMOUNT = 10000
@@ -28,12 +36,17 @@ def get_initial_state(country_data: dict = None) -> dict:
             "beneficiary": "",
             "delivery_method": "",
             "transaction_id": "",
+            # Rate quote snapshot (see rates.py)
+            "quote_id": "",
+            "quote_expires_at": "",
             # Control state
             "stage": "initial",
             # Validation state
             "validation_errors": "",
             "clarification_needed": "",
-            "clarification_reason": ""
+            "clarification_reason": "",
+            # Watchlist screening (see screening.py)
+            "screening_hold": ""
         }
     else:
         # Empty template for reset
@@ -47,21 +60,83 @@ def get_initial_state(country_data: dict = None) -> dict:
             "beneficiary": "",
             "delivery_method": "",
             "transaction_id": "",
+            "quote_id": "",
+            "quote_expires_at": "",
             "stage": "initial",
             "validation_errors": "",
             "clarification_needed": "",
-            "clarification_reason": ""
+            "clarification_reason": "",
+            "screening_hold": ""
         }
 
 
-def clear_validation_state(tool_context: ToolContext) -> None:
+def clear_validation_state(tool_context: "ToolContext") -> None:
     """Clear validation errors and clarification flags before re-evaluating."""
     tool_context.state['validation_errors'] = ""
     tool_context.state['clarification_needed'] = ""
     tool_context.state['clarification_reason'] = ""
 
 
-def calculate_receive_amount(tool_context: ToolContext) -> None:
+def apply_quote(tool_context: "ToolContext", quote: Quote) -> None:
+    """Snapshot a rate quote into state: rate, quote ID and expiry."""
+    tool_context.state['exchange_rate'] = quote.rate
+    tool_context.state['quote_id'] = quote.quote_id
+    tool_context.state['quote_expires_at'] = quote.expires_at
+
+
+def quote_is_current(state: dict, now: Optional[float] = None) -> bool:
+    """Check if the state holds a quote that has not expired yet."""
+    expires_at = state.get('quote_expires_at')
+    if not state.get('quote_id') or not expires_at:
+        return False
+    return (now if now is not None else time.time()) < expires_at
+
+
+def refresh_quote(tool_context: "ToolContext") -> Optional[Quote]:
+    """Take a fresh quote for the destination currency and snapshot it into state."""
+    currency_code = tool_context.state.get('destination_currency_code')
+    if not currency_code:
+        return None
+    quote = get_rate_service().quote(currency_code)
+    if quote:
+        apply_quote(tool_context, quote)
+    return quote
+
+
+def ensure_current_quote(tool_context: "ToolContext") -> None:
+    """Re-quote when the destination is set but its quote is missing or expired."""
+    if tool_context.state.get('destination_currency_code') and not quote_is_current(tool_context.state):
+        refresh_quote(tool_context)
+
+
+def transfer_record(state: dict) -> dict:
+    """The confirmed transfer as written to the ledger."""
+    return {
+        "destination_country": state.get('destination_country'),
+        "currency_code": state.get('destination_currency_code'),
+        "send_amount": state.get('send_amount'),
+        "receive_amount": state.get('receive_amount'),
+        "exchange_rate": state.get('exchange_rate'),
+        "beneficiary": state.get('beneficiary'),
+        "delivery_method": state.get('delivery_method'),
+        "quote_id": state.get('quote_id'),
+    }
+
+
+def transfer_idempotency_key(tool_context: "ToolContext") -> str:
+    """
+    Key identifying one confirmation of one transfer.
+
+    Session plus a digest of the transfer details and quote: retrying the same
+    confirmation maps to the same key, a changed transfer gets a new one.
+    """
+    session = getattr(tool_context, 'session', None)
+    session_id = session.id if session is not None else getattr(tool_context, 'invocation_id', '')
+    details = json.dumps(transfer_record(tool_context.state), sort_keys=True, default=str)
+    return f"{session_id}:{hashlib.sha256(details.encode('utf-8')).hexdigest()[:16]}"
+
+
+def calculate_receive_amount(tool_context: "ToolContext") -> None:
     """Calculate and update receive_amount based on send_amount and exchange_rate."""
     send_amount = tool_context.state.get('send_amount')
     exchange_rate = tool_context.state.get('exchange_rate')
@@ -100,10 +175,22 @@ def all_fields_complete(state: dict) -> bool:
     """Check if all required fields are collected and no validation errors."""
     required_fields = ['destination_country', 'send_amount', 'beneficiary', 'delivery_method']
     fields_present = all(state.get(field) for field in required_fields)
-    no_errors = not state.get('validation_errors')
+    no_errors = not state.get('validation_errors') and not state.get('screening_hold')
     return fields_present and no_errors
 
 
+def advance_stage(state: dict) -> bool:
+    """
+    Advance from 'collecting' to 'confirming' once every field is collected.
+
+    Returns True when the stage was advanced.
+    """
+    if state.get('stage') == 'collecting' and all_fields_complete(state):
+        state['stage'] = 'confirming'
+        return True
+    return False
+
+
 def get_missing_fields(state: dict) -> list[str]:
     """Get list of required fields that are still missing."""
     required_fields = ['destination_country', 'send_amount', 'beneficiary', 'delivery_method']
@@ -0,0 +1,137 @@
+"""
+Conversation history compaction before each model request.
+
+ADK sends the whole session history with every model call, while the system
+instruction already carries the transfer (amount, beneficiary, method,
+stage, validation errors, ...) from session state. Old turns add input
+tokens on every call, linearly in conversation length, without adding
+anything the model needs.
+
+`compact_history_callback` runs as the last `before_model_callback` and
+trims `llm_request.contents` to:
+
+- the last `max_exchanges` exchanges, an exchange being a user message and
+  everything after it (model replies, function calls and their responses),
+  so a call is never separated from its response and the history always
+  starts with a user message;
+- nothing before the latest `cancel_transfer_session`: the exchange that
+  reset the transfer is kept, what it discarded is dropped.
+
+Configuration (environment):
+    SEND_MONEY_HISTORY_EXCHANGES   Exchanges kept, current one included; 0
+                                   keeps the full history (default: 3)
+"""
+import os
+import threading
+from typing import Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+from .tracing import traced_callback
+
+DEFAULT_MAX_EXCHANGES = 3
+RESET_TOOLS = {"cancel_transfer_session"}
+
+
+def _is_user_message(content: types.Content) -> bool:
+    """A message typed by the user (ADK also sends function responses as 'user')."""
+    parts = content.parts or ()
+    return (
+        content.role == 'user'
+        and any(part.text for part in parts)
+        and not any(part.function_response for part in parts)
+    )
+
+
+def _resets(content: types.Content) -> bool:
+    return any(
+        part.function_response and part.function_response.name in RESET_TOOLS
+        for part in content.parts or ()
+    )
+
+
+def compaction_start(contents: list[types.Content], max_exchanges: int) -> int:
+    """Index of the first content to keep."""
+    starts = [i for i, content in enumerate(contents) if _is_user_message(content)]
+    if not starts:
+        return 0
+    start = starts[-max_exchanges] if len(starts) >= max_exchanges else 0
+    for i in range(len(contents) - 1, start - 1, -1):
+        if _resets(contents[i]):
+            # Keep the exchange that asked for the reset, drop what it discarded
+            start = max((s for s in starts if s <= i), default=start)
+            break
+    return start
+
+
+class HistoryCompactor:
+    """
+    Trims model-request history; counts what it saved.
+
+    Args:
+        max_exchanges: Exchanges kept, the current one included.
+    """
+
+    def __init__(self, max_exchanges: int = DEFAULT_MAX_EXCHANGES):
+        if max_exchanges < 1:
+            raise ValueError("max_exchanges must be at least 1")
+        self.max_exchanges = max_exchanges
+        self.requests = 0
+        self.compacted = 0
+        self.dropped_contents = 0
+
+    def compact(self, contents: list[types.Content]) -> list[types.Content]:
+        """The contents to send; the list itself is not modified."""
+        start = compaction_start(contents, self.max_exchanges)
+        self.requests += 1
+        if start:
+            self.compacted += 1
+            self.dropped_contents += start
+        return contents[start:]
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "compacted": self.compacted,
+            "dropped_contents": self.dropped_contents,
+        }
+
+
+@traced_callback
+def compact_history_callback(
+    callback_context: CallbackContext,
+    llm_request: LlmRequest
+) -> Optional[LlmResponse]:
+    """before_model_callback: drop history the state block makes redundant."""
+    compactor = get_history_compactor()
+    if compactor is not None and llm_request.contents:
+        llm_request.contents = compactor.compact(llm_request.contents)
+    return None
+
+
+_history_compactor: Optional[HistoryCompactor] = None
+_history_compactor_configured = False
+_history_compactor_lock = threading.Lock()
+
+
+def get_history_compactor() -> Optional[HistoryCompactor]:
+    """Process-wide compactor (None keeps full history), configured from the environment on first use."""
+    global _history_compactor, _history_compactor_configured
+    if not _history_compactor_configured:
+        with _history_compactor_lock:
+            if not _history_compactor_configured:
+                max_exchanges = int(os.getenv("SEND_MONEY_HISTORY_EXCHANGES", DEFAULT_MAX_EXCHANGES))
+                if max_exchanges > 0:
+                    _history_compactor = HistoryCompactor(max_exchanges)
+                _history_compactor_configured = True
+    return _history_compactor
+
+
+def set_history_compactor(compactor: Optional[HistoryCompactor]) -> None:
+    """Replace the process-wide compactor (None keeps full history)."""
+    global _history_compactor, _history_compactor_configured
+    with _history_compactor_lock:
+        _history_compactor = compactor
+        _history_compactor_configured = True
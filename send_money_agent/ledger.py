@@ -0,0 +1,289 @@
+"""
+Append-only ledger of confirmed transfers.
+
+Every confirmed transfer is written as one JSON line and fsync'ed before
+`confirm_transfer` returns its transaction ID. IDs come from the ledger's
+sequence number (TXN-0000000001, TXN-0000000002, ...), so they are
+monotonic and cannot collide, and the sequence continues after a restart.
+
+- Idempotency: each record carries an idempotency key; recording the same
+  key again returns the original entry instead of a new transfer.
+- Group commit: a single writer thread flushes everything queued while the
+  previous fsync was in progress in one write + fsync, so concurrent
+  confirmations share the cost of the disk flush.
+- Crash recovery: on open the file is replayed; a torn last line (the
+  process died mid-write) is truncated away. Only entries whose fsync
+  completed were ever acknowledged to a caller.
+- Shared mode: several processes can append to one file, taking the file
+  lock per commit (see `Ledger`).
+
+Configuration (environment):
+    SEND_MONEY_LEDGER_PATH     Ledger file (default: ledger.jsonl)
+    SEND_MONEY_LEDGER_SHARED   1 to share the file between processes
+"""
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory lock, single writer is on the caller
+    fcntl = None
+
+DEFAULT_LEDGER_PATH = "ledger.jsonl"
+TRANSACTION_PREFIX = "TXN-"
+
+
+class LedgerError(RuntimeError):
+    """The ledger could not be opened or written."""
+
+
+@dataclass(frozen=True)
+class LedgerEntry:
+    """One confirmed transfer."""
+    seq: int
+    transaction_id: str
+    idempotency_key: str
+    recorded_at: float
+    transfer: dict
+
+    def to_line(self) -> bytes:
+        # Same fields and order as asdict(), without its deep copy of the transfer
+        record = {
+            "seq": self.seq,
+            "transaction_id": self.transaction_id,
+            "idempotency_key": self.idempotency_key,
+            "recorded_at": self.recorded_at,
+            "transfer": self.transfer,
+        }
+        return (json.dumps(record, separators=(",", ":"), default=str) + "\n").encode("utf-8")
+
+
+def format_transaction_id(seq: int) -> str:
+    return f"{TRANSACTION_PREFIX}{seq:010d}"
+
+
+class _Batch:
+    """Transfers written by one group commit."""
+
+    def __init__(self):
+        # (idempotency key, transfer, recorded_at) waiting for a sequence number
+        self.requests: list[tuple[str, dict, float]] = []
+        self.done = threading.Event()
+        self.error: Optional[Exception] = None
+
+
+class Ledger:
+    """
+    Append-only, group-committed ledger file.
+
+    Sequence numbers are assigned by the writer when a batch is committed.
+    With `shared`, several processes (e.g. server workers) append to the same
+    file: each commit takes the file lock, first reads whatever the others
+    appended since (so the sequence and the idempotency keys stay global),
+    then writes. Otherwise the file is locked for the ledger's lifetime and a
+    second process opening it gets a LedgerError.
+
+    Args:
+        path: Ledger file (created if missing).
+        fsync: fsync every group commit (disable only for throwaway ledgers).
+        shared: Lock per commit instead of for the ledger's lifetime.
+    """
+
+    def __init__(self, path: str, fsync: bool = True, shared: bool = False):
+        self.path = path
+        self.fsync = fsync
+        self.shared = shared
+        self.commits = 0
+        self.truncated_bytes = 0
+        self._by_key: dict[str, LedgerEntry] = {}
+        self._batch_of: dict[str, _Batch] = {}
+        self._last_seq = 0
+        self._offset = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._pending = _Batch()
+        self._closed = False
+
+        self._file = open(path, "a+b")
+        try:
+            self._lock_file(blocking=shared)
+        except OSError as error:
+            self._file.close()
+            raise LedgerError(f"Ledger {path} is already open in another process") from error
+        try:
+            self._catch_up()
+        finally:
+            if shared:
+                self._unlock_file()
+        self._writer = threading.Thread(target=self._run, name="ledger-writer", daemon=True)
+        self._writer.start()
+
+    def _lock_file(self, blocking: bool) -> None:
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+
+    def _unlock_file(self) -> None:
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+    def _catch_up(self) -> None:
+        """
+        Replay the file from where this ledger last read, cutting off a torn
+        last line (a writer died mid-write). File lock held.
+        """
+        self._file.seek(self._offset)
+        data = self._file.read()
+        good_end = 0
+        entries = []
+        while good_end < len(data):
+            newline = data.find(b"\n", good_end)
+            if newline == -1:
+                break
+            try:
+                record = json.loads(data[good_end:newline])
+            except ValueError:
+                if data.find(b"\n", newline + 1) != -1:
+                    raise LedgerError(f"Ledger {self.path} is corrupt at byte {self._offset + good_end}")
+                break
+            entries.append(LedgerEntry(**record))
+            good_end = newline + 1
+        if good_end < len(data):
+            self.truncated_bytes += len(data) - good_end
+            self._file.truncate(self._offset + good_end)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._offset += good_end
+        self._file.seek(0, os.SEEK_END)
+        with self._lock:
+            for entry in entries:
+                self._by_key[entry.idempotency_key] = entry
+                self._last_seq = max(self._last_seq, entry.seq)
+
+    def record(self, idempotency_key: str, transfer: dict[str, Any], timeout: float = 10.0) -> LedgerEntry:
+        """
+        Record a confirmed transfer and wait until it is durable.
+
+        Returns the existing entry if the idempotency key was recorded before.
+        """
+        with self._lock:
+            if self._closed:
+                raise LedgerError("Ledger is closed")
+            entry = self._by_key.get(idempotency_key)
+            if entry is not None:
+                return entry
+            batch = self._batch_of.get(idempotency_key)
+            if batch is None:
+                batch = self._pending
+                batch.requests.append((idempotency_key, dict(transfer), time.time()))
+                self._batch_of[idempotency_key] = batch
+                self._wakeup.notify()
+        if not batch.done.wait(timeout):
+            raise LedgerError("Timed out waiting for the ledger to commit")
+        if batch.error:
+            raise LedgerError("Could not write to the ledger") from batch.error
+        with self._lock:
+            return self._by_key[idempotency_key]
+
+    def get(self, idempotency_key: str) -> Optional[LedgerEntry]:
+        """The committed entry recorded under an idempotency key, if any."""
+        with self._lock:
+            return self._by_key.get(idempotency_key)
+
+    def __len__(self) -> int:
+        return len(self._by_key)
+
+    @property
+    def last_seq(self) -> int:
+        return self._last_seq
+
+    def _commit(self, batch: _Batch) -> list[LedgerEntry]:
+        """Number and write a batch; keys another process recorded meanwhile are not written again."""
+        if self.shared:
+            self._lock_file(blocking=True)
+        try:
+            if self.shared:
+                self._catch_up()
+            entries, seq = [], self._last_seq
+            # Only this thread adds to _by_key once the ledger is open
+            for idempotency_key, transfer, recorded_at in batch.requests:
+                if idempotency_key in self._by_key:
+                    continue
+                seq += 1
+                entries.append(LedgerEntry(
+                    seq=seq,
+                    transaction_id=format_transaction_id(seq),
+                    idempotency_key=idempotency_key,
+                    recorded_at=recorded_at,
+                    transfer=transfer,
+                ))
+            data = b"".join(entry.to_line() for entry in entries)
+            self._file.write(data)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._offset += len(data)
+            return entries
+        finally:
+            if self.shared:
+                self._unlock_file()
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                while not self._pending.requests and not self._closed:
+                    self._wakeup.wait()
+                if not self._pending.requests:
+                    return
+                batch, self._pending = self._pending, _Batch()
+            entries = []
+            try:
+                entries = self._commit(batch)
+                self.commits += 1
+            except Exception as error:
+                batch.error = error
+            with self._lock:
+                for entry in entries:
+                    self._by_key[entry.idempotency_key] = entry
+                    self._last_seq = max(self._last_seq, entry.seq)
+                for idempotency_key, _, _ in batch.requests:
+                    self._batch_of.pop(idempotency_key, None)
+            batch.done.set()
+
+    def close(self) -> None:
+        """Commit what is queued, stop the writer and release the file."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._wakeup.notify()
+        self._writer.join()
+        self._file.close()
+
+
+_ledger: Optional[Ledger] = None
+_ledger_lock = threading.Lock()
+
+
+def get_ledger() -> Ledger:
+    """Process-wide ledger, opened from the environment on first use."""
+    global _ledger
+    if _ledger is None:
+        with _ledger_lock:
+            if _ledger is None:
+                _ledger = Ledger(
+                    os.getenv("SEND_MONEY_LEDGER_PATH", DEFAULT_LEDGER_PATH),
+                    shared=os.getenv("SEND_MONEY_LEDGER_SHARED") == "1",
+                )
+    return _ledger
+
+
+def set_ledger(ledger: Optional[Ledger]) -> None:
+    """Replace the process-wide ledger (closing the previous one)."""
+    global _ledger
+    if _ledger is not None and _ledger is not ledger:
+        _ledger.close()
+    _ledger = ledger
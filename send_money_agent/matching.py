@@ -0,0 +1,144 @@
+"""
+Forgiving lookup of canonical values: delivery methods and country names.
+
+User wording rarely matches the canonical spelling: "pix", "cash pick-up",
+"Brasil", "Mexcio". `PhraseMatcher` maps such input to the canonical value:
+
+- folding: accents stripped, case-folded, everything but letters and digits
+  dropped ("Cash Pick-Up" and "cashpickup" are the same key);
+- aliases: any number of extra phrases per canonical value ("wire",
+  "efectivo");
+- bounded edit distance: up to 1 edit (insertion, deletion, substitution or
+  adjacent transposition) for keys of 4-7 characters, 2 from 8 characters,
+  none below 4, so "SPEI" tolerates "SEPI" but "ARS" never becomes "ARG".
+
+Fuzzy lookup uses a deletion neighbourhood built once per matcher: every key
+is indexed under each string obtained by deleting up to its edit budget of
+characters, so a lookup costs a few dict probes on the input's own deletions
+and never scans the phrase list. Candidates are then checked with the exact
+(bounded) distance.
+
+A match is only returned when one canonical value is strictly closest;
+otherwise `value` is None and `suggestions` ranks the candidates.
+"""
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+
+def fold(text: str) -> str:
+    """Matching key: accents stripped, case-folded, only letters and digits kept."""
+    ascii_text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return _NON_ALNUM_RE.sub("", ascii_text.casefold())
+
+
+def max_edits(length: int) -> int:
+    """Edits tolerated for a key of this length."""
+    if length < 4:
+        return 0
+    return 1 if length < 8 else 2
+
+
+def _deletions(key: str, depth: int) -> set[str]:
+    """The key and every string obtained by deleting up to `depth` characters."""
+    variants, frontier = {key}, {key}
+    for _ in range(depth):
+        frontier = {word[:i] + word[i + 1:] for word in frontier if len(word) > 1 for i in range(len(word))}
+        variants |= frontier
+    return variants
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance, or limit + 1 once it is known to exceed `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    over = limit + 1
+    # Only cells within `limit` of the diagonal can stay within the limit
+    previous2, previous = None, [j if j <= limit else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [over] * (len(b) + 1)
+        current[0] = i if i <= limit else over
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1] and previous2[j - 2] + 1 < value:
+                value = previous2[j - 2] + 1
+            current[j] = value
+        if min(current) > limit:
+            return over
+        previous2, previous = previous, current
+    return min(previous[-1], over)
+
+
+@dataclass(frozen=True)
+class MatchResult:
+    """Outcome of a lookup."""
+    value: Optional[str] = None             # canonical value, when one is strictly closest
+    suggestions: tuple[str, ...] = ()       # candidates, closest first
+    distance: Optional[int] = None          # edits from the input to the matched phrase
+
+
+class PhraseMatcher:
+    """
+    Folded, alias-aware, typo-tolerant lookup over (phrase, canonical value) pairs.
+
+    Args:
+        entries: Phrases and the canonical value each stands for; canonical
+            values should be listed among the phrases themselves.
+    """
+
+    def __init__(self, entries: Iterable[tuple[str, str]]):
+        self._canonical: dict[str, list[str]] = {}
+        self._rank: dict[str, int] = {}
+        for phrase, canonical in entries:
+            key = fold(phrase)
+            if not key:
+                continue
+            self._rank.setdefault(canonical, len(self._rank))
+            owners = self._canonical.setdefault(key, [])
+            if canonical not in owners:
+                owners.append(canonical)
+        self._neighbourhood: dict[str, list[str]] = {}
+        for key in self._canonical:
+            for variant in _deletions(key, max_edits(len(key))):
+                self._neighbourhood.setdefault(variant, []).append(key)
+
+    def __len__(self) -> int:
+        return len(self._canonical)
+
+    def match(self, text: str, limit: int = 3) -> MatchResult:
+        """The canonical value `text` stands for, or ranked suggestions."""
+        key = fold(text or "")
+        if not key:
+            return MatchResult()
+        owners = self._canonical.get(key)
+        if owners:
+            if len(owners) == 1:
+                return MatchResult(owners[0], tuple(owners), 0)
+            return MatchResult(None, tuple(sorted(owners, key=self._rank.__getitem__))[:limit], 0)
+
+        budget = max_edits(len(key))
+        # A key shares many deletions with a close input: check each key once
+        candidates = {
+            candidate
+            for variant in _deletions(key, budget)
+            for candidate in self._neighbourhood.get(variant, ())
+        }
+        best: dict[str, int] = {}
+        for candidate in candidates:
+            allowed = min(budget, max_edits(len(candidate)))
+            distance = edit_distance(key, candidate, allowed)
+            if distance > allowed:
+                continue
+            for canonical in self._canonical[candidate]:
+                if distance < best.get(canonical, allowed + 1):
+                    best[canonical] = distance
+        if not best:
+            return MatchResult()
+        ranked = sorted(best, key=lambda canonical: (best[canonical], self._rank[canonical]))
+        closest = best[ranked[0]]
+        unique = len(ranked) == 1 or best[ranked[1]] > closest
+        return MatchResult(ranked[0] if unique else None, tuple(ranked[:limit]), closest)
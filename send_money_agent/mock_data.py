@@ -1,36 +1,34 @@
 from typing import Optional, Dict
 
-SUPPORTED_COUNTRIES = [
-    {
-        "country_name": "Brazil",
-        "currency_code": "BRL",
-        "exchange_rate": 5.36,  # USD to BRL rate (mock)
-        "delivery_methods": ["Pix", "Bank Transfer"]
-    },
-    {
-        "country_name": "Mexico",
-        "currency_code": "MXN",
-        "exchange_rate": 17.15,  # USD to MXN rate (mock)
-        "delivery_methods": ["SPEI", "Cash Pickup", "Bank Transfer"]
-    },
-    {
-        "country_name": "Argentina",
-        "currency_code": "ARS",
-        "exchange_rate": 1055.50,  # USD to ARS rate (mock)
-        "delivery_methods": ["Bank Transfer", "Cash Pickup"]
-    }
-]
-
-
-def get_supported_country_names() -> list:
-    """Get list of supported country names"""
-    return [country['country_name'] for country in SUPPORTED_COUNTRIES]
+from .corridors import Corridor, CorridorRegistry
+from .corridor_source import get_corridor_source
+
+# Corridors live in corridors.json (or SEND_MONEY_CORRIDORS_FILE) and are
+# reloaded when the file changes. Take the registry once per operation: every
+# call may return a newer snapshot.
+
+
+def get_corridor_registry() -> CorridorRegistry:
+    """Get the current corridor registry snapshot"""
+    return get_corridor_source().registry
+
+
+def get_corridor(country: str) -> Optional[Corridor]:
+    """Get the frozen corridor config by name, ISO code, currency or alias"""
+    return get_corridor_registry().lookup(country)
+
+
+def get_supported_country_names() -> tuple:
+    """Get the supported country names (precomputed, do not mutate)"""
+    return get_corridor_registry().country_names
 
 
 def get_country_data(country: str) -> Optional[Dict]:
-    """Get country data by name"""
-    country_lower = country.lower()
-    for country_config in SUPPORTED_COUNTRIES:
-        if country_config['country_name'].lower() == country_lower:
-            return country_config
-    return None
+    """Get country data by name, ISO code, currency code or alias"""
+    corridor = get_corridor_registry().lookup(country)
+    return corridor.as_dict() if corridor else None
+
+
+def get_default_country_data() -> Dict:
+    """Get country data for the corridor new sessions start on"""
+    return get_corridor_registry().default_corridor.as_dict()
@@ -0,0 +1,359 @@
+"""
+Prompt versions per session, with cost and latency metrics per version.
+
+`prompts/` holds three system prompts. The registry gives every new session
+one of them and keeps it for the life of the session (state key
+`prompt_version`), so versions can be compared on live traffic:
+
+- pinned: every new session gets the same version (default: v3);
+- split: versions are weighted ("v1=1,v2=1,v3=2") and a session's version
+  is picked from a hash of its session ID, so the same session always lands
+  on the same version, in every process.
+
+For each version it counts sessions, turns, model calls and prompt/output
+tokens (from the model's usage metadata; fast-path, rendered and cached
+replies make no model call and cost nothing), and turn latency. The calls
+and tokens a session spends until a transfer completes, cancelled attempts
+included, are charged to that transfer, so `comparison()` can report model
+calls, tokens and cost per completed transfer next to the completion rate,
+and `cheapest()` picks the least expensive version that still completes
+flows.
+
+Configuration (environment):
+    SEND_MONEY_PROMPT_VERSION   Version every new session gets (default: v3)
+    SEND_MONEY_PROMPT_SPLIT     Weighted split instead, e.g. "v1=1,v2=1,v3=2"
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Mapping, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.models import LlmResponse
+from google.adk.utils import instructions_utils
+from google.genai import types
+
+from .prompts import prompt_v1, prompt_v2, prompt_v3
+from .tracing import traced_callback
+
+InstructionProvider = Callable[[ReadonlyContext], Awaitable[str]]
+
+DEFAULT_VERSION = "v3"
+# Gemini 2.0 Flash list prices, USD per million tokens
+DEFAULT_INPUT_PRICE = 0.10
+DEFAULT_OUTPUT_PRICE = 0.40
+# Turn latencies kept per version for percentiles
+MAX_LATENCY_SAMPLES = 10_000
+# Sessions with a transfer in progress, and turns in flight, tracked at once
+MAX_OPEN = 100_000
+# Session state key: the last transaction ID counted as a completed transfer
+COUNTED_KEY = "prompt_counted_txn"
+
+
+def static_instruction(text: str) -> InstructionProvider:
+    """Instruction provider for a plain template: state values injected, nothing else."""
+    async def provider(context: ReadonlyContext) -> str:
+        return await instructions_utils.inject_session_state(text, context)
+    return provider
+
+
+PROMPT_VERSIONS: dict[str, InstructionProvider] = {
+    "v1": static_instruction(prompt_v1.get_system_instruction()),
+    "v2": static_instruction(prompt_v2.get_system_instruction()),
+    "v3": prompt_v3.instruction_provider,
+}
+
+
+def parse_split(text: str) -> dict[str, float]:
+    """"v1=1, v3=3" → {"v1": 1.0, "v3": 3.0}; a bare name weighs 1."""
+    weights = {}
+    for item in text.split(","):
+        name, _, weight = item.strip().partition("=")
+        if name:
+            weights[name.strip()] = float(weight) if weight.strip() else 1.0
+    return weights
+
+
+@dataclass
+class VersionMetrics:
+    """Counters for one prompt version."""
+    sessions: int = 0
+    turns: int = 0
+    model_calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    completed: int = 0
+    # Calls and tokens charged to completed transfers
+    transfer_model_calls: int = 0
+    transfer_input_tokens: int = 0
+    transfer_output_tokens: int = 0
+    transfer_turns: int = 0
+    latencies: deque = field(default_factory=lambda: deque(maxlen=MAX_LATENCY_SAMPLES))
+
+
+@dataclass
+class _OpenTransfer:
+    """What a session has spent since its last completed transfer."""
+    version: str
+    model_calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    turns: int = 0
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+class PromptRegistry:
+    """
+    Assigns prompt versions to sessions and aggregates their metrics.
+
+    Args:
+        versions: Version name → instruction provider.
+        weights: Share of new sessions per version; a single entry pins it.
+        input_price: USD per million prompt tokens, for cost estimates.
+        output_price: USD per million output tokens.
+    """
+
+    def __init__(
+        self,
+        versions: Optional[Mapping[str, InstructionProvider]] = None,
+        weights: Optional[Mapping[str, float]] = None,
+        input_price: float = DEFAULT_INPUT_PRICE,
+        output_price: float = DEFAULT_OUTPUT_PRICE
+    ):
+        self.versions = dict(versions if versions is not None else PROMPT_VERSIONS)
+        weights = dict(weights if weights is not None else {DEFAULT_VERSION: 1.0})
+        unknown = set(weights) - set(self.versions)
+        if unknown:
+            raise ValueError(f"Unknown prompt versions: {sorted(unknown)} (known: {sorted(self.versions)})")
+        self._split = [(name, weight) for name, weight in weights.items() if weight > 0]
+        if not self._split:
+            raise ValueError("At least one prompt version needs a positive weight")
+        self._total_weight = sum(weight for _, weight in self._split)
+        self.input_price = input_price
+        self.output_price = output_price
+        self._metrics = {name: VersionMetrics() for name in self.versions}
+        self._open: OrderedDict[str, _OpenTransfer] = OrderedDict()
+        self._turn_started: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def assign(self, session_id: str) -> str:
+        """Version for a new session: a pure function of its ID and the split."""
+        if len(self._split) == 1:
+            return self._split[0][0]
+        digest = hashlib.sha256(session_id.encode("utf-8")).digest()
+        point = int.from_bytes(digest[:8], "big") / 2**64 * self._total_weight
+        for name, weight in self._split:
+            point -= weight
+            if point < 0:
+                return name
+        return self._split[-1][0]
+
+    def version_of(self, state: Mapping) -> str:
+        """The session's version, or the first of the split if it has none (or a retired one)."""
+        version = state.get('prompt_version')
+        return version if version in self.versions else self._split[0][0]
+
+    async def instruction(self, context: ReadonlyContext) -> str:
+        """ADK instruction provider: the session's prompt version, rendered."""
+        return await self.versions[self.version_of(context.state)](context)
+
+    # Recording, called from the agent callbacks below
+
+    def start_turn(self, session_id: str, invocation_id: str, state) -> None:
+        """Assign a version to a new session and note when the turn started."""
+        with self._lock:
+            if state.get('prompt_version') not in self.versions:
+                state['prompt_version'] = self.assign(session_id)
+                self._metrics[state['prompt_version']].sessions += 1
+            self._turn_started[invocation_id] = time.perf_counter()
+            while len(self._turn_started) > MAX_OPEN:
+                self._turn_started.popitem(last=False)
+
+    def record_model_call(
+        self,
+        session_id: str,
+        version: str,
+        usage: Optional[types.GenerateContentResponseUsageMetadata]
+    ) -> None:
+        input_tokens = (usage.prompt_token_count or 0) if usage else 0
+        output_tokens = (usage.candidates_token_count or 0) if usage else 0
+        with self._lock:
+            metrics = self._metrics[version]
+            metrics.model_calls += 1
+            metrics.input_tokens += input_tokens
+            metrics.output_tokens += output_tokens
+            transfer = self._open_transfer(session_id, version)
+            transfer.model_calls += 1
+            transfer.input_tokens += input_tokens
+            transfer.output_tokens += output_tokens
+
+    def end_turn(self, session_id: str, invocation_id: str, version: str, state) -> None:
+        """
+        Record turn latency; a new transaction ID completes the session's transfer.
+
+        The last counted ID is kept in the session's state, so a restart or an
+        evicted running total does not count the same transfer twice.
+        """
+        transaction_id = state.get('transaction_id') or ""
+        with self._lock:
+            started = self._turn_started.pop(invocation_id, None)
+            metrics = self._metrics[version]
+            metrics.turns += 1
+            if started is not None:
+                metrics.latencies.append(time.perf_counter() - started)
+            transfer = self._open_transfer(session_id, version)
+            transfer.turns += 1
+            if transaction_id and transaction_id != state.get(COUNTED_KEY):
+                state[COUNTED_KEY] = transaction_id
+                metrics.completed += 1
+                metrics.transfer_model_calls += transfer.model_calls
+                metrics.transfer_input_tokens += transfer.input_tokens
+                metrics.transfer_output_tokens += transfer.output_tokens
+                metrics.transfer_turns += transfer.turns
+                self._open[session_id] = _OpenTransfer(version)
+
+    def _open_transfer(self, session_id: str, version: str) -> _OpenTransfer:
+        """The session's running totals (lock held)."""
+        transfer = self._open.get(session_id)
+        if transfer is None or transfer.version != version:
+            transfer = self._open[session_id] = _OpenTransfer(version)
+            while len(self._open) > MAX_OPEN:
+                self._open.popitem(last=False)
+        self._open.move_to_end(session_id)
+        return transfer
+
+    # Reporting
+
+    def comparison(self) -> list[dict]:
+        """Per version metrics, averaged per completed transfer; versions without sessions omitted."""
+        rows = []
+        with self._lock:
+            snapshot = [
+                (name, metrics, sorted(metrics.latencies))
+                for name, metrics in self._metrics.items() if metrics.sessions or metrics.turns
+            ]
+        for name, metrics, latencies in snapshot:
+            completed = metrics.completed
+
+            def per_transfer(total: float) -> Optional[float]:
+                return total / completed if completed else None
+
+            cost = (
+                metrics.transfer_input_tokens * self.input_price
+                + metrics.transfer_output_tokens * self.output_price
+            ) / 1e6
+            rows.append({
+                "version": name,
+                "sessions": metrics.sessions,
+                "turns": metrics.turns,
+                "model_calls": metrics.model_calls,
+                "input_tokens": metrics.input_tokens,
+                "output_tokens": metrics.output_tokens,
+                "completed": completed,
+                "completion_rate": completed / metrics.sessions if metrics.sessions else 0.0,
+                "model_calls_per_transfer": per_transfer(metrics.transfer_model_calls),
+                "input_tokens_per_transfer": per_transfer(metrics.transfer_input_tokens),
+                "output_tokens_per_transfer": per_transfer(metrics.transfer_output_tokens),
+                "turns_per_transfer": per_transfer(metrics.transfer_turns),
+                "cost_per_transfer": per_transfer(cost),
+                "latency_p50": _percentile(latencies, 50),
+                "latency_p95": _percentile(latencies, 95),
+            })
+        return rows
+
+    def cheapest(self, min_completion_rate: float = 0.0) -> Optional[str]:
+        """Version with the lowest cost per completed transfer among those completing often enough."""
+        eligible = [
+            row for row in self.comparison()
+            if row['completed'] and row['completion_rate'] >= min_completion_rate
+        ]
+        if not eligible:
+            return None
+        return min(eligible, key=lambda row: (row['cost_per_transfer'], row['model_calls_per_transfer']))['version']
+
+    def reset_metrics(self) -> None:
+        with self._lock:
+            self._metrics = {name: VersionMetrics() for name in self.versions}
+            self._open.clear()
+            self._turn_started.clear()
+
+
+def _session_id(callback_context: CallbackContext) -> str:
+    return callback_context.session.id
+
+
+@traced_callback
+def prompt_turn_start(callback_context: CallbackContext) -> Optional[types.Content]:
+    """before_agent_callback: give a new session its prompt version, start the turn clock."""
+    get_prompt_registry().start_turn(
+        _session_id(callback_context), callback_context.invocation_id, callback_context.state
+    )
+    return None
+
+
+@traced_callback
+def prompt_model_usage(
+    callback_context: CallbackContext,
+    llm_response: LlmResponse
+) -> Optional[LlmResponse]:
+    """after_model_callback: charge the model call and its tokens to the session's version."""
+    if llm_response.partial:
+        return None
+    registry = get_prompt_registry()
+    registry.record_model_call(
+        _session_id(callback_context), registry.version_of(callback_context.state), llm_response.usage_metadata
+    )
+    return None
+
+
+@traced_callback
+def prompt_turn_end(callback_context: CallbackContext) -> Optional[types.Content]:
+    """after_agent_callback: turn latency, and a completed transfer if one was confirmed."""
+    registry = get_prompt_registry()
+    registry.end_turn(
+        _session_id(callback_context),
+        callback_context.invocation_id,
+        registry.version_of(callback_context.state),
+        callback_context.state,
+    )
+    return None
+
+
+async def instruction_provider(context: ReadonlyContext) -> str:
+    """ADK instruction provider: the session's prompt version from the process-wide registry."""
+    return await get_prompt_registry().instruction(context)
+
+
+_prompt_registry: Optional[PromptRegistry] = None
+_prompt_registry_lock = threading.Lock()
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """Process-wide prompt registry, configured from the environment on first use."""
+    global _prompt_registry
+    if _prompt_registry is None:
+        with _prompt_registry_lock:
+            if _prompt_registry is None:
+                split = os.getenv("SEND_MONEY_PROMPT_SPLIT")
+                if split:
+                    weights = parse_split(split)
+                else:
+                    weights = {os.getenv("SEND_MONEY_PROMPT_VERSION", DEFAULT_VERSION): 1.0}
+                _prompt_registry = PromptRegistry(weights=weights)
+    return _prompt_registry
+
+
+def set_prompt_registry(registry: Optional[PromptRegistry]) -> None:
+    """Replace the process-wide registry (None: configure from the environment again)."""
+    global _prompt_registry
+    with _prompt_registry_lock:
+        _prompt_registry = registry
@@ -0,0 +1,112 @@
+import re
+from dataclasses import dataclass, field
+from itertools import product
+from typing import Iterable, Optional
+
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.utils import instructions_utils
+
+STAGES = ("initial", "collecting", "confirming", "completed")
+# State keys whose non-empty value switches extra sections on
+FLAGS = ("validation_errors", "clarification_needed", "screening_hold")
+
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (words and punctuation marks); good enough to compare variants."""
+    return len(TOKEN_RE.findall(text))
+
+
+@dataclass(frozen=True)
+class PromptSection:
+    """
+    A slice of a system instruction.
+
+    Args:
+        text: The section text, including its trailing blank lines.
+        stages: Stages the section applies to. None means every stage.
+        flags: State flags that must all be set for the section to apply.
+    """
+    text: str
+    stages: Optional[frozenset] = None
+    flags: frozenset = field(default_factory=frozenset)
+
+    def __post_init__(self):
+        if self.stages is not None:
+            object.__setattr__(self, 'stages', frozenset(self.stages))
+        object.__setattr__(self, 'flags', frozenset(self.flags))
+
+    def applies_to(self, stage: str, active_flags: frozenset) -> bool:
+        if self.stages is not None and stage not in self.stages:
+            return False
+        return self.flags <= active_flags
+
+
+class PromptCompiler:
+    """
+    Emits only the sections relevant to the current stage and flags.
+
+    Compiled templates are cached per (stage, active flags) variant; state
+    values are injected on every call, exactly like a plain string
+    instruction.
+    """
+
+    def __init__(self, sections: Iterable[PromptSection]):
+        self._sections = tuple(sections)
+        self._cache: dict[tuple, str] = {}
+
+    @staticmethod
+    def variant_key(state) -> tuple[str, frozenset]:
+        """The part of the state that decides which sections are sent."""
+        stage = state.get('stage') or "initial"
+        active_flags = frozenset(flag for flag in FLAGS if state.get(flag))
+        return stage, active_flags
+
+    def full_text(self) -> str:
+        """Every section, regardless of stage or flags."""
+        return "".join(section.text for section in self._sections)
+
+    def compile(self, key: tuple[str, frozenset]) -> str:
+        """Template for a variant (cached)."""
+        template = self._cache.get(key)
+        if template is None:
+            stage, active_flags = key
+            if stage not in STAGES:
+                # Unknown stage: safer to send everything than to guess
+                template = self.full_text()
+            else:
+                template = "".join(
+                    section.text for section in self._sections
+                    if section.applies_to(stage, active_flags)
+                )
+            self._cache[key] = template
+        return template
+
+    async def render(self, context: ReadonlyContext) -> str:
+        """Compile the variant for the session state and inject state values."""
+        template = self.compile(self.variant_key(context.state))
+        return await instructions_utils.inject_session_state(template, context)
+
+    def variants(self) -> list[tuple[str, frozenset]]:
+        """Every (stage, flags) combination the compiler can emit."""
+        flag_sets = [
+            frozenset(flag for flag, on in zip(FLAGS, switches) if on)
+            for switches in product((False, True), repeat=len(FLAGS))
+        ]
+        return [(stage, flags) for stage in STAGES for flags in flag_sets]
+
+    def token_report(self) -> list[dict]:
+        """Estimated template tokens per variant, against the full instruction."""
+        full_tokens = estimate_tokens(self.full_text())
+        report = []
+        for stage, flags in self.variants():
+            tokens = estimate_tokens(self.compile((stage, flags)))
+            report.append({
+                "stage": stage,
+                "flags": sorted(flags),
+                "tokens": tokens,
+                "full_tokens": full_tokens,
+                "saved_tokens": full_tokens - tokens,
+            })
+        return report
@@ -0,0 +1,184 @@
+"""
+Pairwise exchange rates between every supported currency and USD.
+
+`RateMatrix` turns the USD → currency table into an n×n matrix where
+`matrix[i, j]` converts currency i into currency j (usd_rate[j] / usd_rate[i]),
+plus its inverse (currency j back into i). Both are computed once when the
+table loads, so any pair is answered with two dict lookups and one array
+read, and many pairs at once with NumPy indexing (`as_arrays()`). When a
+refresh changes only some rates, only the rows and columns of those
+currencies are recomputed; the result is identical, bit for bit, to a full
+rebuild.
+
+Every entry is computed with the same float division the tools use
+(`target / rate` in `calculate_usd_from_target`), so USD amounts derived
+through the matrix round exactly like the existing reverse calculation.
+
+The process-wide matrix (`get_rate_matrix()`) follows the rate cache through
+`RateCache.add_listener`, and is rebuilt if the rate service is replaced; a
+replaced matrix is detached with `RateCache.remove_listener`.
+"""
+import threading
+from typing import Mapping, Optional
+
+import numpy as np
+
+from .rates import get_rate_service
+
+USD = "USD"
+
+
+class RateMatrix:
+    """
+    Precomputed cross rates for a USD → currency rate table.
+
+    Args:
+        rates: USD → currency rates keyed by currency code (USD itself is implied).
+    """
+
+    def __init__(self, rates: Mapping[str, float]):
+        self.rebuilds = 0
+        self.incremental_updates = 0
+        self._lock = threading.Lock()
+        self._build(rates)
+
+    def _build(self, rates: Mapping[str, float]) -> None:
+        codes = (USD, *sorted(code.upper() for code in rates if code.upper() != USD))
+        usd_rates = np.array([1.0, *(float(rates[code]) for code in codes[1:])], dtype=np.float64)
+        # Columns divided by rows: matrix[i, j] = usd_rate[j] / usd_rate[i]
+        matrix = usd_rates[np.newaxis, :] / usd_rates[:, np.newaxis]
+        inverse = usd_rates[:, np.newaxis] / usd_rates[np.newaxis, :]
+        # Lower-case aliases spare lookups a str.upper() call
+        index = {alias: i for i, code in enumerate(codes) for alias in (code, code.lower())}
+        # One tuple, swapped in whole on rebuild: readers never mix two tables
+        self._table = (codes, index, usd_rates, matrix, inverse)
+        self.rebuilds += 1
+
+    @property
+    def codes(self) -> tuple[str, ...]:
+        return self._table[0]
+
+    def __contains__(self, currency_code: str) -> bool:
+        return self._position(self._table[1], currency_code) is not None
+
+    @staticmethod
+    def _position(index: dict, currency_code: str) -> Optional[int]:
+        position = index.get(currency_code)
+        return position if position is not None else index.get(currency_code.upper())
+
+    def __len__(self) -> int:
+        return len(self._table[0])
+
+    def _lookup(self, from_currency: str, to_currency: str, which: int) -> Optional[float]:
+        table = self._table
+        index = table[1]
+        # Exact key first: str.upper() only for codes not already indexed
+        i = index.get(from_currency)
+        if i is None:
+            i = index.get(from_currency.upper())
+        j = index.get(to_currency)
+        if j is None:
+            j = index.get(to_currency.upper())
+        if i is None or j is None:
+            return None
+        return table[which].item(i, j)
+
+    def rate(self, from_currency: str, to_currency: str) -> Optional[float]:
+        """Units of `to_currency` per unit of `from_currency`, or None if either is unknown."""
+        return self._lookup(from_currency, to_currency, 3)
+
+    def inverse_rate(self, from_currency: str, to_currency: str) -> Optional[float]:
+        """Units of `from_currency` per unit of `to_currency` (the reverse direction)."""
+        return self._lookup(from_currency, to_currency, 4)
+
+    def convert(self, amount: float, from_currency: str, to_currency: str) -> Optional[float]:
+        """`amount` of one currency in another, rounded to cents like the forward calculation."""
+        rate = self.rate(from_currency, to_currency)
+        return None if rate is None else round(amount * rate, 2)
+
+    def usd_for_target(self, target_amount: float, currency_code: str) -> Optional[float]:
+        """USD needed for the beneficiary to receive `target_amount` (same rounding as the tools)."""
+        _, index, usd_rates, _, _ = self._table
+        i = self._position(index, currency_code)
+        if i is None:
+            return None
+        return round(target_amount / usd_rates.item(i), 2)
+
+    def as_arrays(self) -> tuple[tuple[str, ...], np.ndarray, np.ndarray]:
+        """(codes, matrix, inverse) snapshot for vectorized pricing."""
+        with self._lock:
+            codes, _, _, matrix, inverse = self._table
+            return codes, matrix.copy(), inverse.copy()
+
+    def update_rate(self, currency_code: str, rate: float) -> None:
+        """
+        Change one USD → currency rate, recomputing only its row and column.
+
+        Updates in place (O(n) instead of O(n²)): a concurrent lookup reads
+        either the old or the new value of an entry, never a torn one.
+        """
+        code = currency_code.upper()
+        with self._lock:
+            codes, index, usd_rates, matrix, inverse = self._table
+            i = index.get(code)
+            if i is None or code == USD:
+                rates = dict(zip(codes[1:], usd_rates[1:].tolist()))
+                rates[code] = rate
+                self._build(rates)
+                return
+            usd_rates[i] = float(rate)
+            matrix[i, :] = usd_rates / usd_rates[i]
+            matrix[:, i] = usd_rates[i] / usd_rates
+            inverse[i, :] = usd_rates[i] / usd_rates
+            inverse[:, i] = usd_rates / usd_rates[i]
+            self.incremental_updates += 1
+
+    def apply(self, rates: Mapping[str, float]) -> None:
+        """Bring the matrix to a new rate table: per-currency updates, or a rebuild if currencies changed."""
+        incoming = {code.upper(): float(rate) for code, rate in rates.items() if code.upper() != USD}
+        if set(incoming) != set(self.codes[1:]):
+            with self._lock:
+                self._build(incoming)
+            return
+        for code, rate in incoming.items():
+            _, index, usd_rates, _, _ = self._table
+            if rate != usd_rates.item(index[code]):
+                self.update_rate(code, rate)
+
+    def on_rates_changed(self, previous: Mapping[str, float], rates: Mapping[str, float]) -> None:
+        """RateCache listener."""
+        self.apply(rates)
+
+
+_rate_matrix: Optional[RateMatrix] = None
+_rate_matrix_service = None
+_rate_matrix_lock = threading.Lock()
+
+
+def get_rate_matrix() -> RateMatrix:
+    """Process-wide matrix over the rate cache's table, kept current on every refresh."""
+    global _rate_matrix, _rate_matrix_service
+    service = get_rate_service()
+    if _rate_matrix is None or _rate_matrix_service is not service:
+        with _rate_matrix_lock:
+            if _rate_matrix is None or _rate_matrix_service is not service:
+                matrix = RateMatrix(service.get_rates())
+                service.add_listener(matrix.on_rates_changed)
+                _detach_rate_matrix()
+                _rate_matrix, _rate_matrix_service = matrix, service
+    return _rate_matrix
+
+
+def _detach_rate_matrix() -> None:
+    """Stop the rate cache updating the matrix about to be replaced. Lock held."""
+    if _rate_matrix is not None and _rate_matrix_service is not None:
+        _rate_matrix_service.remove_listener(_rate_matrix.on_rates_changed)
+
+
+def set_rate_matrix(matrix: Optional[RateMatrix]) -> None:
+    """Replace the process-wide matrix (None rebuilds it from the rate cache on next use)."""
+    global _rate_matrix, _rate_matrix_service
+    with _rate_matrix_lock:
+        _detach_rate_matrix()
+        _rate_matrix = matrix
+        _rate_matrix_service = get_rate_service() if matrix is not None else None
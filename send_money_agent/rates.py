@@ -0,0 +1,265 @@
+"""
+Exchange-rate providers, an in-process TTL cache and quote snapshots.
+
+Rates are USD → destination currency, keyed by currency code. The cache
+refreshes single-flight: when the entry expires, one caller fetches from the
+provider while concurrent callers wait for that result instead of issuing
+their own request. An optional background thread refreshes ahead of expiry so
+sessions never wait on the upstream.
+
+Configuration (environment):
+    SEND_MONEY_RATES_URL   JSON endpoint for HttpRateProvider (default: static table)
+    SEND_MONEY_RATES_TTL   Seconds a fetched rate table stays fresh (default: 60)
+    SEND_MONEY_QUOTE_TTL   Seconds a quote given to a user stays valid (default: 900)
+"""
+import json
+import logging
+import os
+import threading
+import time
+import urllib.request
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Optional
+
+from .corridor_source import get_corridor_source
+from .mock_data import get_corridor_registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATES_TTL = 60.0
+DEFAULT_QUOTE_TTL = 900.0
+
+
+class RateUnavailableError(RuntimeError):
+    """No rates could be fetched and none are cached."""
+
+
+class RateProvider(ABC):
+    """Source of USD → currency exchange rates."""
+
+    @abstractmethod
+    def fetch_rates(self) -> dict[str, float]:
+        """Fetch the current rate table, keyed by currency code."""
+
+
+class StaticRateProvider(RateProvider):
+    """Rates from the current corridor snapshot (corridor_source)."""
+
+    def fetch_rates(self) -> dict[str, float]:
+        return {
+            corridor.currency_code: corridor.exchange_rate
+            for corridor in get_corridor_registry()
+        }
+
+
+class HttpRateProvider(RateProvider):
+    """
+    Rates from a JSON endpoint.
+
+    Accepts either {"rates": {"BRL": 5.36, ...}} or a flat {"BRL": 5.36, ...}.
+    """
+
+    def __init__(self, url: str, timeout: float = 2.0):
+        self.url = url
+        self.timeout = timeout
+
+    def fetch_rates(self) -> dict[str, float]:
+        with urllib.request.urlopen(self.url, timeout=self.timeout) as response:
+            payload = json.loads(response.read().decode("utf-8"))
+        rates = payload.get("rates", payload)
+        return {code.upper(): float(rate) for code, rate in rates.items()}
+
+
+@dataclass(frozen=True)
+class Quote:
+    """A rate snapshot handed to a session; valid until `expires_at` (epoch seconds)."""
+    quote_id: str
+    currency_code: str
+    rate: float
+    issued_at: float
+    expires_at: float
+
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        return (now if now is not None else time.time()) >= self.expires_at
+
+
+class RateCache:
+    """
+    TTL cache in front of a RateProvider with single-flight refresh.
+
+    On upstream failure the last good table keeps being served (and logged)
+    until a refresh succeeds; only a cold cache raises RateUnavailableError.
+    """
+
+    def __init__(
+        self,
+        provider: RateProvider,
+        ttl_seconds: float = DEFAULT_RATES_TTL,
+        quote_ttl_seconds: float = DEFAULT_QUOTE_TTL,
+        fetch_timeout: float = 5.0
+    ):
+        self.provider = provider
+        self.ttl_seconds = ttl_seconds
+        self.quote_ttl_seconds = quote_ttl_seconds
+        self.fetch_timeout = fetch_timeout
+        self.fetch_count = 0
+        self._rates: dict[str, float] = {}
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._inflight: Optional[threading.Event] = None
+        self._listeners = []
+        self._refresher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _is_fresh(self, now: float) -> bool:
+        return bool(self._rates) and now - self._fetched_at < self.ttl_seconds
+
+    def get_rates(self) -> dict[str, float]:
+        """Current rate table, refreshing it (single-flight) when expired."""
+        if self._is_fresh(time.monotonic()):
+            return self._rates
+        return self.refresh(force=False)
+
+    def refresh(self, force: bool = True) -> dict[str, float]:
+        """Fetch from the provider; concurrent callers share one fetch."""
+        with self._lock:
+            if not force and self._is_fresh(time.monotonic()):
+                return self._rates
+            inflight = self._inflight
+            if inflight is None:
+                self._inflight = threading.Event()
+
+        if inflight is not None:
+            # Someone else is fetching: wait for their result
+            inflight.wait(self.fetch_timeout)
+            if not self._rates:
+                raise RateUnavailableError("Exchange rates are unavailable")
+            return self._rates
+
+        rates = None
+        previous = self._rates
+        try:
+            rates = self.provider.fetch_rates()
+            self.fetch_count += 1
+            self._rates = rates
+            self._fetched_at = time.monotonic()
+        except Exception as error:
+            logger.warning("Rate refresh failed: %s", error)
+            if not self._rates:
+                raise RateUnavailableError("Exchange rates are unavailable") from error
+        finally:
+            with self._lock:
+                done, self._inflight = self._inflight, None
+            done.set()
+
+        if rates is not None:
+            self._notify(previous, rates)
+        return self._rates
+
+    def get_rate(self, currency_code: str) -> Optional[float]:
+        """Current rate for a currency, or None if the provider does not list it."""
+        return self.get_rates().get(currency_code.upper())
+
+    def quote(self, currency_code: str) -> Optional[Quote]:
+        """Snapshot the current rate for a currency into a Quote."""
+        try:
+            rate = self.get_rate(currency_code)
+        except RateUnavailableError:
+            return None
+        if rate is None:
+            return None
+        now = time.time()
+        return Quote(
+            quote_id=f"QT-{uuid.uuid4().hex[:12].upper()}",
+            currency_code=currency_code.upper(),
+            rate=rate,
+            issued_at=now,
+            expires_at=now + self.quote_ttl_seconds,
+        )
+
+    def add_listener(self, callback) -> None:
+        """Call `callback(previous_rates, new_rates)` after every successful refresh."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback) -> None:
+        """Stop calling a callback passed to `add_listener` (no-op if it was not added)."""
+        try:
+            self._listeners.remove(callback)
+        except ValueError:
+            pass
+
+    def _notify(self, previous: dict, rates: dict) -> None:
+        for callback in list(self._listeners):
+            try:
+                callback(previous, rates)
+            except Exception:
+                logger.exception("Rate listener failed")
+
+    def start_background_refresh(self, interval: Optional[float] = None) -> None:
+        """Refresh on a daemon thread ahead of expiry (default: 80% of the TTL)."""
+        if self._refresher and self._refresher.is_alive():
+            return
+        interval = interval or self.ttl_seconds * 0.8
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.refresh()
+                except RateUnavailableError:
+                    pass
+
+        self._refresher = threading.Thread(target=run, name="rate-refresher", daemon=True)
+        self._refresher.start()
+
+    def stop_background_refresh(self) -> None:
+        self._stop.set()
+        if self._refresher:
+            self._refresher.join(timeout=1.0)
+            self._refresher = None
+
+
+_rate_service: Optional[RateCache] = None
+_rate_service_lock = threading.Lock()
+# The corridor source and reload listener the process-wide cache is attached to
+_rate_service_listener: Optional[tuple] = None
+
+
+def get_rate_service() -> RateCache:
+    """Process-wide rate cache, configured from the environment on first use."""
+    global _rate_service, _rate_service_listener
+    if _rate_service is None:
+        with _rate_service_lock:
+            if _rate_service is None:
+                url = os.getenv("SEND_MONEY_RATES_URL")
+                service = RateCache(
+                    HttpRateProvider(url) if url else StaticRateProvider(),
+                    ttl_seconds=float(os.getenv("SEND_MONEY_RATES_TTL", DEFAULT_RATES_TTL)),
+                    quote_ttl_seconds=float(os.getenv("SEND_MONEY_QUOTE_TTL", DEFAULT_QUOTE_TTL)),
+                )
+                if url:
+                    service.start_background_refresh()
+                else:
+                    # Rates come from the corridor file: pick up an edited one right away
+                    source = get_corridor_source()
+                    listener = lambda previous, registry: service.refresh()
+                    source.add_listener(listener)
+                    _rate_service_listener = (source, listener)
+                _rate_service = service
+    return _rate_service
+
+
+def set_rate_service(service: Optional[RateCache]) -> None:
+    """Replace the process-wide rate cache (e.g. to point it at a stand-in)."""
+    global _rate_service, _rate_service_listener
+    with _rate_service_lock:
+        if _rate_service is not None and _rate_service is not service:
+            _rate_service.stop_background_refresh()
+            if _rate_service_listener is not None:
+                # Detach the replaced cache so corridor reloads stop refreshing it
+                source, listener = _rate_service_listener
+                source.remove_listener(listener)
+                _rate_service_listener = None
+        _rate_service = service
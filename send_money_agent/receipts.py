@@ -0,0 +1,179 @@
+"""
+Deterministic transfer summary and receipt.
+
+Once the last field is collected the model is called again only to restate
+the transfer field by field, and once `confirm_transfer` succeeds only to
+read back the transaction ID. Both replies are fully derivable from state, so
+`render_reply_callback` (a `before_model_callback`) renders them from
+precompiled templates and returns them as the model's reply, skipping that
+model round trip. Amounts use each destination's local number format
+(R$ 1.072,00 / $1,072.00 MXN / $ 94.995,00).
+
+The reply is only rendered when nothing else is left for the model to say:
+the tool results answer calls the model itself made in this turn (after a
+fast-path update the model still phrases the reply, since the parse may have
+left something out), every tool succeeded, no validation error or
+clarification is pending, and the user's message was not a question.
+
+Configuration (environment):
+    SEND_MONEY_RENDER_REPLIES   0 to always let the model phrase these replies
+"""
+import os
+from dataclasses import dataclass, field
+from typing import Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+from .fast_path import TOKEN_RE
+from .helpers import all_fields_complete
+from .tracing import traced_callback
+
+RENDER_ENABLED = os.getenv("SEND_MONEY_RENDER_REPLIES", "1") != "0"
+
+QUESTION_WORDS = {"how", "what", "why", "when", "which", "where"}
+
+
+@dataclass(frozen=True)
+class CurrencyFormat:
+    """How a currency's amounts are written in its locale."""
+    pattern: str          # "{symbol}" and "{number}" placeholders
+    symbol: str
+    thousands: str = ","
+    decimal: str = "."
+    decimals: int = 2
+    _separators: dict = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Python formats as "1,234.56"; map its separators to the locale's once
+        object.__setattr__(self, '_separators', str.maketrans({",": self.thousands, ".": self.decimal}))
+
+    def format(self, amount: float) -> str:
+        number = f"{amount:,.{self.decimals}f}".translate(self._separators)
+        return self.pattern.format(symbol=self.symbol, number=number)
+
+
+CURRENCY_FORMATS = {
+    "USD": CurrencyFormat("{symbol}{number}", "US$"),
+    "BRL": CurrencyFormat("{symbol} {number}", "R$", thousands=".", decimal=","),   # pt-BR
+    "MXN": CurrencyFormat("{symbol}{number} MXN", "$"),                             # es-MX
+    "ARS": CurrencyFormat("{symbol} {number}", "$", thousands=".", decimal=","),    # es-AR
+}
+
+
+def format_money(amount, currency_code: str) -> str:
+    """An amount in the currency's local format; unknown currencies as '1,234.56 XYZ'."""
+    currency_format = CURRENCY_FORMATS.get(currency_code)
+    if currency_format is None:
+        return f"{float(amount):,.2f} {currency_code}"
+    return currency_format.format(float(amount))
+
+
+SUMMARY_TEMPLATE = """Here's a summary of your transfer:
+- Country: {country}
+- Amount: {send_amount}
+- Recipient: {beneficiary}
+- Delivery Method: {delivery_method}
+- Exchange Rate: {one_usd} = {rate}
+- Receive Amount: {receive_amount}
+
+Ready to send?"""
+
+RECEIPT_TEMPLATE = """Your transfer is confirmed, thank you!
+- Transaction ID: {transaction_id}
+- Sent: {send_amount}
+- {beneficiary} receives {receive_amount} via {delivery_method} in {country}
+
+Can I help you with anything else?"""
+
+
+def _fields(state) -> dict:
+    currency = state.get('destination_currency_code', '')
+    return {
+        "country": state.get('destination_country'),
+        "send_amount": format_money(state.get('send_amount'), "USD"),
+        "beneficiary": state.get('beneficiary'),
+        "delivery_method": state.get('delivery_method'),
+        "one_usd": format_money(1, "USD").removesuffix(".00"),
+        "rate": format_money(state.get('exchange_rate'), currency),
+        "receive_amount": format_money(state.get('receive_amount'), currency),
+        "transaction_id": state.get('transaction_id'),
+    }
+
+
+def render_summary(state) -> str:
+    """The confirmation summary for a complete transfer."""
+    return SUMMARY_TEMPLATE.format_map(_fields(state))
+
+
+def render_receipt(state) -> str:
+    """The receipt for a confirmed transfer."""
+    return RECEIPT_TEMPLATE.format_map(_fields(state))
+
+
+def _turn_user_text(contents: list[types.Content]) -> Optional[str]:
+    """Text of the user message that started the current turn."""
+    for content in reversed(contents):
+        if content.role == 'user' and any(part.text for part in content.parts or []):
+            return " ".join(part.text for part in content.parts if part.text)
+    return None
+
+
+def _is_question(text: str) -> bool:
+    return "?" in text or any(word.casefold() in QUESTION_WORDS for word in TOKEN_RE.findall(text))
+
+
+def _model_requested(results: list, events: list, invocation_id: str) -> bool:
+    """True when the results are the latest stored event of this turn (not the fast path's own call)."""
+    if not events or events[-1].invocation_id != invocation_id:
+        return False
+    stored = events[-1].get_function_responses()
+    return bool(stored) and sorted(r.name for r in stored) == sorted(r.name for r in results)
+
+
+def render_reply(state, llm_request: LlmRequest, events: list, invocation_id: str) -> Optional[str]:
+    """
+    The summary or receipt that should answer the tool results just added, if any.
+
+    None whenever the model still has something to phrase.
+    """
+    last = llm_request.contents[-1] if llm_request.contents else None
+    if last is None or last.role != 'user':
+        return None
+    results = [part.function_response for part in last.parts or [] if part.function_response]
+    if not results or any((result.response or {}).get('success') is not True for result in results):
+        return None
+    if not _model_requested(results, events, invocation_id):
+        return None
+    if state.get('validation_errors') or state.get('clarification_needed'):
+        return None
+    text = _turn_user_text(llm_request.contents)
+    if not text or _is_question(text):
+        return None
+
+    stage = state.get('stage')
+    if stage == 'completed' and any(result.name == 'confirm_transfer' for result in results):
+        return render_receipt(state)
+    if stage == 'confirming' and all_fields_complete(state):
+        return render_summary(state)
+    return None
+
+
+@traced_callback
+def render_reply_callback(
+    callback_context: CallbackContext,
+    llm_request: LlmRequest
+) -> Optional[LlmResponse]:
+    """Answer with the rendered summary/receipt instead of calling the model."""
+    if not RENDER_ENABLED:
+        return None
+    session = callback_context.session
+    text = render_reply(callback_context.state, llm_request, session.events, callback_context.invocation_id)
+    if text is None:
+        return None
+    return LlmResponse(
+        content=types.Content(role='model', parts=[types.Part(text=text)]),
+        turn_complete=True,
+        custom_metadata={"rendered": True},
+    )
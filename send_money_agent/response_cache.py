@@ -0,0 +1,428 @@
+"""
+Shared cache of model replies for repeated small-talk turns.
+
+Many turns are the same short utterance against the same transfer state
+("hi", "what's the fee?", "ok thanks" while a summary is on screen). The reply
+depends on the rendered system instruction (stage, transfer fields, prompt
+sections) and the utterance, so it is cached under a hash of the agent, the
+model, the system instruction and the normalized utterance. Sessions only
+share an entry when everything the model was shown about their transfer is
+identical, apart from per-session identifiers: the transaction ID is left out
+of the key, and replies that quote one are not cached.
+
+A reply is only ever cached or served when it cannot stand in for a tool call:
+
+- only text-only replies given straight to a user message are stored; if the
+  model answered with a function call, nothing is cached for that key;
+- utterances that the prompt ties to a tool are never looked up: exit intent
+  in any stage, yes/no/decline words while confirming or after completion,
+  anything naming an amount, a country, a currency or a delivery method, and
+  short replies that could be a name while details are being collected
+  ("maria" is the answer to "Who should receive the money?").
+
+Entries expire after a TTL and the least recently used ones are evicted
+beyond `max_entries`. Concurrent misses on the same key share one model call;
+if that call fails or is cancelled, the others go to the model themselves.
+
+Configuration (environment):
+    SEND_MONEY_RESPONSE_CACHE       Maximum cached replies, 0 to disable (default: 10000)
+    SEND_MONEY_RESPONSE_CACHE_TTL   Seconds a cached reply stays valid (default: 300)
+"""
+import asyncio
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+from .corridors import CorridorRegistry, normalize_key
+from .fast_path import BLOCKING_WORDS, FILLER_WORDS, MAX_NAME_WORDS, _latest_user_text, extract_intent
+from .ledger import TRANSACTION_PREFIX
+from .mock_data import get_corridor_registry
+from .tracing import traced_callback
+
+DEFAULT_MAX_ENTRIES = 10_000
+DEFAULT_TTL = 300.0
+DEFAULT_COALESCE_TIMEOUT = 30.0
+# Cache misses waiting for their model reply, keyed by invocation ID
+MAX_PENDING = 10_000
+
+# Exit intent: cancel_transfer_session in every stage
+CANCEL_PHRASES = {
+    "cancel", "stop", "quit", "exit", "forget it", "never mind", "nevermind",
+    "start over", "restart",
+}
+# Answers to "Ready to send?" (confirm_transfer) and to "anything else?" (cancel_transfer_session)
+DECISION_PHRASES = {
+    "yes", "yeah", "yep", "yup", "sure", "ok", "okay", "confirm", "correct",
+    "go ahead", "send it", "do it", "no", "nope", "nah", "change", "edit", "wait",
+    "thanks", "thank you", "thx", "that's it", "thats it", "i'm good", "im good",
+    "all good", "done", "another", "bye", "goodbye",
+}
+DECISION_STAGES = {"confirming", "completed"}
+# Stages in which a bare word may answer a question about the transfer
+SLOT_STAGES = {"initial", "collecting"}
+
+# Per-session values in the rendered instruction, masked in the key
+TRANSACTION_LINE_RE = re.compile(r"^(- Transaction ID:)[ \t]*\S.*$", re.MULTILINE)
+PUNCTUATION_RE = re.compile(r"[^\w\s']+", re.UNICODE)
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_utterance(text: str) -> str:
+    """Case-folded, punctuation stripped, whitespace collapsed ("Yes!! " → "yes")."""
+    text = normalize_key(text).replace("’", "'")
+    return WHITESPACE_RE.sub(" ", PUNCTUATION_RE.sub(" ", text)).strip()
+
+
+def _mentions(normalized: str, phrases) -> bool:
+    padded = f" {normalized} "
+    return any(f" {phrase} " in padded for phrase in phrases)
+
+
+@lru_cache(maxsize=4)
+def _slot_phrases(registry: CorridorRegistry) -> frozenset[str]:
+    """Folded country names, aliases, currency codes and delivery methods."""
+    phrases = set()
+    for corridor in registry:
+        phrases.update(
+            normalize_utterance(phrase) for phrase in (
+                corridor.country_name, *corridor.aliases, corridor.currency_code,
+                *corridor.delivery_methods
+            )
+        )
+    return frozenset(phrases)
+
+
+def _could_be_slot_value(text: str, normalized: str, state: dict) -> bool:
+    """True when the fast path reads slots from the utterance or it may be a bare name."""
+    intent = extract_intent(text, state)
+    if intent is not None and not intent.is_empty():
+        return True
+    if "?" in text or state.get('stage', 'initial') not in SLOT_STAGES:
+        return False
+    words = normalized.split()
+    return (
+        len(words) <= MAX_NAME_WORDS
+        and not any(word in BLOCKING_WORDS for word in words)
+        and not _mentions(normalized, DECISION_PHRASES)
+        and any(word not in FILLER_WORDS for word in words)
+    )
+
+
+def cacheable_utterance(text: Optional[str], state: dict) -> Optional[str]:
+    """
+    The normalized utterance if its reply may come from the cache, else None.
+
+    None for anything the prompt answers with a tool call: exit intent,
+    decisions in the confirming/completed stages and slot values, including
+    a name given on its own while details are being collected.
+    """
+    if not text:
+        return None
+    stage = state.get('stage', 'initial')
+    normalized = normalize_utterance(text)
+    if not normalized or any(char.isdigit() for char in normalized):
+        return None
+    if _mentions(normalized, CANCEL_PHRASES):
+        return None
+    if stage in DECISION_STAGES and _mentions(normalized, DECISION_PHRASES):
+        return None
+    if _mentions(normalized, _slot_phrases(get_corridor_registry())):
+        return None
+    if _could_be_slot_value(text, normalized, state):
+        return None
+    return normalized
+
+
+def _system_instruction_text(llm_request: LlmRequest) -> str:
+    system_instruction = llm_request.config.system_instruction if llm_request.config else None
+    if isinstance(system_instruction, str):
+        return system_instruction
+    if isinstance(system_instruction, types.Content):
+        return "".join(part.text or "" for part in system_instruction.parts or ())
+    return repr(system_instruction)
+
+
+def cache_key(agent_name: str, llm_request: LlmRequest, utterance: str) -> str:
+    """Hash of everything the reply depends on: agent, model, rendered instruction, utterance."""
+    instruction = TRANSACTION_LINE_RE.sub(r"\1 *", _system_instruction_text(llm_request))
+    digest = hashlib.sha256()
+    for part in (agent_name, llm_request.model or "", instruction, utterance):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def is_text_reply(llm_response: LlmResponse) -> bool:
+    """True for a complete reply made only of text parts."""
+    content = llm_response.content
+    if llm_response.partial or llm_response.error_code or content is None or not content.parts:
+        return False
+    return all(
+        part.text and not part.thought and not part.function_call and not part.function_response
+        for part in content.parts
+    )
+
+
+def is_shareable_reply(llm_response: LlmResponse) -> bool:
+    """A text reply that quotes no per-session identifier."""
+    return is_text_reply(llm_response) and not any(
+        TRANSACTION_PREFIX in part.text for part in llm_response.content.parts
+    )
+
+
+@dataclass
+class _Entry:
+    content: types.Content
+    expires_at: float
+    model_seconds: float
+
+
+@dataclass
+class _Pending:
+    """A claimed miss waiting on the model, and the hook that releases it if the task ends."""
+    key: str
+    started: float
+    task: asyncio.Task
+    abandoned: Callable[[asyncio.Task], None]
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU/TTL map from cache key to a model reply.
+
+    Misses are single-flight: while one invocation waits on the model for a
+    key, others with the same key wait for that reply (up to
+    `coalesce_timeout`) instead of calling the model themselves.
+
+    Args:
+        max_entries: Replies kept before the least recently used is evicted.
+        ttl: Seconds a reply stays valid after it was stored.
+        coalesce_timeout: Most seconds a miss waits on an identical in-flight one.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl: float = DEFAULT_TTL,
+        coalesce_timeout: float = DEFAULT_COALESCE_TIMEOUT
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.coalesce_timeout = coalesce_timeout
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+        self.skipped = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.saved_seconds = 0.0
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        # invocation ID → misses waiting on the model
+        self._pending: OrderedDict[str, _Pending] = OrderedDict()
+        self._in_flight: dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[types.Content]:
+        """A copy of the cached reply (counted as a hit), or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_seconds += entry.model_seconds
+            return entry.content.model_copy(deep=True)
+
+    def put(self, key: str, content: types.Content, model_seconds: float = 0.0) -> None:
+        """Store a reply, evicting the least recently used beyond max_entries."""
+        with self._lock:
+            self._entries[key] = _Entry(
+                content=content.model_copy(deep=True),
+                expires_at=time.monotonic() + self.ttl,
+                model_seconds=model_seconds,
+            )
+            self._entries.move_to_end(key)
+            self.stores += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    async def claim(self, invocation_id: str, key: str) -> Optional[types.Content]:
+        """
+        Handle a miss: the reply of an identical in-flight miss, or None.
+
+        None means the caller goes to the model; its reply is expected
+        through `resolve()` under the same invocation ID. If the caller's
+        task ends first (its model call failed or it was cancelled), the
+        miss is resolved with None so that waiters do not sit out
+        `coalesce_timeout`.
+        """
+        task = asyncio.current_task()
+        with self._lock:
+            leader = self._in_flight.get(key)
+            if leader is None or leader.done():
+                self._in_flight[key] = asyncio.get_running_loop().create_future()
+                abandoned = lambda _: self.resolve(invocation_id, None)
+                task.add_done_callback(abandoned)
+                self._pending[invocation_id] = _Pending(key, time.perf_counter(), task, abandoned)
+                while len(self._pending) > MAX_PENDING:
+                    self._fail(self._pending.popitem(last=False)[1].key)
+                self.misses += 1
+                return None
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(asyncio.shield(leader), self.coalesce_timeout)
+        except asyncio.TimeoutError:
+            result = None
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            content, model_seconds = result
+            self.coalesced += 1
+            self.saved_seconds += max(0.0, model_seconds - (time.perf_counter() - started))
+        return content.model_copy(deep=True)
+
+    def resolve(self, invocation_id: str, content: Optional[types.Content]) -> None:
+        """Finish a claimed miss with the model's text reply (stored) or None."""
+        with self._lock:
+            pending = self._pending.pop(invocation_id, None)
+        if pending is None:
+            return
+        if not pending.task.done():
+            pending.task.remove_done_callback(pending.abandoned)
+        model_seconds = time.perf_counter() - pending.started
+        if content is not None:
+            self.put(pending.key, content, model_seconds)
+        with self._lock:
+            leader = self._in_flight.pop(pending.key, None)
+        if leader is not None and not leader.done():
+            result = (content, model_seconds) if content is not None else None
+            leader.get_loop().call_soon_threadsafe(_set_result, leader, result)
+
+    def _fail(self, key: str) -> None:
+        """Release waiters of a miss that will never be resolved (lock held)."""
+        leader = self._in_flight.pop(key, None)
+        if leader is not None and not leader.done():
+            leader.get_loop().call_soon_threadsafe(_set_result, leader, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.coalesced + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "skipped": self.skipped,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "saved_seconds": self.saved_seconds,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+            for key in list(self._in_flight):
+                self._fail(key)
+
+
+def _set_result(future: asyncio.Future, result) -> None:
+    if not future.done():
+        future.set_result(result)
+
+
+@traced_callback
+async def response_cache_lookup(
+    callback_context: CallbackContext,
+    llm_request: LlmRequest
+) -> Optional[LlmResponse]:
+    """before_model_callback: answer a repeated utterance from the cache."""
+    cache = get_response_cache()
+    if cache is None:
+        return None
+    utterance = cacheable_utterance(_latest_user_text(llm_request), callback_context.state)
+    if utterance is None:
+        cache.skipped += 1
+        return None
+    key = cache_key(callback_context.agent_name, llm_request, utterance)
+    content = cache.get(key) or await cache.claim(callback_context.invocation_id, key)
+    if content is None:
+        return None
+    return LlmResponse(content=content, turn_complete=True, custom_metadata={"response_cache": "hit"})
+
+
+@traced_callback
+def response_cache_store(
+    callback_context: CallbackContext,
+    llm_response: LlmResponse
+) -> Optional[LlmResponse]:
+    """after_model_callback: keep a text-only reply to a cache miss."""
+    cache = get_response_cache()
+    if cache is None or llm_response.partial:
+        return None
+    cache.resolve(
+        callback_context.invocation_id,
+        llm_response.content if is_shareable_reply(llm_response) else None
+    )
+    return None
+
+
+@traced_callback
+def response_cache_release(
+    callback_context: CallbackContext,
+    llm_request: LlmRequest,
+    error: Exception
+) -> Optional[LlmResponse]:
+    """on_model_error_callback: a failed miss releases the invocations waiting on it."""
+    cache = get_response_cache()
+    if cache is not None:
+        cache.resolve(callback_context.invocation_id, None)
+    return None
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_configured = False
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Process-wide response cache (None when disabled), configured from the environment on first use."""
+    global _response_cache, _response_cache_configured
+    if not _response_cache_configured:
+        with _response_cache_lock:
+            if not _response_cache_configured:
+                max_entries = int(os.getenv("SEND_MONEY_RESPONSE_CACHE", DEFAULT_MAX_ENTRIES))
+                if max_entries > 0:
+                    ttl = float(os.getenv("SEND_MONEY_RESPONSE_CACHE_TTL", DEFAULT_TTL))
+                    _response_cache = ResponseCache(max_entries=max_entries, ttl=ttl)
+                _response_cache_configured = True
+    return _response_cache
+
+
+def set_response_cache(cache: Optional[ResponseCache]) -> None:
+    """Replace the process-wide response cache (None disables caching)."""
+    global _response_cache, _response_cache_configured
+    with _response_cache_lock:
+        _response_cache = cache
+        _response_cache_configured = True
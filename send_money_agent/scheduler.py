@@ -0,0 +1,455 @@
+"""
+Client-side scheduling of model calls: concurrency caps, retries, circuit
+breaking and failover.
+
+`ScheduledModel` wraps the agent's model (and an optional fallback model)
+and sends every call through the process-wide `ModelScheduler`:
+
+- **Concurrency**: at most `max_concurrency` calls in flight in the process
+  and `tenant_concurrency` per tenant (the session's user ID, set by
+  `model_tenant_callback`). Calls beyond that wait in one FIFO queue; a
+  waiting call is granted a slot as soon as both its tenant and the process
+  have one free, so one busy tenant does not hold up the others.
+- **Deadlines**: a call waits at most `queue_timeout` seconds for a slot and
+  spends at most `deadline` seconds in total, queueing and retries included,
+  before failing with SchedulerTimeoutError. A model that is slow to answer
+  (or between streamed chunks) is cut off when the deadline passes.
+- **Retries**: 429 and 503 responses are retried up to `max_attempts` times
+  with exponential backoff and full jitter (a uniform delay between 0 and
+  `base_delay * 2**attempt`, capped at `max_delay`). The slot is kept while
+  backing off, so an overloaded upstream sees less load, not the same
+  load later. A call that already streamed partial output is not retried.
+- **Circuit breaker**: per model, `failure_threshold` consecutive retryable
+  failures open the circuit for `reset_timeout` seconds; calls skip an open
+  model. Then one probe call at a time is let through, and the circuit
+  closes again on its success.
+- **Failover**: when the primary model's circuit is open or its retries are
+  used up, the call goes to the fallback model (same retries and breaker).
+
+`ModelScheduler.stats()` reports queue depth, in-flight calls, retries,
+fallbacks, timeouts, errors by status code and breaker states; the server
+adds it to /metrics.
+
+Configuration (environment):
+    SEND_MONEY_MODEL                Primary model (default: gemini-2.0-flash)
+    SEND_MONEY_FALLBACK_MODEL       Fallback model (default: none)
+    SEND_MONEY_MODEL_SCHEDULER      0 to call the model directly (default: 1)
+    SEND_MONEY_MODEL_CONCURRENCY    Calls in flight per process (default: 32)
+    SEND_MONEY_TENANT_CONCURRENCY   Calls in flight per tenant (default: 4)
+    SEND_MONEY_MODEL_QUEUE_TIMEOUT  Seconds a call may wait for a slot (default: 10)
+    SEND_MONEY_MODEL_DEADLINE       Seconds per call, queueing and retries included (default: 60)
+    SEND_MONEY_MODEL_ATTEMPTS       Attempts per model on 429/503 (default: 4)
+    SEND_MONEY_BREAKER_FAILURES     Consecutive failures that open a circuit (default: 5)
+    SEND_MONEY_BREAKER_RESET        Seconds a circuit stays open (default: 30)
+"""
+import asyncio
+import contextvars
+import os
+import random
+import threading
+import time
+from collections import Counter, deque
+from typing import AsyncGenerator, Optional, Union
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.genai import errors
+
+from .tracing import traced_callback
+
+DEFAULT_MODEL = "gemini-2.0-flash"
+RETRYABLE_CODES = {429, 503}
+DEFAULT_TENANT = "default"
+
+_tenant: contextvars.ContextVar[str] = contextvars.ContextVar("send_money_model_tenant", default=DEFAULT_TENANT)
+
+
+class SchedulerTimeoutError(RuntimeError):
+    """A model call ran out of time waiting for a slot or between retries."""
+
+
+class CircuitOpenError(RuntimeError):
+    """Every model that could serve the call has an open circuit."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one model.
+
+    closed -> open after `failure_threshold` failures in a row; open ->
+    half-open after `reset_timeout` seconds, letting one probe through at a
+    time; half-open -> closed on a success, back to open on a failure.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return "open"
+        return "half_open"
+
+    def allow(self) -> bool:
+        """Whether a call may go to the model now (claims the probe when half-open)."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                if self._probing or self._opened_at is None:
+                    self.opened += 1
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+    def release_probe(self) -> None:
+        """A probe ended without a verdict (e.g. a non-retryable error or cancellation)."""
+        with self._lock:
+            self._probing = False
+
+
+class _Waiter:
+    __slots__ = ("tenant", "future", "granted")
+
+    def __init__(self, tenant: str, future: asyncio.Future):
+        self.tenant = tenant
+        self.future = future
+        self.granted = False
+
+
+class ModelScheduler:
+    """
+    Admission, retry and failover policy shared by every ScheduledModel in the process.
+
+    Args:
+        max_concurrency: Model calls in flight in the process.
+        tenant_concurrency: Model calls in flight per tenant.
+        queue_timeout: Seconds a call may wait for a slot.
+        deadline: Seconds per call, queueing and retries included.
+        max_attempts: Attempts per model on 429/503.
+        base_delay: First backoff ceiling in seconds, doubled per retry.
+        max_delay: Largest backoff ceiling in seconds.
+        failure_threshold: Consecutive failures that open a model's circuit.
+        reset_timeout: Seconds a circuit stays open before a probe.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 32,
+        tenant_concurrency: int = 4,
+        queue_timeout: float = 10.0,
+        deadline: float = 60.0,
+        max_attempts: int = 4,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0
+    ):
+        if max_concurrency < 1 or tenant_concurrency < 1 or max_attempts < 1:
+            raise ValueError("concurrency limits and max_attempts must be at least 1")
+        self.max_concurrency = max_concurrency
+        self.tenant_concurrency = tenant_concurrency
+        self.queue_timeout = queue_timeout
+        self.deadline = deadline
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._per_tenant: Counter[str] = Counter()
+        self._waiters: deque[_Waiter] = deque()
+        self._waiting: Counter[str] = Counter()
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._counts: Counter[str] = Counter()
+        self._errors: Counter[int] = Counter()
+        self._max_queue_depth = 0
+
+    # Admission
+
+    def _has_slot(self, tenant: str) -> bool:
+        return self._in_flight < self.max_concurrency and self._per_tenant[tenant] < self.tenant_concurrency
+
+    def _take(self, tenant: str) -> None:
+        self._in_flight += 1
+        self._per_tenant[tenant] += 1
+
+    async def acquire(self, tenant: str, timeout: float) -> float:
+        """Wait for a slot (FIFO among tenants that have room); returns seconds waited."""
+        start = time.monotonic()
+        with self._lock:
+            # Waiters left in the queue while the process has room are held by
+            # their tenant's cap: only the same tenant's earlier calls go first
+            if self._has_slot(tenant) and not self._waiting[tenant]:
+                self._take(tenant)
+                return 0.0
+            waiter = _Waiter(tenant, asyncio.get_running_loop().create_future())
+            self._waiters.append(waiter)
+            self._waiting[tenant] += 1
+            self._max_queue_depth = max(self._max_queue_depth, len(self._waiters))
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as error:
+            with self._lock:
+                if waiter.granted:
+                    # Granted while timing out: the slot is ours after all
+                    if isinstance(error, asyncio.CancelledError):
+                        self._give_back(tenant)
+                        raise
+                    return time.monotonic() - start
+                self._dequeue(waiter)
+            if isinstance(error, asyncio.CancelledError):
+                raise
+            self._counts["queue_timeouts"] += 1
+            raise SchedulerTimeoutError(f"No model slot within {timeout:.1f}s") from None
+        return time.monotonic() - start
+
+    def release(self, tenant: str) -> None:
+        with self._lock:
+            self._give_back(tenant)
+
+    def _dequeue(self, waiter: _Waiter) -> None:
+        self._waiters.remove(waiter)
+        self._waiting[waiter.tenant] -= 1
+        if not self._waiting[waiter.tenant]:
+            del self._waiting[waiter.tenant]
+
+    def _give_back(self, tenant: str) -> None:
+        self._in_flight -= 1
+        self._per_tenant[tenant] -= 1
+        if not self._per_tenant[tenant]:
+            del self._per_tenant[tenant]
+        # Grant in arrival order to every waiter whose tenant has room
+        for waiter in list(self._waiters):
+            if self._in_flight >= self.max_concurrency:
+                break
+            if self._per_tenant[waiter.tenant] < self.tenant_concurrency:
+                self._dequeue(waiter)
+                self._take(waiter.tenant)
+                waiter.granted = True
+                loop = waiter.future.get_loop()
+                loop.call_soon_threadsafe(_resolve, waiter.future)
+
+    # Policy
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(model)
+            if breaker is None:
+                breaker = self._breakers[model] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay before retry number `attempt` (0-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counts[name] += amount
+
+    def count_error(self, code: int) -> None:
+        with self._lock:
+            self._errors[code] += 1
+
+    async def generate(
+        self,
+        models: list[BaseLlm],
+        llm_request: LlmRequest,
+        stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        """Run one model call through admission, retries, breakers and failover."""
+        tenant = _tenant.get()
+        started = time.monotonic()
+        expires = started + self.deadline
+        self.count("calls")
+        waited = await self.acquire(tenant, min(self.queue_timeout, self.deadline))
+        self.count("queue_wait_ms", int(waited * 1e3))
+        try:
+            last_error: Optional[Exception] = None
+            for index, model in enumerate(models):
+                breaker = self.breaker(model.model)
+                if index:
+                    if time.monotonic() >= expires:
+                        raise self._deadline_exceeded(last_error)
+                    self.count("fallbacks")
+                for attempt in range(self.max_attempts):
+                    if not breaker.allow():
+                        self.count("short_circuited")
+                        last_error = last_error or CircuitOpenError(f"Circuit open for {model.model}")
+                        break
+                    yielded = False
+                    verdict = False
+                    try:
+                        self.count("attempts")
+                        responses = model.generate_content_async(llm_request, stream)
+                        try:
+                            while True:
+                                try:
+                                    # The deadline bounds every wait on the model, not the caller's
+                                    async with asyncio.timeout(expires - time.monotonic()):
+                                        response = await anext(responses)
+                                except StopAsyncIteration:
+                                    break
+                                except TimeoutError:
+                                    raise self._deadline_exceeded(last_error)
+                                yielded = True
+                                yield response
+                        finally:
+                            await responses.aclose()
+                        breaker.record_success()
+                        verdict = True
+                        return
+                    except errors.APIError as error:
+                        self.count_error(error.code)
+                        if error.code not in RETRYABLE_CODES or yielded:
+                            raise
+                        breaker.record_failure()
+                        verdict = True
+                        last_error = error
+                    finally:
+                        if not verdict:
+                            breaker.release_probe()
+                    if breaker.state == "open":
+                        # This failure opened the circuit: fail over now rather than back off
+                        break
+                    if attempt + 1 < self.max_attempts:
+                        delay = self.backoff(attempt)
+                        if time.monotonic() + delay >= expires:
+                            raise self._deadline_exceeded(last_error)
+                        self.count("retries")
+                        await asyncio.sleep(delay)
+            self.count("failed")
+            raise last_error
+        finally:
+            self.release(tenant)
+
+    def _deadline_exceeded(self, cause: Optional[Exception]) -> SchedulerTimeoutError:
+        self.count("deadline_exceeded")
+        error = SchedulerTimeoutError(f"Model call deadline of {self.deadline:g}s exceeded")
+        error.__cause__ = cause
+        return error
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+            stats = {
+                "in_flight": self._in_flight,
+                "queue_depth": len(self._waiters),
+                "max_queue_depth": self._max_queue_depth,
+                "tenants_in_flight": len(self._per_tenant),
+                "errors": dict(self._errors),
+                "breakers": {model: breaker.state for model, breaker in self._breakers.items()},
+            }
+        for name in ("calls", "attempts", "retries", "fallbacks", "short_circuited",
+                     "queue_timeouts", "deadline_exceeded", "failed"):
+            stats[name] = counts.get(name, 0)
+        stats["queue_wait_ms"] = counts.get("queue_wait_ms", 0)
+        return stats
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(True)
+
+
+class ScheduledModel(BaseLlm):
+    """
+    A model whose calls go through the process-wide ModelScheduler.
+
+    Args:
+        primary: The model normally called.
+        fallback: The model called when the primary's circuit is open or
+            its retries are used up.
+    """
+    primary: BaseLlm
+    fallback: Optional[BaseLlm] = None
+
+    def __init__(self, primary: Union[BaseLlm, str], fallback: Union[BaseLlm, str, None] = None, **kwargs):
+        primary, fallback = _resolve_model(primary), _resolve_model(fallback)
+        super().__init__(model=primary.model, primary=primary, fallback=fallback, **kwargs)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        models = [self.primary] + ([self.fallback] if self.fallback is not None else [])
+        scheduler = get_model_scheduler()
+        async for response in scheduler.generate(models, llm_request, stream):
+            yield response
+
+
+def _resolve_model(model: Union[BaseLlm, str, None]) -> Optional[BaseLlm]:
+    if model is None or isinstance(model, BaseLlm):
+        return model
+    from google.adk.models.registry import LLMRegistry
+
+    return LLMRegistry.new_llm(model)
+
+
+@traced_callback
+def model_tenant_callback(
+    callback_context: CallbackContext,
+    llm_request: LlmRequest
+) -> Optional[LlmResponse]:
+    """before_model_callback: the session's user is the tenant for concurrency caps."""
+    _tenant.set(callback_context.user_id or DEFAULT_TENANT)
+    return None
+
+
+def default_model() -> Union[BaseLlm, str]:
+    """The agent's model from the environment: scheduled unless SEND_MONEY_MODEL_SCHEDULER=0."""
+    model = os.getenv("SEND_MONEY_MODEL", DEFAULT_MODEL)
+    if os.getenv("SEND_MONEY_MODEL_SCHEDULER") == "0":
+        return model
+    return ScheduledModel(model, os.getenv("SEND_MONEY_FALLBACK_MODEL") or None)
+
+
+_model_scheduler: Optional[ModelScheduler] = None
+_model_scheduler_lock = threading.Lock()
+
+
+def get_model_scheduler() -> ModelScheduler:
+    """Process-wide scheduler, configured from the environment on first use."""
+    global _model_scheduler
+    if _model_scheduler is None:
+        with _model_scheduler_lock:
+            if _model_scheduler is None:
+                _model_scheduler = ModelScheduler(
+                    max_concurrency=int(os.getenv("SEND_MONEY_MODEL_CONCURRENCY", 32)),
+                    tenant_concurrency=int(os.getenv("SEND_MONEY_TENANT_CONCURRENCY", 4)),
+                    queue_timeout=float(os.getenv("SEND_MONEY_MODEL_QUEUE_TIMEOUT", 10)),
+                    deadline=float(os.getenv("SEND_MONEY_MODEL_DEADLINE", 60)),
+                    max_attempts=int(os.getenv("SEND_MONEY_MODEL_ATTEMPTS", 4)),
+                    failure_threshold=int(os.getenv("SEND_MONEY_BREAKER_FAILURES", 5)),
+                    reset_timeout=float(os.getenv("SEND_MONEY_BREAKER_RESET", 30)),
+                )
+    return _model_scheduler
+
+
+def set_model_scheduler(scheduler: Optional[ModelScheduler]) -> None:
+    """Replace the process-wide scheduler (None: configure again from the environment)."""
+    global _model_scheduler
+    with _model_scheduler_lock:
+        _model_scheduler = scheduler
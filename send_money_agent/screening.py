@@ -0,0 +1,322 @@
+"""
+Beneficiary screening against a local watchlist.
+
+Names are screened in-process, inside the tool call, against an index built
+once from the watchlist file and memory-mapped on load: a list of millions
+of names costs page cache shared by every worker, and nothing is parsed at
+start-up.
+
+Names are normalized (accents stripped, case-folded, punctuation dropped)
+and split into tokens. Matching is token by token, in any order: a query
+token matches a listed token exactly or within one edit (insertion,
+deletion, substitution or adjacent transposition) when either is at least
+4 characters long. Fuzzy token lookup uses a deletion neighbourhood: every
+listed token is indexed under itself and each string obtained by deleting
+one character, so the query needs one lookup per deletion of its own
+tokens instead of a scan of the vocabulary.
+
+A name is scored like a Dice coefficient over characters:
+2·matched / (query characters + name characters), where an exact token
+match counts its length and a one-edit match one character less.
+
+Only names holding one of the query's rarest tokens are candidates: a name
+scoring at least `min_score` must match query tokens worth a minimum number
+of characters, so it contains a match of at least one token from any set
+whose complement falls short of that. The other tokens' contributions are
+then filled in with a binary search in their (sorted) posting lists.
+
+Index layout (one directory, written by `build_index`):
+    meta.json             format version, name and token counts
+    names.bin             UTF-8 names as listed, back to back
+    name_offsets.npy      int64[names + 1] into names.bin
+    name_lengths.npy      uint16 normalized characters per name
+    tokens.bin            normalized tokens, back to back
+    token_offsets.npy     int64[tokens + 1] into tokens.bin
+    posting_offsets.npy   int64[tokens + 1] into postings.npy
+    postings.npy          uint32 name numbers per token, ascending
+    variant_keys.npy      uint64 sorted hashes of tokens and their one-deletions
+    variant_tokens.npy    uint32 token behind each key
+
+Configuration (environment):
+    SEND_MONEY_WATCHLIST_INDEX        Index directory; screening is off when unset
+    SEND_MONEY_SCREENING_THRESHOLD    Score that puts a transfer on hold (default 0.8)
+
+Build an index from a file with one name per line, and query it:
+    python -m send_money_agent.watchlist build watchlist.txt watchlist-index/
+    python -m send_money_agent.watchlist search watchlist-index/ "Carlos Lopes"
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+import numpy as np
+
+INDEX_FORMAT = 1
+DEFAULT_MIN_SCORE = 0.6
+DEFAULT_HOLD_THRESHOLD = 0.8
+# Shorter tokens ("al", "bin", "da") only match exactly
+FUZZY_MIN_LENGTH = 4
+
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_name(name: str) -> str:
+    """Accents stripped, case-folded, tokens of [a-z0-9] separated by single spaces."""
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    return _NON_ALNUM_RE.sub(" ", ascii_name.casefold()).strip()
+
+
+def _variant_key(text: str) -> int:
+    """Stable 64-bit hash (the builtin hash() is salted per process)."""
+    return int.from_bytes(hashlib.blake2b(text.encode("ascii"), digest_size=8).digest(), "little")
+
+
+def _variants(token: str) -> set[str]:
+    """The token and, for fuzzy-length tokens, every one-character deletion of it."""
+    if len(token) < FUZZY_MIN_LENGTH:
+        return {token}
+    return {token, *(token[:i] + token[i + 1:] for i in range(len(token)))}
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """Restricted Damerau-Levenshtein distance of at most 1."""
+    if a == b:
+        return True
+    if len(a) > len(b):
+        a, b = b, a
+    if len(b) - len(a) > 1:
+        return False
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) < len(b):
+        return a[i:] == b[i + 1:]
+    if a[i + 1:] == b[i + 1:]:
+        return True
+    return i + 1 < len(a) and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]
+
+
+@dataclass(frozen=True)
+class WatchlistMatch:
+    """One watchlist entry resembling a screened name."""
+    entry: int          # line number in the watchlist, from 0
+    name: str
+    score: float        # 0..1, see the module docstring
+
+
+class WatchlistIndex:
+    """
+    Memory-mapped token index over a watchlist (see the module docstring).
+
+    Args:
+        directory: Directory written by `build_index`.
+    """
+
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as meta_file:
+            meta = json.load(meta_file)
+        if meta.get("format") != INDEX_FORMAT:
+            raise ValueError(f"{directory}: unsupported watchlist index format {meta.get('format')!r}")
+        self.directory = directory
+        self.meta = meta
+
+        # Plain ndarray views of the mappings: np.memmap slicing costs ~2 µs a call
+        def array_file(name: str) -> np.ndarray:
+            return np.asarray(np.load(os.path.join(directory, name), mmap_mode="r"))
+
+        def bytes_file(name: str) -> np.ndarray:
+            path = os.path.join(directory, name)
+            if not os.path.getsize(path):
+                return np.zeros(0, dtype=np.uint8)
+            return np.asarray(np.memmap(path, dtype=np.uint8, mode="r"))
+
+        self._names = bytes_file("names.bin")
+        self._name_offsets = array_file("name_offsets.npy")
+        self._name_lengths = array_file("name_lengths.npy")
+        self._tokens = bytes_file("tokens.bin")
+        self._token_offsets = array_file("token_offsets.npy")
+        self._posting_offsets = array_file("posting_offsets.npy")
+        self._postings = array_file("postings.npy")
+        self._variant_keys = array_file("variant_keys.npy")
+        self._variant_tokens = array_file("variant_tokens.npy")
+
+    def __len__(self) -> int:
+        return len(self._name_lengths)
+
+    def name(self, entry: int) -> str:
+        start, end = self._name_offsets[entry], self._name_offsets[entry + 1]
+        return self._names[start:end].tobytes().decode("utf-8")
+
+    def _token(self, token_id: int) -> str:
+        start, end = self._token_offsets[token_id], self._token_offsets[token_id + 1]
+        return self._tokens[start:end].tobytes().decode("ascii")
+
+    def _postings_of(self, token_id: int) -> np.ndarray:
+        return self._postings[self._posting_offsets[token_id]:self._posting_offsets[token_id + 1]]
+
+    def _token_matches(self, query_token: str) -> list[tuple[int, float]]:
+        """(token id, weight) of every listed token within reach of a query token."""
+        keys = np.fromiter((_variant_key(variant) for variant in _variants(query_token)), dtype=np.uint64)
+        lows = np.searchsorted(self._variant_keys, keys, side="left")
+        highs = np.searchsorted(self._variant_keys, keys, side="right")
+        token_ids = {token_id for low, high in zip(lows.tolist(), highs.tolist())
+                     for token_id in self._variant_tokens[low:high].tolist()}
+        matches = []
+        for token_id in token_ids:
+            token = self._token(token_id)
+            if token == query_token:
+                matches.append((token_id, float(len(query_token))))
+            elif max(len(token), len(query_token)) >= FUZZY_MIN_LENGTH and _within_one_edit(token, query_token):
+                matches.append((token_id, float(len(query_token) - 1)))
+        return matches
+
+    def search(self, name: str, limit: int = 5, min_score: float = DEFAULT_MIN_SCORE) -> list[WatchlistMatch]:
+        """Entries scoring at least `min_score` against `name`, best first."""
+        query_tokens = list(dict.fromkeys(normalize_name(name).split()))
+        query_length = sum(len(token) for token in query_tokens)
+        if not query_tokens or not len(self):
+            return []
+        matches = [self._token_matches(token) for token in query_tokens]
+        weights = [len(token) for token in query_tokens]
+        postings_of = {token_id: self._postings_of(token_id) for token_matches in matches for token_id, _ in token_matches}
+        volumes = [sum(len(postings_of[token_id]) for token_id, _ in token_matches) for token_matches in matches]
+
+        # A name scoring min_score matches at least `needed` query characters;
+        # generate candidates from the rarest tokens until the rest can't reach it
+        needed = min_score * query_length / (2 - min_score) - 1e-9
+        order = sorted(range(len(query_tokens)), key=volumes.__getitem__)
+        remaining = query_length
+        generators = []
+        for i in order:
+            if remaining < needed:
+                break
+            generators.append(i)
+            remaining -= weights[i]
+        postings = [postings_of[token_id] for i in generators for token_id, _ in matches[i]]
+        postings = [p for p in postings if len(p)]
+        if not postings:
+            return []
+        candidates = np.unique(np.concatenate(postings))
+
+        matched = np.zeros((len(query_tokens), len(candidates)))
+        for i, token_matches in enumerate(matches):
+            for token_id, weight in token_matches:
+                token_postings = postings_of[token_id]
+                if not len(token_postings):
+                    continue
+                found = np.searchsorted(token_postings, candidates)
+                hit = token_postings[np.minimum(found, len(token_postings) - 1)] == candidates
+                np.maximum(matched[i], np.where(hit, weight, 0.0), out=matched[i])
+        lengths = self._name_lengths[candidates].astype(np.float64)
+        scores = np.minimum(2 * matched.sum(axis=0) / (query_length + lengths), 1.0)
+
+        keep = np.flatnonzero(scores >= min_score)
+        if len(keep) > limit:
+            keep = keep[np.argpartition(-scores[keep], limit - 1)[:limit]]
+        keep = keep[np.lexsort((candidates[keep], -scores[keep]))]
+        return [
+            WatchlistMatch(entry=int(candidates[k]), name=self.name(int(candidates[k])), score=round(float(scores[k]), 4))
+            for k in keep
+        ]
+
+
+def build_index(names: Iterable[str], directory: str) -> int:
+    """Write the index for `names` (one entry each, in order) to `directory`; returns the name count."""
+    os.makedirs(directory, exist_ok=True)
+    vocabulary: dict[str, int] = {}
+    occurrence_tokens, occurrence_names = array("I"), array("I")
+    name_offsets, name_lengths = array("q", [0]), array("H")
+
+    with open(os.path.join(directory, "names.bin"), "wb") as names_file:
+        for number, name in enumerate(names):
+            encoded = name.strip().encode("utf-8")
+            names_file.write(encoded)
+            name_offsets.append(name_offsets[-1] + len(encoded))
+            tokens = set(normalize_name(name).split())
+            name_lengths.append(min(sum(map(len, tokens)), 65535))
+            for token in tokens:
+                occurrence_tokens.append(vocabulary.setdefault(token, len(vocabulary)))
+                occurrence_names.append(number)
+    total = len(name_lengths)
+
+    # Postings grouped by token; the stable sort keeps each token's names ascending
+    token_ids = np.frombuffer(occurrence_tokens, dtype=np.uint32)
+    order = np.argsort(token_ids, kind="stable")
+    postings = np.frombuffer(occurrence_names, dtype=np.uint32)[order]
+    posting_offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(token_ids, minlength=len(vocabulary)), out=posting_offsets[1:])
+
+    tokens = list(vocabulary)
+    keys, variant_tokens = array("Q"), array("I")
+    for token_id, token in enumerate(tokens):
+        for variant in _variants(token):
+            keys.append(_variant_key(variant))
+            variant_tokens.append(token_id)
+    keys = np.frombuffer(keys, dtype=np.uint64)
+    order = np.argsort(keys, kind="stable")
+
+    token_bytes = [token.encode("ascii") for token in tokens]
+    token_offsets = np.zeros(len(tokens) + 1, dtype=np.int64)
+    np.cumsum([len(token) for token in token_bytes], out=token_offsets[1:])
+    with open(os.path.join(directory, "tokens.bin"), "wb") as tokens_file:
+        tokens_file.write(b"".join(token_bytes))
+
+    arrays = {
+        "name_offsets.npy": np.frombuffer(name_offsets, dtype=np.int64),
+        "name_lengths.npy": np.frombuffer(name_lengths, dtype=np.uint16),
+        "token_offsets.npy": token_offsets,
+        "posting_offsets.npy": posting_offsets,
+        "postings.npy": postings,
+        "variant_keys.npy": keys[order],
+        "variant_tokens.npy": np.frombuffer(variant_tokens, dtype=np.uint32)[order],
+    }
+    for file_name, values in arrays.items():
+        np.save(os.path.join(directory, file_name), values)
+    with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as meta_file:
+        json.dump({"format": INDEX_FORMAT, "names": total, "tokens": len(tokens), "built_at": time.time()}, meta_file)
+    return total
+
+
+_watchlist: Optional[WatchlistIndex] = None
+_watchlist_loaded = False
+_watchlist_lock = threading.Lock()
+
+
+def get_watchlist() -> Optional[WatchlistIndex]:
+    """Process-wide watchlist index from SEND_MONEY_WATCHLIST_INDEX, or None when unset."""
+    global _watchlist, _watchlist_loaded
+    if not _watchlist_loaded:
+        with _watchlist_lock:
+            if not _watchlist_loaded:
+                directory = os.getenv("SEND_MONEY_WATCHLIST_INDEX")
+                _watchlist = WatchlistIndex(directory) if directory else None
+                _watchlist_loaded = True
+    return _watchlist
+
+
+def set_watchlist(watchlist: Optional[WatchlistIndex]) -> None:
+    """Replace the process-wide watchlist (None turns screening off)."""
+    global _watchlist, _watchlist_loaded
+    _watchlist = watchlist
+    _watchlist_loaded = True
+
+
+def screen_beneficiary(name: str) -> tuple[str, list[WatchlistMatch]]:
+    """
+    Screen a beneficiary name: ("hold", matches) for a potential watchlist
+    match, ("clear", []) otherwise, ("", []) when screening is off.
+    """
+    watchlist = get_watchlist()
+    if watchlist is None or not name:
+        return "", []
+    threshold = float(os.getenv("SEND_MONEY_SCREENING_THRESHOLD", DEFAULT_HOLD_THRESHOLD))
+    matches = watchlist.search(name, min_score=threshold)
+    return ("hold", matches) if matches else ("clear", [])
+
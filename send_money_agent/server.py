@@ -0,0 +1,343 @@
+"""
+Streaming HTTP service for the Send Money agent (FastAPI + uvicorn).
+
+Each user message is answered as a server-sent event stream, so the client
+shows the reply while the model is still producing it:
+
+    POST /sessions                          {"user_id": ...} -> {"session_id": ...}
+    POST /sessions/{session_id}/messages    {"user_id": ..., "text": ...} -> text/event-stream
+    GET  /sessions/{session_id}?user_id=    current transfer state
+    GET  /metrics                           this worker's latency percentiles, model scheduler and export
+    GET  /healthz
+
+Stream events, each `data` a JSON object:
+    delta     {"text"}                     partial model output, as it arrives
+    message   {"author", "text"}           a complete message (streamed or not)
+    tool      {"calls"} / {"results"}      function calls and their results
+    done      {"ttft_ms", "turn_ms", "stage", "transaction_id"} (the last two
+              when the turn changed them, else null)
+    error     {"message"}
+
+Time to first token (request received -> first reply text sent, streamed
+delta or whole message) and full-turn latency are measured per request,
+sent in `done`, kept per worker for /metrics and recorded on a
+`server.turn` span.
+
+Workers are separate processes: sessions live in the SQLite session store
+and the ledger is opened in shared mode, so any worker can serve any turn.
+
+Usage (from the repository root):
+    python -m send_money_agent.server --workers 4 --port 8000
+    python -m send_money_agent.server --fake-model --fake-latency 0.5   # offline
+
+Configuration (environment, set by the command line for every worker):
+    SEND_MONEY_SESSION_DB          SQLite session file, or "memory" (one worker only)
+                                   (default: sessions.db)
+    SEND_MONEY_SERVER_STREAMING    0 to send whole messages only
+    SEND_MONEY_FAKE_MODEL          1 to answer with FakeModel instead of Gemini
+    SEND_MONEY_FAKE_LATENCY        FakeModel seconds before the first chunk
+    SEND_MONEY_FAKE_CHUNK_DELAY    FakeModel seconds between streamed chunks
+    SEND_MONEY_FAKE_FAULT_RATE     Share of FakeModel calls failing with 503
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from google.adk.agents import BaseAgent, RunConfig
+from google.adk.agents.run_config import StreamingMode
+from google.adk.runners import Runner
+from google.adk.sessions import BaseSessionService, InMemorySessionService
+from google.adk.sessions.base_session_service import GetSessionConfig
+from google.genai import types
+from pydantic import BaseModel
+
+from .export import get_exporter
+from .scheduler import ScheduledModel, get_model_scheduler
+from .session_store import SqliteSessionService
+from .tracing import TRACER
+
+APP_NAME = "send_money_agent"
+DEFAULT_SESSION_DB = "sessions.db"
+# Latencies kept per metric for percentiles
+MAX_SAMPLES = 10_000
+# uvicorn restarts a worker that misses a ping for this long; building the
+# agent in several workers at once on few cores can take longer than its 5 s
+WORKER_HEALTHCHECK_TIMEOUT = 60
+
+
+class NewSession(BaseModel):
+    user_id: str
+
+
+class UserMessage(BaseModel):
+    user_id: str
+    text: str
+
+
+class LatencyStats:
+    """Recent time-to-first-token and full-turn latencies of this process."""
+
+    def __init__(self, max_samples: int = MAX_SAMPLES):
+        self.turns = 0
+        self.errors = 0
+        self.disconnects = 0
+        self._ttft: deque[float] = deque(maxlen=max_samples)
+        self._turn: deque[float] = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+
+    def record(self, ttft: Optional[float], turn: float) -> None:
+        with self._lock:
+            self.turns += 1
+            if ttft is not None:
+                self._ttft.append(ttft)
+            self._turn.append(turn)
+
+    def record_error(self, disconnected: bool = False) -> None:
+        """A turn that failed, or that the client left before it finished."""
+        with self._lock:
+            if disconnected:
+                self.disconnects += 1
+            else:
+                self.errors += 1
+
+    @staticmethod
+    def _summary(samples: list[float]) -> dict:
+        ordered = sorted(samples)
+        if not ordered:
+            return {"count": 0}
+        summary = {"count": len(ordered)}
+        for q in (50, 95, 99):
+            summary[f"p{q}_ms"] = ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))] * 1e3
+        return summary
+
+    def stats(self) -> dict:
+        with self._lock:
+            ttft, turn = list(self._ttft), list(self._turn)
+            turns, errors, disconnects = self.turns, self.errors, self.disconnects
+        return {
+            "pid": os.getpid(),
+            "turns": turns,
+            "errors": errors,
+            "disconnects": disconnects,
+            "ttft": self._summary(ttft),
+            "turn": self._summary(turn),
+        }
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def default_agent() -> BaseAgent:
+    """root_agent, backed by FakeModel (scheduled like the real one) when SEND_MONEY_FAKE_MODEL=1."""
+    from .agent import root_agent
+
+    if os.getenv("SEND_MONEY_FAKE_MODEL") != "1":
+        return root_agent
+    from .fake_model import FakeModel
+
+    model = FakeModel(
+        latency=float(os.getenv("SEND_MONEY_FAKE_LATENCY", "0")),
+        chunk_delay=float(os.getenv("SEND_MONEY_FAKE_CHUNK_DELAY", "0")),
+        fault_rate=float(os.getenv("SEND_MONEY_FAKE_FAULT_RATE", "0")),
+    )
+    if isinstance(root_agent.model, ScheduledModel):
+        model = ScheduledModel(model)
+    return root_agent.clone(update={"model": model})
+
+
+def default_session_service() -> BaseSessionService:
+    db_path = os.getenv("SEND_MONEY_SESSION_DB", DEFAULT_SESSION_DB)
+    if db_path == "memory":
+        return InMemorySessionService()
+    return SqliteSessionService(db_path)
+
+
+def create_app(
+    agent: Optional[BaseAgent] = None,
+    session_service: Optional[BaseSessionService] = None,
+    streaming: Optional[bool] = None
+) -> FastAPI:
+    """
+    The HTTP app; also the uvicorn factory every worker calls.
+
+    Args:
+        agent: Agent to serve (default: `default_agent()`).
+        session_service: Session store (default: from SEND_MONEY_SESSION_DB).
+        streaming: Stream partial model output; False sends whole messages
+            only (default: unless SEND_MONEY_SERVER_STREAMING=0).
+    """
+    if streaming is None:
+        streaming = os.getenv("SEND_MONEY_SERVER_STREAMING") != "0"
+    runner = Runner(
+        agent=agent or default_agent(),
+        app_name=APP_NAME,
+        session_service=session_service or default_session_service(),
+    )
+    run_config = RunConfig(streaming_mode=StreamingMode.SSE if streaming else StreamingMode.NONE)
+    latency = LatencyStats()
+    app = FastAPI(title="Send Money agent")
+    app.state.runner = runner
+    app.state.latency = latency
+
+    @app.get("/healthz")
+    async def healthz() -> dict:
+        return {"status": "ok"}
+
+    @app.get("/metrics")
+    async def metrics() -> dict:
+        exporter = get_exporter()
+        return {
+            **latency.stats(),
+            "scheduler": get_model_scheduler().stats(),
+            "export": exporter.stats() if exporter is not None else None,
+        }
+
+    @app.post("/sessions")
+    async def create_session(request: NewSession) -> dict:
+        session = await runner.session_service.create_session(app_name=APP_NAME, user_id=request.user_id)
+        return {"session_id": session.id}
+
+    @app.get("/sessions/{session_id}")
+    async def get_session(session_id: str, user_id: str) -> dict:
+        session = await runner.session_service.get_session(
+            app_name=APP_NAME, user_id=user_id, session_id=session_id
+        )
+        if session is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+        return {"session_id": session.id, "state": session.state}
+
+    @app.post("/sessions/{session_id}/messages")
+    async def send_message(session_id: str, request: UserMessage) -> StreamingResponse:
+        received = time.perf_counter()
+        # Existence check only: the runner loads the session itself
+        session = await runner.session_service.get_session(
+            app_name=APP_NAME, user_id=request.user_id, session_id=session_id,
+            config=GetSessionConfig(num_recent_events=0),
+        )
+        if session is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+        return StreamingResponse(
+            _turn_events(runner, run_config, latency, request.user_id, session_id, request.text, received),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    return app
+
+
+async def _turn_events(
+    runner: Runner,
+    run_config: RunConfig,
+    latency: LatencyStats,
+    user_id: str,
+    session_id: str,
+    text: str,
+    received: float
+) -> AsyncIterator[str]:
+    """SSE frames for one turn, timing the first reply text and the whole turn."""
+    span = TRACER.start_span("server.turn", attributes={"send_money.session_id": session_id})
+    first_text: Optional[float] = None
+    stage, transaction_id = None, None
+    message = types.Content(role='user', parts=[types.Part(text=text)])
+    try:
+        try:
+            async for event in runner.run_async(
+                user_id=user_id, session_id=session_id, new_message=message, run_config=run_config
+            ):
+                if event.actions and event.actions.state_delta:
+                    stage = event.actions.state_delta.get('stage', stage)
+                    transaction_id = event.actions.state_delta.get('transaction_id', transaction_id)
+                if event.author == 'user' or event.content is None:
+                    continue
+                parts = event.content.parts or []
+                reply = "".join(part.text for part in parts if part.text and not part.thought)
+                if reply and first_text is None:
+                    first_text = time.perf_counter()
+                if event.partial:
+                    if reply:
+                        yield _sse("delta", {"text": reply})
+                    continue
+                calls = [{"name": part.function_call.name, "args": part.function_call.args}
+                         for part in parts if part.function_call]
+                results = [{"name": part.function_response.name, "response": part.function_response.response}
+                           for part in parts if part.function_response]
+                if calls:
+                    yield _sse("tool", {"calls": calls})
+                if results:
+                    yield _sse("tool", {"results": results})
+                if reply:
+                    yield _sse("message", {"author": event.author, "text": reply})
+        except Exception as error:
+            latency.record_error()
+            span.record_exception(error)
+            yield _sse("error", {"message": str(error)})
+            return
+        except (GeneratorExit, asyncio.CancelledError):
+            # The client went away mid-turn
+            latency.record_error(disconnected=True)
+            span.set_attribute("send_money.disconnected", True)
+            raise
+
+        finished = time.perf_counter()
+        ttft = first_text - received if first_text is not None else None
+        latency.record(ttft, finished - received)
+        span.set_attribute("send_money.turn_ms", (finished - received) * 1e3)
+        if ttft is not None:
+            span.set_attribute("send_money.ttft_ms", ttft * 1e3)
+        yield _sse("done", {
+            "ttft_ms": ttft * 1e3 if ttft is not None else None,
+            "turn_ms": (finished - received) * 1e3,
+            "stage": stage,
+            "transaction_id": transaction_id,
+        })
+    finally:
+        span.end()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--session-db", default=os.getenv("SEND_MONEY_SESSION_DB", DEFAULT_SESSION_DB),
+                        help='SQLite session file, or "memory" with one worker')
+    parser.add_argument("--no-stream", action="store_true", help="send whole messages only")
+    parser.add_argument("--fake-model", action="store_true", help="answer with FakeModel (no API key needed)")
+    parser.add_argument("--fake-latency", type=float, default=0.0)
+    parser.add_argument("--fake-chunk-delay", type=float, default=0.0)
+    parser.add_argument("--fake-fault-rate", type=float, default=0.0, help="share of FakeModel calls failing with 503")
+    args = parser.parse_args()
+    if args.workers > 1 and args.session_db == "memory":
+        parser.error("in-memory sessions cannot be shared between workers; use a --session-db file")
+
+    # Workers are fresh processes: they read their configuration from the environment
+    os.environ["SEND_MONEY_SESSION_DB"] = args.session_db
+    if args.workers > 1:
+        os.environ["SEND_MONEY_LEDGER_SHARED"] = "1"
+    if args.no_stream:
+        os.environ["SEND_MONEY_SERVER_STREAMING"] = "0"
+    if args.fake_model:
+        os.environ["SEND_MONEY_FAKE_MODEL"] = "1"
+        os.environ["SEND_MONEY_FAKE_LATENCY"] = str(args.fake_latency)
+        os.environ["SEND_MONEY_FAKE_CHUNK_DELAY"] = str(args.fake_chunk_delay)
+        os.environ["SEND_MONEY_FAKE_FAULT_RATE"] = str(args.fake_fault_rate)
+
+    import uvicorn
+
+    uvicorn.run(
+        "send_money_agent.server:create_app", factory=True,
+        host=args.host, port=args.port, workers=args.workers,
+        timeout_worker_healthcheck=WORKER_HEALTHCHECK_TIMEOUT,
+    )
+
+
+if __name__ == "__main__":
+    main()
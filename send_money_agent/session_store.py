@@ -0,0 +1,525 @@
+"""
+SQLite-backed session service for the Send Money agent.
+
+Stores sessions, events and app/user/session state in one SQLite file so
+in-flight transfers survive restarts and several processes can share them.
+
+- WAL journal mode with synchronous=NORMAL: readers never block the writer.
+- A small pool of connections, each with a prepared-statement cache; all
+  SQL is issued from module-level constants so statements are reused.
+- Group commit: events appended concurrently are written together in one
+  transaction (with one UPDATE per touched session) by a single writer.
+- Resume without history: `get_session(config=GetSessionConfig(
+  num_recent_events=0))` or `load_state()` read the current state only.
+
+Use it with `adk web`/`adk run` through `services.py` at the repository root:
+    adk web --session_service_uri sendmoney:///sessions.db
+"""
+import asyncio
+import contextlib
+import json
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from google.adk.errors.already_exists_error import AlreadyExistsError
+from google.adk.events.event import Event
+from google.adk.sessions.base_session_service import (
+    BaseSessionService,
+    GetSessionConfig,
+    ListSessionsResponse,
+)
+from google.adk.sessions.session import Session
+from google.adk.sessions.state import State
+
+from .tracing import TRACER
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS app_states (
+    app_name TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    update_time REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS user_states (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    update_time REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id)
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    create_time REAL NOT NULL,
+    update_time REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, id)
+);
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY,
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    invocation_id TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    event_data TEXT NOT NULL,
+    FOREIGN KEY (app_name, user_id, session_id)
+        REFERENCES sessions (app_name, user_id, id) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS events_by_session ON events (app_name, user_id, session_id, seq);
+"""
+
+SELECT_SESSION = "SELECT state, update_time FROM sessions WHERE app_name=? AND user_id=? AND id=?"
+SELECT_SESSIONS_FOR_USER = "SELECT id, user_id, state, update_time FROM sessions WHERE app_name=? AND user_id=?"
+SELECT_SESSIONS_FOR_APP = "SELECT id, user_id, state, update_time FROM sessions WHERE app_name=?"
+INSERT_SESSION = (
+    "INSERT INTO sessions (app_name, user_id, id, state, create_time, update_time)"
+    " VALUES (?, ?, ?, ?, ?, ?)"
+)
+UPDATE_SESSION = "UPDATE sessions SET state=?, update_time=? WHERE app_name=? AND user_id=? AND id=?"
+DELETE_SESSION = "DELETE FROM sessions WHERE app_name=? AND user_id=? AND id=?"
+SELECT_APP_STATE = "SELECT state FROM app_states WHERE app_name=?"
+UPSERT_APP_STATE = (
+    "INSERT INTO app_states (app_name, state, update_time) VALUES (?, ?, ?)"
+    " ON CONFLICT (app_name) DO UPDATE SET state=excluded.state, update_time=excluded.update_time"
+)
+SELECT_USER_STATE = "SELECT state FROM user_states WHERE app_name=? AND user_id=?"
+SELECT_USER_STATES = "SELECT user_id, state FROM user_states WHERE app_name=?"
+UPSERT_USER_STATE = (
+    "INSERT INTO user_states (app_name, user_id, state, update_time) VALUES (?, ?, ?, ?)"
+    " ON CONFLICT (app_name, user_id) DO UPDATE SET state=excluded.state, update_time=excluded.update_time"
+)
+INSERT_EVENT = (
+    "INSERT INTO events (app_name, user_id, session_id, id, invocation_id, timestamp, event_data)"
+    " VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+SELECT_RECENT_EVENTS = (
+    "SELECT event_data FROM events WHERE app_name=? AND user_id=? AND session_id=?"
+    " AND timestamp >= ? ORDER BY seq DESC LIMIT ?"
+)
+
+# Float tolerance when comparing the stored update_time with the in-memory one
+STALE_TOLERANCE = 1e-6
+
+
+def split_state(state: Optional[dict[str, Any]]) -> tuple[dict, dict, dict]:
+    """Split a state dict into (app, user, session) scopes; temp: keys are dropped."""
+    app_state, user_state, session_state = {}, {}, {}
+    for key, value in (state or {}).items():
+        if key.startswith(State.APP_PREFIX):
+            app_state[key[len(State.APP_PREFIX):]] = value
+        elif key.startswith(State.USER_PREFIX):
+            user_state[key[len(State.USER_PREFIX):]] = value
+        elif not key.startswith(State.TEMP_PREFIX):
+            session_state[key] = value
+    return app_state, user_state, session_state
+
+
+def merge_state(app_state: dict, user_state: dict, session_state: dict) -> dict[str, Any]:
+    """Inverse of split_state: the flat, prefixed view a Session exposes."""
+    merged = dict(session_state)
+    merged.update({State.APP_PREFIX + key: value for key, value in app_state.items()})
+    merged.update({State.USER_PREFIX + key: value for key, value in user_state.items()})
+    return merged
+
+
+class ConnectionPool:
+    """Fixed-size pool of SQLite connections configured for WAL."""
+
+    def __init__(self, db_path: str, size: int = 4, busy_timeout_ms: int = 5000):
+        self.db_path = db_path
+        self.size = size
+        self.busy_timeout_ms = busy_timeout_ms
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._all: list[sqlite3.Connection] = []
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            self.db_path, check_same_thread=False, isolation_level=None, cached_statements=256
+        )
+        self._enable_wal(connection)
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA foreign_keys=ON")
+        connection.execute(f"PRAGMA busy_timeout={self.busy_timeout_ms}")
+        return connection
+
+    def _enable_wal(self, connection: sqlite3.Connection) -> None:
+        """
+        Switch to WAL, retrying while another process holds the lock.
+
+        Switching needs an exclusive lock and SQLite fails it at once instead
+        of waiting, e.g. when several server workers open a new file together.
+        """
+        deadline = time.monotonic() + self.busy_timeout_ms / 1000
+        while True:
+            try:
+                connection.execute("PRAGMA journal_mode=WAL")
+                return
+            except sqlite3.OperationalError as error:
+                if "locked" not in str(error) or time.monotonic() > deadline:
+                    raise
+                time.sleep(0.01)
+
+    @contextlib.contextmanager
+    def connection(self):
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.size
+                if create:
+                    self._created += 1
+            if create:
+                connection = self._connect()
+                self._all.append(connection)
+            else:
+                connection = self._idle.get()
+        try:
+            yield connection
+        finally:
+            self._idle.put(connection)
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """A write transaction (BEGIN IMMEDIATE takes the write lock up front)."""
+        with self.connection() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def close(self) -> None:
+        for connection in self._all:
+            connection.close()
+        self._all.clear()
+        self._created = 0
+        self._idle = queue.LifoQueue()
+
+
+@dataclass
+class _PendingEvent:
+    """An event waiting for the next group commit."""
+    app_name: str
+    user_id: str
+    session_id: str
+    expected_update_time: float
+    event_id: str
+    invocation_id: str
+    timestamp: float
+    event_data: str
+    state_delta: dict
+    future: asyncio.Future
+
+    @property
+    def session_key(self) -> tuple[str, str, str]:
+        return self.app_name, self.user_id, self.session_id
+
+
+class SqliteSessionService(BaseSessionService):
+    """
+    Session service storing sessions, events and state deltas in SQLite.
+
+    Args:
+        db_path: SQLite database file.
+        pool_size: Number of pooled connections.
+        max_batch: Most events written in one group-commit transaction.
+        default_recent_events: Events loaded by get_session() when no config
+            is given (None loads the full history).
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        pool_size: int = 4,
+        max_batch: int = 512,
+        default_recent_events: Optional[int] = None
+    ):
+        self.db_path = db_path
+        self.max_batch = max_batch
+        self.default_recent_events = default_recent_events
+        self._pool = ConnectionPool(db_path, size=pool_size)
+        with self._pool.connection() as connection:
+            connection.executescript(SCHEMA)
+        self._pending: list[_PendingEvent] = []
+        self._flush_scheduled = False
+        self._flush_tasks: set[asyncio.Task] = set()
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.batches_written = 0
+        self.events_written = 0
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        self._pool.close()
+
+    # -- Reads -----------------------------------------------------------
+
+    @staticmethod
+    def _read_scoped_state(connection: sqlite3.Connection, app_name: str, user_id: str) -> tuple[dict, dict]:
+        row = connection.execute(SELECT_APP_STATE, (app_name,)).fetchone()
+        app_state = json.loads(row[0]) if row else {}
+        row = connection.execute(SELECT_USER_STATE, (app_name, user_id)).fetchone()
+        user_state = json.loads(row[0]) if row else {}
+        return app_state, user_state
+
+    def _get_session_sync(
+        self, app_name: str, user_id: str, session_id: str, config: Optional[GetSessionConfig]
+    ) -> Optional[Session]:
+        num_recent_events = config.num_recent_events if config else self.default_recent_events
+        after_timestamp = (config.after_timestamp if config else None) or 0.0
+        with self._pool.connection() as connection:
+            row = connection.execute(SELECT_SESSION, (app_name, user_id, session_id)).fetchone()
+            if row is None:
+                return None
+            session_state, update_time = json.loads(row[0]), row[1]
+            app_state, user_state = self._read_scoped_state(connection, app_name, user_id)
+            events = []
+            if num_recent_events != 0:
+                rows = connection.execute(
+                    SELECT_RECENT_EVENTS,
+                    (app_name, user_id, session_id, after_timestamp,
+                     num_recent_events if num_recent_events else -1)
+                ).fetchall()
+                events = [Event.model_validate_json(data) for (data,) in reversed(rows)]
+        return Session(
+            app_name=app_name,
+            user_id=user_id,
+            id=session_id,
+            state=merge_state(app_state, user_state, session_state),
+            events=events,
+            last_update_time=update_time,
+        )
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        await self._drain()
+        return await asyncio.to_thread(self._get_session_sync, app_name, user_id, session_id, config)
+
+    async def load_state(self, *, app_name: str, user_id: str, session_id: str) -> Optional[dict[str, Any]]:
+        """Current state of a session without reading any of its events."""
+        session = await self.get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id,
+            config=GetSessionConfig(num_recent_events=0),
+        )
+        return session.state if session else None
+
+    def _list_sessions_sync(self, app_name: str, user_id: Optional[str]) -> ListSessionsResponse:
+        with self._pool.connection() as connection:
+            if user_id:
+                rows = connection.execute(SELECT_SESSIONS_FOR_USER, (app_name, user_id)).fetchall()
+                row = connection.execute(SELECT_USER_STATE, (app_name, user_id)).fetchone()
+                user_states = {user_id: json.loads(row[0])} if row else {}
+            else:
+                rows = connection.execute(SELECT_SESSIONS_FOR_APP, (app_name,)).fetchall()
+                user_states = {
+                    uid: json.loads(state)
+                    for uid, state in connection.execute(SELECT_USER_STATES, (app_name,))
+                }
+            row = connection.execute(SELECT_APP_STATE, (app_name,)).fetchone()
+            app_state = json.loads(row[0]) if row else {}
+        sessions = [
+            Session(
+                app_name=app_name,
+                user_id=uid,
+                id=session_id,
+                state=merge_state(app_state, user_states.get(uid, {}), json.loads(state)),
+                events=[],
+                last_update_time=update_time,
+            )
+            for session_id, uid, state, update_time in rows
+        ]
+        return ListSessionsResponse(sessions=sessions)
+
+    async def list_sessions(self, *, app_name: str, user_id: Optional[str] = None) -> ListSessionsResponse:
+        await self._drain()
+        return await asyncio.to_thread(self._list_sessions_sync, app_name, user_id)
+
+    # -- Writes ----------------------------------------------------------
+
+    @staticmethod
+    def _upsert_scoped_state(
+        connection: sqlite3.Connection, app_name: str, user_id: str,
+        app_delta: dict, user_delta: dict, now: float
+    ) -> None:
+        if not app_delta and not user_delta:
+            return
+        app_state, user_state = SqliteSessionService._read_scoped_state(connection, app_name, user_id)
+        if app_delta:
+            app_state.update(app_delta)
+            connection.execute(UPSERT_APP_STATE, (app_name, json.dumps(app_state), now))
+        if user_delta:
+            user_state.update(user_delta)
+            connection.execute(UPSERT_USER_STATE, (app_name, user_id, json.dumps(user_state), now))
+
+    def _create_session_sync(
+        self, app_name: str, user_id: str, state: Optional[dict], session_id: str
+    ) -> Session:
+        now = time.time()
+        app_delta, user_delta, session_state = split_state(state)
+        with self._pool.transaction() as connection:
+            if connection.execute(SELECT_SESSION, (app_name, user_id, session_id)).fetchone():
+                raise AlreadyExistsError(f"Session with id {session_id} already exists.")
+            self._upsert_scoped_state(connection, app_name, user_id, app_delta, user_delta, now)
+            connection.execute(
+                INSERT_SESSION, (app_name, user_id, session_id, json.dumps(session_state), now, now)
+            )
+            app_state, user_state = self._read_scoped_state(connection, app_name, user_id)
+        return Session(
+            app_name=app_name,
+            user_id=user_id,
+            id=session_id,
+            state=merge_state(app_state, user_state, session_state),
+            events=[],
+            last_update_time=now,
+        )
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        session_id = (session_id or "").strip() or str(uuid.uuid4())
+        return await asyncio.to_thread(self._create_session_sync, app_name, user_id, state, session_id)
+
+    def _delete_session_sync(self, app_name: str, user_id: str, session_id: str) -> None:
+        with self._pool.transaction() as connection:
+            connection.execute(DELETE_SESSION, (app_name, user_id, session_id))
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        await self._drain()
+        await asyncio.to_thread(self._delete_session_sync, app_name, user_id, session_id)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        event = self._trim_temp_delta_state(event)
+        loop = asyncio.get_running_loop()
+        pending = _PendingEvent(
+            app_name=session.app_name,
+            user_id=session.user_id,
+            session_id=session.id,
+            expected_update_time=session.last_update_time,
+            event_id=event.id,
+            invocation_id=event.invocation_id,
+            timestamp=event.timestamp,
+            event_data=event.model_dump_json(exclude_none=True),
+            state_delta=dict(event.actions.state_delta) if event.actions and event.actions.state_delta else {},
+            future=loop.create_future(),
+        )
+        with TRACER.start_as_current_span("session_store append_event"):
+            self._pending.append(pending)
+            self._schedule_flush(loop)
+            await pending.future
+        # Only once stored: a stale or missing session leaves it untouched
+        self._update_session_state(session, event)
+        session.events.append(event)
+        session.last_update_time = event.timestamp
+        return event
+
+    def _schedule_flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._loop is not loop:
+            self._loop, self._flush_lock = loop, asyncio.Lock()
+        if self._flush_scheduled:
+            return
+        self._flush_scheduled = True
+        task = loop.create_task(self._flush())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush(self) -> None:
+        # Events appended while an earlier batch is being written queue up
+        # behind the lock and go out together in the next transaction.
+        async with self._flush_lock:
+            self._flush_scheduled = False
+            batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            if self._pending:
+                self._schedule_flush(asyncio.get_running_loop())
+            if not batch:
+                return
+            try:
+                errors = await asyncio.to_thread(self._write_batch, batch)
+            except Exception as error:
+                errors = [error] * len(batch)
+            for pending, error in zip(batch, errors):
+                if pending.future.done():
+                    continue
+                if error is None:
+                    pending.future.set_result(None)
+                else:
+                    pending.future.set_exception(error)
+
+    def _write_batch(self, batch: list[_PendingEvent]) -> list[Optional[Exception]]:
+        """Write a batch in one transaction; returns a per-event error (or None)."""
+        errors: list[Optional[Exception]] = [None] * len(batch)
+        by_session: dict[tuple, list[int]] = {}
+        for index, pending in enumerate(batch):
+            by_session.setdefault(pending.session_key, []).append(index)
+
+        event_rows = []
+        with TRACER.start_as_current_span("session_store write_batch") as span, \
+                self._pool.transaction() as connection:
+            span.set_attribute("send_money.batch.events", len(batch))
+            span.set_attribute("send_money.batch.sessions", len(by_session))
+            for (app_name, user_id, session_id), indexes in by_session.items():
+                row = connection.execute(SELECT_SESSION, (app_name, user_id, session_id)).fetchone()
+                if row is None:
+                    error = ValueError(f"Session {session_id} not found.")
+                elif row[1] > batch[indexes[0]].expected_update_time + STALE_TOLERANCE:
+                    error = ValueError(
+                        "The last_update_time provided in the session object is earlier"
+                        " than the update_time in storage. Please check if it is a stale session."
+                    )
+                else:
+                    error = None
+                if error:
+                    for index in indexes:
+                        errors[index] = error
+                    continue
+
+                session_state = json.loads(row[0])
+                app_delta, user_delta = {}, {}
+                for index in indexes:
+                    app_part, user_part, session_part = split_state(batch[index].state_delta)
+                    app_delta.update(app_part)
+                    user_delta.update(user_part)
+                    session_state.update(session_part)
+                    pending = batch[index]
+                    event_rows.append((
+                        app_name, user_id, session_id, pending.event_id,
+                        pending.invocation_id, pending.timestamp, pending.event_data
+                    ))
+                last_timestamp = batch[indexes[-1]].timestamp
+                self._upsert_scoped_state(connection, app_name, user_id, app_delta, user_delta, last_timestamp)
+                connection.execute(
+                    UPDATE_SESSION,
+                    (json.dumps(session_state), last_timestamp, app_name, user_id, session_id)
+                )
+            connection.executemany(INSERT_EVENT, event_rows)
+        self.batches_written += 1
+        self.events_written += len(event_rows)
+        return errors
+
+    async def _drain(self) -> None:
+        """Wait until every event appended so far is on disk."""
+        while self._flush_tasks:
+            await asyncio.gather(*list(self._flush_tasks), return_exceptions=True)
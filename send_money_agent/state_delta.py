@@ -0,0 +1,148 @@
+"""
+Minimal state deltas for tool invocations.
+
+Every write to `tool_context.state` ends up in the event's `state_delta` and
+is persisted by the session service, even when the value did not change.
+`commits_minimal_delta` gives a tool a staged view of the state: writes are
+buffered, and when the tool returns only the keys whose value actually
+changed are written back, as one delta per invocation.
+"""
+import functools
+import inspect
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+_MISSING = object()
+
+
+class StagedState:
+    """View over a session state that buffers writes until `commit()`."""
+
+    def __init__(self, state):
+        self._state = state
+        self._staged: dict[str, Any] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._staged:
+            return self._staged[key]
+        return self._state[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._staged[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._staged or key in self._state
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self._staged:
+            return self._staged[key]
+        return self._state.get(key, default)
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, values: dict[str, Any]) -> None:
+        self._staged.update(values)
+
+    def commit(self) -> dict[str, Any]:
+        """Write back only the changed keys and return them."""
+        delta = {}
+        for key, value in self._staged.items():
+            current = self._state.get(key, _MISSING)
+            if current is _MISSING or current != value or type(current) is not type(value):
+                delta[key] = value
+        for key, value in delta.items():
+            self._state[key] = value
+        self._staged.clear()
+        return delta
+
+
+class _StagedContext:
+    """Tool context stand-in whose `state` is staged; everything else is delegated."""
+
+    def __init__(self, tool_context):
+        self._tool_context = tool_context
+        self.state = StagedState(tool_context.state)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._tool_context, name)
+
+
+class DeltaStats:
+    """Keys and bytes written to state, per turn (invocation) and in total."""
+
+    def __init__(self, max_turns: int = 1000):
+        self.max_turns = max_turns
+        self.tool_calls = 0
+        self.keys_written = 0
+        self.bytes_written = 0
+        self._turns: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, invocation_id: Optional[str], delta: dict) -> None:
+        size = len(json.dumps(delta, default=str)) if delta else 0
+        with self._lock:
+            self.tool_calls += 1
+            self.keys_written += len(delta)
+            self.bytes_written += size
+            if invocation_id is None:
+                return
+            turn = self._turns.get(invocation_id)
+            if turn is None:
+                turn = self._turns[invocation_id] = {"tool_calls": 0, "keys": 0, "bytes": 0}
+                if len(self._turns) > self.max_turns:
+                    self._turns.popitem(last=False)
+            turn["tool_calls"] += 1
+            turn["keys"] += len(delta)
+            turn["bytes"] += size
+
+    def turn(self, invocation_id: str) -> dict:
+        """Counters for a single turn (zeros if nothing was written)."""
+        with self._lock:
+            return dict(self._turns.get(invocation_id, {"tool_calls": 0, "keys": 0, "bytes": 0}))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "tool_calls": self.tool_calls,
+                "keys_written": self.keys_written,
+                "bytes_written": self.bytes_written,
+                "turns": len(self._turns),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.tool_calls = self.keys_written = self.bytes_written = 0
+            self._turns.clear()
+
+
+DELTA_STATS = DeltaStats()
+
+
+def commits_minimal_delta(tool):
+    """
+    Decorate a tool so its state writes are staged and committed as one minimal delta.
+
+    The wrapper keeps the tool's signature and docstring, so ADK builds the
+    same function declaration for it. If the tool raises, nothing it staged
+    is written.
+    """
+    signature = inspect.signature(tool)
+
+    @functools.wraps(tool)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        tool_context = bound.arguments['tool_context']
+        staged_context = _StagedContext(tool_context)
+        bound.arguments['tool_context'] = staged_context
+        # A tool that raises leaves its staged writes uncommitted
+        result = tool(*bound.args, **bound.kwargs)
+        delta = staged_context.state.commit()
+        DELTA_STATS.record(getattr(tool_context, 'invocation_id', None), delta)
+        return result
+
+    return wrapper
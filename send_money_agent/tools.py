@@ -1,17 +1,31 @@
-import uuid
 from typing import Optional
 from google.adk.tools import ToolContext
 
-from .mock_data import get_supported_country_names, get_country_data, SUPPORTED_COUNTRIES
+from .mock_data import get_corridor_registry, get_default_country_data
+from .event_log import record_screening_hold
+from .export import get_exporter
+from .ledger import LedgerError, get_ledger
+from .rates import get_rate_service
+from .state_delta import commits_minimal_delta
+from .tracing import traced_tool
 from .helpers import (
+    apply_quote,
     calculate_receive_amount,
+    ensure_current_quote,
+    quote_is_current,
+    refresh_quote,
     clear_validation_state,
     validate_amount,
     check_beneficiary_clarification,
-    get_initial_state
+    get_initial_state,
+    get_missing_fields,
+    transfer_idempotency_key,
+    transfer_record
 )
 
 
+@traced_tool
+@commits_minimal_delta
 def set_destination(country: str, tool_context: ToolContext) -> dict:
     """
     Set destination country and load its configuration.
@@ -25,23 +39,44 @@ def set_destination(country: str, tool_context: ToolContext) -> dict:
     if tool_context.state.get('stage') == 'initial':
         tool_context.state['stage'] = 'collecting'
     
-    country_data = get_country_data(country)
+    return _apply_destination(country, tool_context)
+
+
+def _apply_destination(country: str, tool_context: ToolContext) -> dict:
+    """Validate the country, snapshot its rate and load its configuration."""
+    # Forgives case, accents and typos ("brasil", "Mexcio"); one snapshot for the whole call
+    registry = get_corridor_registry()
+    match = registry.resolve_country(country)
+    corridor = registry.lookup(match.value) if match.value else None
+    country_data = corridor.as_dict() if corridor else None
     
     if not country_data:
-        supported = get_supported_country_names()
-        tool_context.state['validation_errors'] = f"Country '{country}' is not supported. We currently support: {', '.join(supported)}."
+        supported = registry.country_names
+        suggestion = f" Did you mean {' or '.join(match.suggestions)}?" if match.suggestions else ""
+        tool_context.state['validation_errors'] = f"Country '{country}' is not supported. We currently support: {', '.join(supported)}.{suggestion}"
         return {
             "success": False,
             "error": "country_not_supported",
             "message": f"Country '{country}' is not supported",
-            "supported_countries": supported
+            "supported_countries": supported,
+            "suggestions": list(match.suggestions)
+        }
+    
+    # Snapshot the live rate for this corridor
+    quote = get_rate_service().quote(country_data['currency_code'])
+    if not quote:
+        tool_context.state['validation_errors'] = f"Exchange rates for {country_data['country_name']} are temporarily unavailable. Please try again shortly."
+        return {
+            "success": False,
+            "error": "rate_unavailable",
+            "message": f"No exchange rate available for {country_data['currency_code']}"
         }
     
     # Update state with country information
     tool_context.state['destination_country'] = country_data['country_name']
     tool_context.state['destination_currency_code'] = country_data['currency_code']
-    tool_context.state['exchange_rate'] = country_data['exchange_rate']
     tool_context.state['available_methods'] = country_data['delivery_methods']
+    apply_quote(tool_context, quote)
     
     # If method was previously set but not available in new country, clear it
     current_method = tool_context.state.get('delivery_method')
@@ -56,11 +91,15 @@ def set_destination(country: str, tool_context: ToolContext) -> dict:
         "success": True,
         "country": country_data['country_name'],
         "currency_code": country_data['currency_code'],
-        "exchange_rate": country_data['exchange_rate'],
+        "exchange_rate": quote.rate,
+        "quote_id": quote.quote_id,
+        "quote_expires_at": quote.expires_at,
         "available_methods": country_data['delivery_methods']
     }
 
 
+@traced_tool
+@commits_minimal_delta
 def set_amount(amount: float, tool_context: ToolContext) -> dict:
     """
     Set the amount to send (in USD) and calculate receive amount.
@@ -74,6 +113,11 @@ def set_amount(amount: float, tool_context: ToolContext) -> dict:
     if tool_context.state.get('stage') == 'initial':
         tool_context.state['stage'] = 'collecting'
     
+    return _apply_amount(amount, tool_context)
+
+
+def _apply_amount(amount: float, tool_context: ToolContext) -> dict:
+    """Validate and store the USD amount, then recalculate the receive amount."""
     # Validate amount
     is_valid, error_message = validate_amount(amount)
     if not is_valid:
@@ -85,6 +129,7 @@ def set_amount(amount: float, tool_context: ToolContext) -> dict:
         }
     
     tool_context.state['send_amount'] = amount
+    ensure_current_quote(tool_context)
     
     # Calculate receive_amount if we have exchange rate
     if tool_context.state.get('exchange_rate'):
@@ -104,16 +149,25 @@ def set_amount(amount: float, tool_context: ToolContext) -> dict:
     }
 
 
-def calculate_usd_from_target(target_amount: float, tool_context: ToolContext) -> dict:
+@traced_tool
+@commits_minimal_delta
+def calculate_usd_from_target(
+    target_amount: float,
+    tool_context: ToolContext,
+    target_currency: Optional[str] = None
+) -> dict:
     """
     Reverse calculation: Calculate USD amount from target currency amount.
     
-    ONLY converts from supported destination currencies (BRL, MXN, ARS) to USD.
-    Does NOT support cross-currency calculations (e.g., BRL to MXN).
+    The beneficiary is paid in the destination currency. When the user states
+    the target in another supported currency (e.g. "the equivalent of 1000 MXN"
+    while sending to Brazil), pass it as target_currency: the target is
+    converted to the destination currency at the cross rate first.
     
     Args:
-        target_amount: Amount the beneficiary should receive in destination currency
+        target_amount: Amount the beneficiary should receive
         tool_context: ToolContext with access to state
+        target_currency: Currency of target_amount if not the destination currency (BRL, MXN, ARS)
         
     Returns:
         USD amount needed to send, or error if invalid
@@ -124,7 +178,17 @@ def calculate_usd_from_target(target_amount: float, tool_context: ToolContext) -
     if tool_context.state.get('stage') == 'initial':
         tool_context.state['stage'] = 'collecting'
     
+    return _apply_target_amount(target_amount, tool_context, target_currency)
+
+
+def _apply_target_amount(
+    target_amount: float,
+    tool_context: ToolContext,
+    target_currency: Optional[str] = None
+) -> dict:
+    """Derive and store the USD amount from the amount the beneficiary receives."""
     # Get current exchange rate and currency from state
+    ensure_current_quote(tool_context)
     exchange_rate = tool_context.state.get('exchange_rate')
     currency_code = tool_context.state.get('destination_currency_code')
     country = tool_context.state.get('destination_country')
@@ -144,8 +208,30 @@ def calculate_usd_from_target(target_amount: float, tool_context: ToolContext) -
             "message": "Target amount must be greater than 0"
         }
     
+    # A target in another currency becomes a destination-currency amount first
+    receive_amount = target_amount
+    cross_rate = None
+    if target_currency and target_currency.upper() != currency_code:
+        # Imported on first use, like screening below: keeps NumPy out of agent start-up
+        from .rate_matrix import USD, get_rate_matrix
+        matrix = get_rate_matrix()
+        if target_currency not in matrix:
+            supported = ", ".join(matrix.codes)
+            tool_context.state['validation_errors'] = f"'{target_currency}' is not a supported currency. Supported currencies: {supported}."
+            return {
+                "success": False,
+                "error": "unsupported_currency",
+                "message": f"Currency '{target_currency}' is not supported",
+                "supported_currencies": list(matrix.codes)
+            }
+        cross_rate = matrix.rate(target_currency, currency_code)
+        # The quote in state predates the current table: derive the cross rate from the quote
+        if matrix.rate(USD, currency_code) != exchange_rate:
+            cross_rate = exchange_rate / matrix.rate(USD, target_currency)
+        receive_amount = round(target_amount * cross_rate, 2)
+    
     # Calculate USD from target: USD = target / rate
-    usd_amount = round(target_amount / exchange_rate, 2)
+    usd_amount = round(receive_amount / exchange_rate, 2)
     
     # Validate the calculated USD amount
     is_valid, error_message = validate_amount(usd_amount)
@@ -159,16 +245,21 @@ def calculate_usd_from_target(target_amount: float, tool_context: ToolContext) -
     
     # Set the calculated amount in state
     tool_context.state['send_amount'] = usd_amount
-    tool_context.state['receive_amount'] = target_amount
+    tool_context.state['receive_amount'] = receive_amount
     
-    return {
+    result = {
         "success": True,
         "send_amount": usd_amount,
-        "receive_amount": target_amount,
+        "receive_amount": receive_amount,
         "currency_code": currency_code
     }
+    if cross_rate is not None:
+        result.update(target_amount=target_amount, target_currency=target_currency.upper(), cross_rate=cross_rate)
+    return result
 
 
+@traced_tool
+@commits_minimal_delta
 def set_transfer_details(
     tool_context: ToolContext,
     beneficiary: Optional[str] = None,
@@ -177,7 +268,8 @@ def set_transfer_details(
     """
     Set beneficiary name and/or delivery method.
     
-    Validates delivery method and checks beneficiary for clarification needs.
+    Validates delivery method, checks beneficiary for clarification needs and
+    screens it against the watchlist.
     """
     # Clear previous validation state
     clear_validation_state(tool_context)
@@ -186,6 +278,15 @@ def set_transfer_details(
     if tool_context.state.get('stage') == 'initial':
         tool_context.state['stage'] = 'collecting'
     
+    return _apply_transfer_details(tool_context, beneficiary, delivery_method)
+
+
+def _apply_transfer_details(
+    tool_context: ToolContext,
+    beneficiary: Optional[str] = None,
+    delivery_method: Optional[str] = None
+) -> dict:
+    """Store the beneficiary (flagging names that need clarification or review) and a valid delivery method."""
     updates = {}
     
     if beneficiary:
@@ -197,18 +298,36 @@ def set_transfer_details(
         if clarification_needed:
             tool_context.state['clarification_needed'] = clarification_needed
             tool_context.state['clarification_reason'] = clarification_reason
+        
+        # Screen against the watchlist; a potential match holds the transfer (blocks)
+        from .screening import screen_beneficiary
+        status, matches = screen_beneficiary(beneficiary)
+        tool_context.state['screening_hold'] = "potential_match" if status == "hold" else ""
+        if status == "hold":
+            record_screening_hold(tool_context, beneficiary, matches)
+            message = "This recipient needs a compliance review before money can be sent to them."
+            tool_context.state['validation_errors'] = message
+            return {
+                "success": False,
+                "error": "screening_hold",
+                "message": message
+            }
     
     if delivery_method:
-        # Validate method against available methods
+        # Validate method against available methods ("pix", "cash pick-up" and aliases map to them)
         available_methods = tool_context.state.get('available_methods', [])
         if available_methods and delivery_method not in available_methods:
-            tool_context.state['validation_errors'] = f"'{delivery_method}' is not available for {tool_context.state.get('destination_country', 'this country')}. Available methods: {', '.join(available_methods)}."
-            return {
-                "success": False,
-                "error": "invalid_method_for_country",
-                "message": f"Method '{delivery_method}' not available",
-                "available_methods": available_methods
-            }
+            match = get_corridor_registry().match_method(tool_context.state.get('destination_country'), delivery_method)
+            if match.value not in available_methods:
+                tool_context.state['validation_errors'] = f"'{delivery_method}' is not available for {tool_context.state.get('destination_country', 'this country')}. Available methods: {', '.join(available_methods)}."
+                return {
+                    "success": False,
+                    "error": "invalid_method_for_country",
+                    "message": f"Method '{delivery_method}' not available",
+                    "available_methods": available_methods,
+                    "suggestions": list(match.suggestions)
+                }
+            delivery_method = match.value
         tool_context.state['delivery_method'] = delivery_method
         updates['delivery_method'] = delivery_method
     
@@ -218,12 +337,114 @@ def set_transfer_details(
     }
 
 
+@traced_tool
+@commits_minimal_delta
+def update_transfer(
+    tool_context: ToolContext,
+    country: Optional[str] = None,
+    amount: Optional[float] = None,
+    target_amount: Optional[float] = None,
+    beneficiary: Optional[str] = None,
+    delivery_method: Optional[str] = None,
+    target_currency: Optional[str] = None
+) -> dict:
+    """
+    Set any combination of transfer fields in one call.
+    
+    Use this when the user gives several pieces of information at once.
+    Applies them in dependency order: country first (rates and available
+    methods), then the USD amount OR the target amount the beneficiary
+    should receive, then beneficiary and delivery method. Stops at the first
+    invalid field and returns the resulting transfer state, including which
+    fields are still missing.
+    
+    Args:
+        country: Destination country
+        amount: Amount to send, in USD
+        target_amount: Amount the beneficiary should receive, in destination currency
+        beneficiary: Recipient's full name
+        delivery_method: One of the destination's available methods
+        target_currency: Currency of target_amount if not the destination currency
+        tool_context: ToolContext with access to state
+    """
+    clear_validation_state(tool_context)
+    
+    # Move from initial to collecting when user engages
+    if tool_context.state.get('stage') == 'initial':
+        tool_context.state['stage'] = 'collecting'
+    
+    if amount is not None and target_amount is not None:
+        message = "Please give either the amount to send (USD) or the amount to receive, not both."
+        tool_context.state['validation_errors'] = message
+        return {
+            "success": False,
+            "error": "conflicting_amounts",
+            "message": message,
+            "applied": [],
+            **_transfer_summary(tool_context.state)
+        }
+    
+    steps = []
+    if country:
+        steps.append(("country", lambda: _apply_destination(country, tool_context)))
+    if amount is not None:
+        steps.append(("amount", lambda: _apply_amount(amount, tool_context)))
+    elif target_amount is not None:
+        steps.append(("target_amount", lambda: _apply_target_amount(target_amount, tool_context, target_currency)))
+    if beneficiary or delivery_method:
+        steps.append(("transfer_details", lambda: _apply_transfer_details(tool_context, beneficiary, delivery_method)))
+    
+    applied = []
+    for name, step in steps:
+        result = step()
+        if not result.get('success'):
+            return {**result, "applied": applied, **_transfer_summary(tool_context.state)}
+        applied.append(name)
+    
+    return {
+        "success": True,
+        "applied": applied,
+        **_transfer_summary(tool_context.state)
+    }
+
+
+def _transfer_summary(state) -> dict:
+    """Current transfer fields for a consolidated tool result."""
+    summary = {
+        "country": state.get('destination_country'),
+        "currency_code": state.get('destination_currency_code'),
+        "exchange_rate": state.get('exchange_rate'),
+        "send_amount": state.get('send_amount'),
+        "receive_amount": state.get('receive_amount'),
+        "beneficiary": state.get('beneficiary'),
+        "delivery_method": state.get('delivery_method'),
+        "available_methods": state.get('available_methods'),
+        "missing_fields": get_missing_fields(state)
+    }
+    if state.get('clarification_needed'):
+        summary['clarification_reason'] = state.get('clarification_reason')
+    if state.get('screening_hold'):
+        summary['screening_hold'] = state.get('screening_hold')
+    return summary
+
+
+@traced_tool
+@commits_minimal_delta
 def confirm_transfer(confirmed: bool, tool_context: ToolContext) -> dict:
     """
     Finalize or restart the transfer flow.
     
     Blocks confirmation if there are validation errors or missing required fields.
     """
+    # A repeated confirmation of a completed transfer returns the same ID
+    if confirmed and tool_context.state.get('stage') == 'completed' and tool_context.state.get('transaction_id'):
+        transaction_id = tool_context.state['transaction_id']
+        return {
+            "success": True,
+            "transaction_id": transaction_id,
+            "message": f"Transfer confirmed! Transaction ID: {transaction_id}"
+        }
+    
     # Check for blocking errors before confirming
     if confirmed and tool_context.state.get('validation_errors'):
         return {
@@ -232,6 +453,14 @@ def confirm_transfer(confirmed: bool, tool_context: ToolContext) -> dict:
             "message": "Cannot confirm transfer while there are validation errors. Please fix the errors first."
         }
     
+    # A beneficiary held by screening cannot be paid until reviewed
+    if confirmed and tool_context.state.get('screening_hold'):
+        return {
+            "success": False,
+            "error": "screening_hold",
+            "message": "Cannot confirm transfer while the recipient is under compliance review."
+        }
+    
     # CRITICAL: Block confirmation if required fields are missing (e.g., after cancellation)
     if confirmed:
         required_fields = ['destination_country', 'send_amount', 'beneficiary', 'delivery_method']
@@ -243,9 +472,43 @@ def confirm_transfer(confirmed: bool, tool_context: ToolContext) -> dict:
                 "message": f"Cannot confirm transfer. Missing required information: {', '.join(missing)}. Please start a new transfer."
             }
     
+    # Re-quote if the rate snapshot expired; a changed rate needs a fresh confirmation
+    if confirmed and not quote_is_current(tool_context.state):
+        previous_rate = tool_context.state.get('exchange_rate')
+        quote = refresh_quote(tool_context)
+        if not quote:
+            return {
+                "success": False,
+                "error": "rate_unavailable",
+                "message": "Exchange rates are temporarily unavailable. Please try again shortly."
+            }
+        if quote.rate != previous_rate:
+            calculate_receive_amount(tool_context)
+            return {
+                "success": False,
+                "error": "quote_expired",
+                "message": "The exchange rate changed since the quote was given. Please review the updated amounts and confirm again.",
+                "exchange_rate": quote.rate,
+                "send_amount": tool_context.state.get('send_amount'),
+                "receive_amount": tool_context.state.get('receive_amount'),
+                "currency_code": tool_context.state.get('destination_currency_code')
+            }
+    
     if confirmed:
-        # Generate transaction ID and complete
-        transaction_id = f"TXN-{uuid.uuid4().hex[:8].upper()}"
+        # Record in the ledger (idempotent per transfer) and complete
+        try:
+            entry = get_ledger().record(transfer_idempotency_key(tool_context), transfer_record(tool_context.state))
+        except LedgerError:
+            return {
+                "success": False,
+                "error": "ledger_unavailable",
+                "message": "The transfer could not be recorded right now. Please try confirming again shortly."
+            }
+        transaction_id = entry.transaction_id
+        exporter = get_exporter()
+        if exporter is not None:
+            # Non-blocking; a record the exporter cannot buffer is read back from the ledger
+            exporter.submit(entry)
         
         tool_context.state['stage'] = 'completed'
         tool_context.state['transaction_id'] = transaction_id
@@ -267,6 +530,8 @@ def confirm_transfer(confirmed: bool, tool_context: ToolContext) -> dict:
         }
 
 
+@traced_tool
+@commits_minimal_delta
 def cancel_transfer_session(tool_context: ToolContext) -> dict:
     """
     Cancel the current transfer session and reset all state.
@@ -274,8 +539,8 @@ def cancel_transfer_session(tool_context: ToolContext) -> dict:
     Called when user wants to abandon the transfer (says "Stop", "Cancel", "Forget it").
     Wipes all transfer data and returns stage to 'initial'.
     """
-    # Reset all state to initial empty values and Brazil again
-    initial_state = get_initial_state(get_country_data("Brazil"))
+    # Reset all state to initial empty values and the default corridor again
+    initial_state = get_initial_state(get_default_country_data())
     for key, value in initial_state.items():
         tool_context.state[key] = value
     
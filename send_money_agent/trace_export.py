@@ -0,0 +1,61 @@
+"""
+OpenTelemetry SDK pieces behind tracing.configure_tracing().
+
+Kept apart from tracing.py so importing the agent only pulls in the no-op
+`opentelemetry.trace` API; this module (the SDK, the OTLP protobuf encoder)
+is imported once tracing is configured.
+"""
+import base64
+import json
+import threading
+from typing import Sequence
+
+from google.protobuf.json_format import MessageToDict
+from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+from .tracing import STAGE_ATTRIBUTE, _current_stage
+
+ID_FIELDS = ("traceId", "spanId", "parentSpanId")
+
+
+def otlp_json(spans: Sequence[ReadableSpan]) -> dict:
+    """Spans as an OTLP/JSON ExportTraceServiceRequest (hex trace and span IDs)."""
+    request = MessageToDict(encode_spans(spans))
+    for resource_spans in request.get("resourceSpans", []):
+        for scope_spans in resource_spans.get("scopeSpans", []):
+            for span in scope_spans.get("spans", []):
+                for field in ID_FIELDS:
+                    if field in span:
+                        span[field] = base64.b64decode(span[field]).hex()
+    return request
+
+
+class OtlpJsonFileExporter(SpanExporter):
+    """Appends one OTLP/JSON request per export batch to a file (JSON lines)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        line = json.dumps(otlp_json(spans), separators=(",", ":")) + "\n"
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as trace_file:
+                trace_file.write(line)
+        except OSError:
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        pass
+
+
+class StageSpanProcessor(SpanProcessor):
+    """Stamps the current stage on spans opened without one (e.g. ADK's call_llm)."""
+
+    def on_start(self, span, parent_context=None) -> None:
+        stage = _current_stage.get()
+        if stage and STAGE_ATTRIBUTE not in (span.attributes or {}):
+            span.set_attribute(STAGE_ATTRIBUTE, stage)
@@ -0,0 +1,105 @@
+"""
+Latency report for a trace file written by tracing.py (OTLP/JSON lines).
+
+Aggregates span durations per span (each tool, callback, model call and
+persistence step) and per stage, with p50/p95/max and a histogram.
+
+Usage:
+    python -m send_money_agent.trace_report traces.jsonl
+    python -m send_money_agent.trace_report traces.jsonl --by-stage-only
+"""
+import argparse
+import json
+from collections import defaultdict
+from typing import Iterable, Iterator
+
+from .tracing import STAGE_ATTRIBUTE
+
+# Histogram bucket upper bounds, in milliseconds
+BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, float("inf"))
+BAR_WIDTH = 20
+
+CATEGORIES = (
+    ("call_llm", "model"),
+    ("tool ", "tool"),
+    ("execute_tool", "tool (adk)"),
+    ("callback ", "callback"),
+    ("session_store ", "persistence"),
+)
+
+
+def iter_spans(lines: Iterable[str]) -> Iterator[dict]:
+    """Spans from OTLP/JSON ExportTraceServiceRequest lines, with attributes flattened."""
+    for line in lines:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        for resource_spans in request.get("resourceSpans", []):
+            for scope_spans in resource_spans.get("scopeSpans", []):
+                for span in scope_spans.get("spans", []):
+                    attributes = {
+                        attribute["key"]: next(iter(attribute.get("value", {}).values()), None)
+                        for attribute in span.get("attributes", [])
+                    }
+                    yield {
+                        "name": span["name"],
+                        "duration_ms": (int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])) / 1e6,
+                        "attributes": attributes,
+                    }
+
+
+def category_of(name: str) -> str:
+    for prefix, category in CATEGORIES:
+        if name.startswith(prefix):
+            return category
+    return "other"
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def histogram(durations: list[float]) -> str:
+    counts = [0] * len(BUCKETS_MS)
+    for duration in durations:
+        counts[next(i for i, bound in enumerate(BUCKETS_MS) if duration <= bound)] += 1
+    peak = max(counts) or 1
+    blocks = " ▁▂▃▄▅▆▇█"
+    return "".join(blocks[round(count / peak * (len(blocks) - 1))] for count in counts)
+
+
+def print_table(title: str, groups: dict[str, list[float]]) -> None:
+    bucket_labels = " ".join(f"≤{int(b)}" if b != float("inf") else ">1000" for b in BUCKETS_MS)
+    print(f"\n{title}")
+    print(f"  {'':<44} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}  histogram ({bucket_labels} ms)")
+    for name, durations in sorted(groups.items(), key=lambda item: -sum(item[1])):
+        ordered = sorted(durations)
+        print(f"  {name:<44} {len(ordered):>6} {percentile(ordered, 50):>8.2f} "
+              f"{percentile(ordered, 95):>8.2f} {ordered[-1]:>8.2f}  {histogram(ordered)}")
+
+
+def report(path: str, by_stage_only: bool = False) -> None:
+    by_span: dict[str, list[float]] = defaultdict(list)
+    by_stage: dict[str, list[float]] = defaultdict(list)
+    with open(path, encoding="utf-8") as trace_file:
+        for span in iter_spans(trace_file):
+            category = category_of(span["name"])
+            if category == "other":
+                continue
+            by_span[span["name"]].append(span["duration_ms"])
+            stage = span["attributes"].get(STAGE_ATTRIBUTE) or "unknown"
+            by_stage[f"{stage} / {category}"].append(span["duration_ms"])
+    if not by_span:
+        print(f"No spans in {path}")
+        return
+    if not by_stage_only:
+        print_table("Per span", by_span)
+    print_table("Per stage", by_stage)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("path")
+    parser.add_argument("--by-stage-only", action="store_true")
+    args = parser.parse_args()
+    report(args.path, args.by_stage_only)
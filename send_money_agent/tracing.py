@@ -0,0 +1,172 @@
+"""
+Span tracing for tools, callbacks, model calls and state persistence.
+
+Tools and callbacks are wrapped in OpenTelemetry spans carrying the stage,
+tool arguments and validation outcome. ADK already opens spans for the
+invocation, every model request (`call_llm`) and tool execution; with tracing
+configured they are exported alongside ours and tagged with the stage too.
+
+Configuration (environment):
+    SEND_MONEY_TRACE_FILE       Append spans as OTLP/JSON lines to this file
+    SEND_MONEY_TRACE_ENDPOINT   Also send them to an OTLP/HTTP collector
+                                (e.g. http://localhost:4318/v1/traces)
+
+Without either, spans go to OpenTelemetry's no-op tracer (or to whatever
+provider `adk web --otel_to_cloud` installed), and the OpenTelemetry SDK is
+not imported. Summarize a trace file with:
+    python -m send_money_agent.trace_report traces.jsonl
+"""
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+from typing import Any, Optional
+
+from opentelemetry import trace
+
+SERVICE_NAME = "send_money_agent"
+TRACER = trace.get_tracer(SERVICE_NAME)
+
+STAGE_ATTRIBUTE = "send_money.stage"
+
+# Latest stage seen in this context; stamped on spans that start without one
+_current_stage: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("send_money_stage", default=None)
+
+
+def _state_of(args, kwargs) -> Optional[Any]:
+    """State of the first tool/callback context among the arguments."""
+    for value in (*args, *kwargs.values()):
+        state = getattr(value, 'state', None)
+        if state is not None and hasattr(state, 'get'):
+            return state
+    return None
+
+
+def _json_attribute(value: Any) -> str:
+    return json.dumps(value, default=str, sort_keys=True)
+
+
+def traced_tool(tool):
+    """
+    Wrap a tool function in a span.
+
+    Attributes: stage before/after, the call's arguments and its outcome
+    (success, error code, whether validation errors are set).
+    """
+    signature = inspect.signature(tool)
+    span_name = f"tool {tool.__name__}"
+
+    @functools.wraps(tool)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        tool_context = bound.arguments.get('tool_context')
+        state = tool_context.state
+        stage = state.get('stage', 'initial')
+        _current_stage.set(stage)
+        arguments = {key: value for key, value in bound.arguments.items() if key != 'tool_context'}
+        with TRACER.start_as_current_span(span_name) as span:
+            span.set_attribute(STAGE_ATTRIBUTE, stage)
+            span.set_attribute("send_money.tool.name", tool.__name__)
+            span.set_attribute("send_money.tool.args", _json_attribute(arguments))
+            response = tool(*args, **kwargs)
+            stage_after = state.get('stage', 'initial')
+            _current_stage.set(stage_after)
+            span.set_attribute("send_money.stage_after", stage_after)
+            if isinstance(response, dict):
+                span.set_attribute("send_money.tool.success", bool(response.get('success')))
+                if response.get('error'):
+                    span.set_attribute("send_money.tool.error", str(response['error']))
+            span.set_attribute("send_money.validation_failed", bool(state.get('validation_errors')))
+            return response
+
+    return wrapper
+
+
+def traced_callback(callback):
+    """Wrap an agent/model/tool callback (sync or async) in a span tagged with the stage."""
+    span_name = f"callback {callback.__name__}"
+
+    def start(args, kwargs):
+        state = _state_of(args, kwargs)
+        stage = state.get('stage', 'initial') if state is not None else None
+        if stage:
+            _current_stage.set(stage)
+        return state, stage
+
+    def finish(span, state) -> None:
+        if state is not None:
+            stage_after = state.get('stage', 'initial')
+            _current_stage.set(stage_after)
+            span.set_attribute("send_money.stage_after", stage_after)
+
+    if inspect.iscoroutinefunction(callback):
+        @functools.wraps(callback)
+        async def async_wrapper(*args, **kwargs):
+            state, stage = start(args, kwargs)
+            with TRACER.start_as_current_span(span_name) as span:
+                if stage:
+                    span.set_attribute(STAGE_ATTRIBUTE, stage)
+                result = await callback(*args, **kwargs)
+                finish(span, state)
+                span.set_attribute("send_money.callback.short_circuit", result is not None)
+                return result
+        return async_wrapper
+
+    @functools.wraps(callback)
+    def wrapper(*args, **kwargs):
+        state, stage = start(args, kwargs)
+        with TRACER.start_as_current_span(span_name) as span:
+            if stage:
+                span.set_attribute(STAGE_ATTRIBUTE, stage)
+            result = callback(*args, **kwargs)
+            finish(span, state)
+            span.set_attribute("send_money.callback.short_circuit", result is not None)
+            return result
+    return wrapper
+
+
+_configured_provider = None
+_configure_lock = threading.Lock()
+
+
+def configure_tracing(path: Optional[str] = None, endpoint: Optional[str] = None):
+    """
+    Install a TracerProvider exporting to an OTLP/JSON file and/or an OTLP/HTTP endpoint.
+
+    Does nothing if another provider is already installed. Returns the
+    provider (call `.force_flush()` before reading the file).
+    """
+    # The SDK and the OTLP encoder cost ~75 ms to import: only when tracing is on
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+    from .trace_export import OtlpJsonFileExporter, StageSpanProcessor
+
+    global _configured_provider
+    with _configure_lock:
+        if _configured_provider is not None:
+            return _configured_provider
+        if isinstance(trace.get_tracer_provider(), TracerProvider):
+            return None
+        provider = TracerProvider(resource=Resource.create({"service.name": SERVICE_NAME}))
+        provider.add_span_processor(StageSpanProcessor())
+        if path:
+            provider.add_span_processor(BatchSpanProcessor(OtlpJsonFileExporter(path)))
+        if endpoint:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=endpoint)))
+        trace.set_tracer_provider(provider)
+        _configured_provider = provider
+        return provider
+
+
+def configure_tracing_from_env():
+    """configure_tracing() from SEND_MONEY_TRACE_FILE / SEND_MONEY_TRACE_ENDPOINT, if set."""
+    path = os.getenv("SEND_MONEY_TRACE_FILE")
+    endpoint = os.getenv("SEND_MONEY_TRACE_ENDPOINT")
+    if path or endpoint:
+        return configure_tracing(path=path, endpoint=endpoint)
+    return None
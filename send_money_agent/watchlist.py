@@ -0,0 +1,43 @@
+"""
+Build and query a watchlist index for beneficiary screening (screening.py).
+
+Usage:
+    python -m send_money_agent.watchlist build watchlist.txt watchlist-index/
+    python -m send_money_agent.watchlist search watchlist-index/ "Carlos Lopes"
+"""
+import argparse
+import time
+
+from .screening import DEFAULT_MIN_SCORE, WatchlistIndex, build_index
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="index a file with one name per line")
+    build.add_argument("source")
+    build.add_argument("directory")
+    search = commands.add_parser("search", help="query an index")
+    search.add_argument("directory")
+    search.add_argument("name")
+    search.add_argument("--min-score", type=float, default=DEFAULT_MIN_SCORE)
+    search.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start = time.perf_counter()
+        with open(args.source, encoding="utf-8") as source:
+            total = build_index((line for line in source if line.strip()), args.directory)
+        print(f"indexed {total:,} names in {time.perf_counter() - start:.1f}s -> {args.directory}")
+    else:
+        index = WatchlistIndex(args.directory)
+        start = time.perf_counter()
+        matches = index.search(args.name, limit=args.limit, min_score=args.min_score)
+        elapsed = time.perf_counter() - start
+        for match in matches:
+            print(f"{match.score:.3f}  #{match.entry:<10} {match.name}")
+        print(f"{len(matches)} match(es) in {elapsed * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
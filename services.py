@@ -0,0 +1,23 @@
+"""
+Custom service registration for `adk web` / `adk run`.
+
+ADK imports this module from the agents directory (this folder) at startup.
+It registers the `sendmoney` session scheme:
+
+    adk web --session_service_uri sendmoney:///sessions.db
+"""
+from urllib.parse import urlparse
+
+from google.adk.cli.service_registry import get_service_registry
+
+
+def sendmoney_session_factory(uri: str, **kwargs):
+    from send_money_agent.session_store import SqliteSessionService
+
+    db_path = urlparse(uri).path
+    if db_path.startswith("/"):
+        db_path = db_path[1:]
+    return SqliteSessionService(db_path=db_path or "sessions.db")
+
+
+get_service_registry().register_session_service("sendmoney", sendmoney_session_factory)
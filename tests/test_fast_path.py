@@ -0,0 +1,47 @@
+"""Fast-path parsing: what it may apply without the model, and what it must leave alone."""
+import pytest
+
+from send_money_agent.fast_path import extract_intent
+
+COLLECTING = {"destination_country": "Brazil", "stage": "collecting", "beneficiary": ""}
+
+
+@pytest.mark.parametrize("text", [
+    "Send $100 to Costa Rica",
+    "send money to New York",
+    "Send it to Ana Souza",
+    "Send $100 to Brasill Lopes in Mexico",
+])
+def test_place_like_names_are_left_to_the_model(text):
+    assert extract_intent(text, COLLECTING) is None
+
+
+def test_name_after_to_is_taken_when_the_country_is_named():
+    intent = extract_intent("Send $100 to Maria Lopes via Pix in Brazil", COLLECTING)
+    assert (intent.country, intent.amount, intent.beneficiary, intent.delivery_method) == (
+        "Brazil", 100.0, "Maria Lopes", "Pix"
+    )
+    assert intent.fully_covered
+
+
+def test_bare_name_reply_is_a_beneficiary():
+    assert extract_intent("Juan Perez", COLLECTING).beneficiary == "Juan Perez"
+
+
+@pytest.mark.parametrize("text, amount", [
+    ("Send 2k to Maria Lopes in Brazil", 2000.0),
+    ("Send 1.5k dollars", 1500.0),
+    ("100 dollars", 100.0),
+])
+def test_magnitude_suffix_scales_the_amount(text, amount):
+    assert extract_intent(text, COLLECTING).amount == amount
+
+
+@pytest.mark.parametrize("text", [
+    "Send 100 euros",
+    "Send 100 EUR",
+    "Send 100 EUR to Brazil",
+    "Send 100 to Maria Lopes in Brazil asap",
+])
+def test_unexplained_word_next_to_a_slot_is_left_to_the_model(text):
+    assert extract_intent(text, COLLECTING) is None
@@ -0,0 +1,127 @@
+"""Ledger crash recovery: torn tails, sequential transaction IDs, idempotent replay."""
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from send_money_agent.ledger import Ledger, LedgerError, format_transaction_id
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRANSFER = {"destination_country": "Brazil", "send_amount": 100.0, "beneficiary": "Maria Silva"}
+TORN_LINE = b'{"seq":999999999,"transaction_id":"TXN-torn","idem'
+
+CHILD = """
+import sys, threading
+from send_money_agent.ledger import Ledger
+ledger = Ledger(sys.argv[1])
+lock = threading.Lock()
+def worker(n):
+    i = 0
+    while True:
+        entry = ledger.record(f"w{n}-{i}", {"n": n, "i": i})
+        with lock:
+            print(entry.idempotency_key, entry.transaction_id, flush=True)
+        i += 1
+for n in range(8):
+    threading.Thread(target=worker, args=(n,), daemon=True).start()
+threading.Event().wait()
+"""
+
+
+def seqs_on_disk(path: str) -> list[int]:
+    with open(path, "rb") as ledger_file:
+        return [json.loads(line)['seq'] for line in ledger_file]
+
+
+def fill(path: str, count: int) -> dict[str, str]:
+    ledger = Ledger(path, fsync=False)
+    ids = {f"key-{i}": ledger.record(f"key-{i}", TRANSFER).transaction_id for i in range(count)}
+    ledger.close()
+    return ids
+
+
+def test_torn_tail_is_dropped_on_reopen(tmp_path):
+    path = str(tmp_path / "ledger.jsonl")
+    ids = fill(path, 20)
+    with open(path, "ab") as ledger_file:
+        ledger_file.write(TORN_LINE)
+
+    ledger = Ledger(path, fsync=False)
+    assert ledger.truncated_bytes == len(TORN_LINE)
+    assert len(ledger) == 20
+    assert all(ledger.get(key).transaction_id == txn for key, txn in ids.items())
+    assert ledger.record("after-crash", TRANSFER).seq == 21
+    ledger.close()
+    assert seqs_on_disk(path) == list(range(1, 22))
+
+
+def test_corrupt_line_before_the_tail_is_an_error(tmp_path):
+    path = str(tmp_path / "ledger.jsonl")
+    fill(path, 3)
+    with open(path, "rb") as ledger_file:
+        first_line = ledger_file.readline()
+    # A complete line after the bad one: not a write cut short, so not repaired
+    with open(path, "ab") as ledger_file:
+        ledger_file.write(TORN_LINE + b"\n" + first_line)
+
+    with pytest.raises(LedgerError):
+        Ledger(path, fsync=False)
+
+
+def test_transaction_ids_are_sequential(tmp_path):
+    path = str(tmp_path / "ledger.jsonl")
+    ledger = Ledger(path, fsync=False)
+    entries = []
+
+    def worker(n):
+        entries.extend(ledger.record(f"w{n}-{i}", TRANSFER) for i in range(50))
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    ledger.close()
+
+    assert sorted(entry.seq for entry in entries) == list(range(1, 401))
+    assert all(entry.transaction_id == format_transaction_id(entry.seq) for entry in entries)
+    assert seqs_on_disk(path) == list(range(1, 401))
+
+
+def test_replay_returns_the_original_transaction(tmp_path):
+    path = str(tmp_path / "ledger.jsonl")
+    ids = fill(path, 10)
+    size = os.path.getsize(path)
+
+    ledger = Ledger(path, fsync=False)
+    replayed = {key: ledger.record(key, {"changed": True}).transaction_id for key in ids}
+    ledger.close()
+
+    assert replayed == ids
+    assert os.path.getsize(path) == size
+
+
+def test_acknowledged_transfers_survive_sigkill(tmp_path):
+    path = str(tmp_path / "crash.jsonl")
+    child = subprocess.Popen(
+        [sys.executable, "-c", CHILD, path], stdout=subprocess.PIPE, text=True,
+        env={**os.environ, "PYTHONPATH": ROOT},
+    )
+    lines = [child.stdout.readline() for _ in range(500)]
+    child.send_signal(signal.SIGKILL)
+    output, _ = child.communicate()
+    acknowledged = dict(line.split() for line in lines + output.splitlines() if len(line.split()) == 2)
+    with open(path, "ab") as ledger_file:
+        ledger_file.write(TORN_LINE)
+
+    ledger = Ledger(path, fsync=False)
+    assert all((entry := ledger.get(key)) is not None and entry.transaction_id == txn
+               for key, txn in acknowledged.items())
+    seqs = seqs_on_disk(path)
+    assert all(a < b for a, b in zip(seqs, seqs[1:]))
+    assert ledger.record("after-crash", TRANSFER).seq == seqs[-1] + 1
+    ledger.close()
@@ -0,0 +1,35 @@
+"""Prompt registry: a confirmed transfer is counted once per session."""
+from send_money_agent.prompt_registry import MAX_OPEN, PromptRegistry
+
+
+def completed(registry: PromptRegistry) -> int:
+    return sum(row['completed'] for row in registry.comparison())
+
+
+def finish_turn(registry: PromptRegistry, state: dict, turn: int) -> None:
+    registry.start_turn("session", f"turn-{turn}", state)
+    registry.end_turn("session", f"turn-{turn}", registry.version_of(state), state)
+
+
+def test_transfer_counted_once_across_turns_and_restarts():
+    state = {"transaction_id": ""}
+    registry = PromptRegistry()
+    finish_turn(registry, state, 1)
+    state["transaction_id"] = "TXN-0000000001"
+    finish_turn(registry, state, 2)
+    finish_turn(registry, state, 3)
+    assert completed(registry) == 1
+
+    restarted = PromptRegistry()
+    finish_turn(restarted, state, 4)
+    assert completed(restarted) == 0
+
+
+def test_transfer_not_counted_again_after_eviction():
+    state = {"transaction_id": "TXN-0000000001"}
+    registry = PromptRegistry()
+    finish_turn(registry, state, 1)
+    for n in range(MAX_OPEN + 1):
+        registry._open_transfer(f"other-{n}", registry.version_of(state))
+    finish_turn(registry, state, 2)
+    assert completed(registry) == 1
@@ -0,0 +1,124 @@
+"""Cross-rate matrix: amounts buy their targets, cross rates follow the table, incremental updates match rebuilds."""
+import random
+
+import numpy as np
+import pytest
+from google.adk.sessions.state import State
+
+from send_money_agent.agent import INITIAL_STATE
+from send_money_agent.mock_data import get_country_data
+from send_money_agent.rate_matrix import USD, RateMatrix, get_rate_matrix, set_rate_matrix
+from send_money_agent.rates import RateCache, RateProvider, StaticRateProvider, set_rate_service
+from send_money_agent.tools import calculate_usd_from_target, set_amount, set_destination
+
+RATES = StaticRateProvider().fetch_rates()
+COUNTRIES = ("Brazil", "Mexico", "Argentina")
+
+
+class _TableProvider(RateProvider):
+    def __init__(self, rates: dict[str, float]):
+        self.rates = rates
+
+    def fetch_rates(self) -> dict[str, float]:
+        return dict(self.rates)
+
+
+class _ToolContext:
+    def __init__(self, country: str):
+        self.state = State(value={**INITIAL_STATE}, delta={})
+        set_destination(country=country, tool_context=self)
+
+
+def targets(count: int, seed: int = 7) -> list[float]:
+    generator = random.Random(seed)
+    return [round(generator.uniform(0.01, 50_000), generator.choice((0, 1, 2))) for _ in range(count)]
+
+
+def test_usd_entries_equal_the_rate_table():
+    matrix = RateMatrix(RATES)
+    assert all(matrix.rate(USD, code) == rate for code, rate in RATES.items())
+
+
+@pytest.mark.parametrize("country", COUNTRIES)
+def test_usd_for_target_buys_the_target(country):
+    matrix = RateMatrix(RATES)
+    code = get_country_data(country)['currency_code']
+    rate = RATES[code]
+    for target in targets(2000):
+        context = _ToolContext(country)
+        usd = matrix.usd_for_target(target, code)
+        if not set_amount(amount=usd, tool_context=context)['success']:
+            continue
+        # The USD amount is rounded to the cent: the target is missed by at most half a cent of USD
+        assert abs(context.state['receive_amount'] - target) <= 0.005 * rate + 0.005
+
+
+def test_cross_rates_follow_the_rate_table():
+    matrix = RateMatrix(RATES)
+    for source in RATES:
+        for destination in RATES:
+            assert matrix.rate(source, destination) == pytest.approx(RATES[destination] / RATES[source], rel=1e-12)
+
+
+@pytest.mark.parametrize("country", COUNTRIES)
+def test_cross_currency_target_converts_at_the_table_rate(country):
+    destination = get_country_data(country)['currency_code']
+    rate = RATES[destination]
+    for target in targets(300):
+        context = _ToolContext(country)
+        for source in RATES:
+            if source == destination:
+                continue
+            result = calculate_usd_from_target(target_amount=target, tool_context=context, target_currency=source)
+            if not result['success']:
+                continue
+            assert abs(result['receive_amount'] - target * rate / RATES[source]) <= 0.005 + 1e-9
+            # The USD to send buys the converted target, up to half a cent of USD
+            assert abs(result['send_amount'] * rate - result['receive_amount']) <= 0.005 * rate + 0.005
+
+
+@pytest.mark.parametrize("country", COUNTRIES)
+def test_target_in_the_destination_currency_changes_nothing(country):
+    destination = get_country_data(country)['currency_code']
+    for target in targets(300):
+        context = _ToolContext(country)
+        plain = calculate_usd_from_target(target_amount=target, tool_context=context)
+        explicit = calculate_usd_from_target(target_amount=target, tool_context=context,
+                                             target_currency=destination)
+        assert plain == explicit
+
+
+def test_incremental_updates_equal_a_rebuild_bit_for_bit():
+    generator = random.Random(200)
+    rates = dict(RATES)
+    while len(rates) < 200:
+        rates[f"C{len(rates):04d}"] = round(generator.uniform(0.1, 5000), 4)
+    matrix = RateMatrix(rates)
+    updated = dict(zip(matrix.codes[1:], matrix.as_arrays()[1][0, 1:].tolist()))
+    for _ in range(50):
+        code = generator.choice(matrix.codes[1:])
+        updated[code] = round(generator.uniform(0.1, 5000), 4)
+        matrix.update_rate(code, updated[code])
+
+    rebuilt = RateMatrix(updated)
+    assert matrix.incremental_updates == 50
+    assert all(np.array_equal(a, b) for a, b in zip(matrix.as_arrays()[1:], rebuilt.as_arrays()[1:]))
+
+
+def test_replaced_matrix_stops_following_the_rate_cache():
+    provider = _TableProvider(dict(RATES))
+    service = RateCache(provider)
+    set_rate_service(service)
+    try:
+        set_rate_matrix(None)
+        replaced = get_rate_matrix()
+        set_rate_matrix(None)
+        current = get_rate_matrix()
+        provider.rates["BRL"] = RATES["BRL"] * 2
+        service.refresh()
+
+        assert current.rate(USD, "BRL") == RATES["BRL"] * 2
+        assert replaced.rate(USD, "BRL") == RATES["BRL"]
+    finally:
+        set_rate_matrix(None)
+        set_rate_service(None)
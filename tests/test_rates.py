@@ -0,0 +1,23 @@
+"""Process-wide rate cache: a replaced cache is detached from corridor reloads."""
+from send_money_agent.corridor_source import DEFAULT_CORRIDORS_FILE, CorridorSource, set_corridor_source
+from send_money_agent.rates import get_rate_service, set_rate_service
+
+
+def test_replaced_service_stops_following_corridor_reloads(monkeypatch):
+    monkeypatch.delenv("SEND_MONEY_RATES_URL", raising=False)
+    source = CorridorSource(DEFAULT_CORRIDORS_FILE)
+    set_corridor_source(source)
+    set_rate_service(None)
+    try:
+        replaced = get_rate_service()
+        set_rate_service(None)
+        current = get_rate_service()
+
+        previous = source.registry
+        source._notify(previous, previous)
+        assert replaced.fetch_count == 0
+        assert current.fetch_count == 1
+        assert len(source._listeners) == 1
+    finally:
+        set_rate_service(None)
+        set_corridor_source(None)
@@ -0,0 +1,44 @@
+"""Rendered summary: only in answer to tool calls the model made itself."""
+from google.adk.events import Event
+from google.adk.models import LlmRequest
+from google.genai import types
+
+from send_money_agent.receipts import render_reply
+
+STATE = {
+    "stage": "confirming", "destination_country": "Brazil", "destination_currency_code": "BRL",
+    "exchange_rate": 5.36, "send_amount": 100.0, "receive_amount": 536.0, "beneficiary": "Maria Lopes",
+    "delivery_method": "Pix", "validation_errors": "", "clarification_needed": "",
+}
+RESPONSE = types.Part.from_function_response(name="update_transfer", response={"success": True})
+
+
+def request(text: str) -> LlmRequest:
+    return LlmRequest(contents=[
+        types.Content(role='user', parts=[types.Part(text=text)]),
+        types.Content(role='model', parts=[types.Part.from_function_call(name="update_transfer", args={})]),
+        types.Content(role='user', parts=[RESPONSE]),
+    ])
+
+
+def events(text: str, model_called: bool) -> list[Event]:
+    stored = [Event(author="user", invocation_id="turn", content=types.Content(role='user', parts=[types.Part(text=text)]))]
+    if model_called:
+        stored.append(Event(author="agent", invocation_id="turn", content=types.Content(role='user', parts=[RESPONSE])))
+    return stored
+
+
+def test_summary_answers_the_models_own_tool_call():
+    text = "Send $100 to Maria Lopes via Pix in Brazil"
+    reply = render_reply(STATE, request(text), events(text, model_called=True), "turn")
+    assert reply is not None and "Recipient: Maria Lopes" in reply
+
+
+def test_fast_path_results_are_left_to_the_model():
+    text = "Send $100 to Maria Lopes via Pix in Brazil"
+    assert render_reply(STATE, request(text), events(text, model_called=False), "turn") is None
+
+
+def test_question_is_left_to_the_model():
+    text = "Send $100 to Maria Lopes via Pix in Brazil, how long does it take?"
+    assert render_reply(STATE, request(text), events(text, model_called=True), "turn") is None
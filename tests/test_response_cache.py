@@ -0,0 +1,14 @@
+"""Response cache: slot values are never answered from the cache."""
+import pytest
+
+from send_money_agent.response_cache import cacheable_utterance
+
+
+@pytest.mark.parametrize("text", ["maria", "Maria", "Maria Lopes", "send 2k", "to Maria Lopes in Brazil"])
+def test_possible_slot_values_are_not_cacheable_while_collecting(text):
+    assert cacheable_utterance(text, {"stage": "collecting"}) is None
+
+
+@pytest.mark.parametrize("text", ["hi", "Hello!", "ok thanks", "Is it safe?"])
+def test_small_talk_is_cacheable_while_collecting(text):
+    assert cacheable_utterance(text, {"stage": "collecting"}) is not None